@@ -0,0 +1,29 @@
+"""add id to ix_users_role_is_active for keyset pagination
+
+Revision ID: b7e4c1d2a9f3
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c1d2a9f3'
+down_revision: Union[str, None] = 'a1b2c3d4e5f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset пагинация сортирует по (role, is_active, id): с id в конце индекса
+    # страница читается index scan'ом без сортировки
+    op.drop_index('ix_users_role_is_active', table_name='users')
+    op.create_index('ix_users_role_is_active', 'users', ['role', 'is_active', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_role_is_active', table_name='users')
+    op.create_index('ix_users_role_is_active', 'users', ['role', 'is_active'])
@@ -2,6 +2,7 @@
 from fastapi import APIRouter
 
 from app.api.v1 import health, test, cache, tasks, users
+from app.core.config import settings
 
 # Создаем главный роутер для v1
 api_router = APIRouter(
@@ -20,4 +21,8 @@ api_router.include_router(test.router, prefix="/test", tags=["test"])
 api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
 api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 api_router.include_router(users.router)
-# Webhook обрабатывается отдельным микросервисом бота через его собственный веб-сервер (порт 8443)
+# По умолчанию webhook обрабатывается отдельным микросервисом бота через его собственный веб-сервер (порт 8443)
+if settings.WEBHOOK_API_ENABLED:
+    from app.api.v1 import webhook
+
+    api_router.include_router(webhook.router, tags=["webhook"])
@@ -4,8 +4,16 @@ from redis.asyncio import Redis
 
 from app.core.redis import get_redis
 from app.services.cache_service import CacheService
+from app.services.near_cache import invalidation_bus, near_cache
+from app.services.user_cache import user_cache_stats
 from app.schemas.requests import CacheRequest
-from app.schemas.responses import RedisTestResponse, CacheSetResponse, CacheGetResponse
+from app.schemas.responses import (
+    RedisTestResponse,
+    CacheSetResponse,
+    CacheGetResponse,
+    UserCacheStatsResponse,
+    NearCacheStatsResponse,
+)
 
 router = APIRouter()
 
@@ -51,6 +59,41 @@ async def test_redis(redis: Redis = Depends(get_redis)) -> RedisTestResponse:
     return RedisTestResponse(redis="ok" if is_ok else "error")
 
 
+@router.get(
+    "/users/stats",
+    response_model=UserCacheStatsResponse,
+    summary="User cache stats",
+    description="Счетчики попаданий/промахов кеша пользователей в текущем процессе API.",
+)
+async def get_user_cache_stats() -> UserCacheStatsResponse:
+    """
+    Получить счетчики кеша пользователей.
+    
+    Returns:
+        UserCacheStatsResponse: hits, misses, invalidations и hit_ratio
+    """
+    return UserCacheStatsResponse(**user_cache_stats.as_dict())
+
+
+@router.get(
+    "/near/stats",
+    response_model=NearCacheStatsResponse,
+    summary="Near-cache stats",
+    description="Состояние in-process near-cache и подписки на инвалидации в текущем процессе API.",
+)
+async def get_near_cache_stats() -> NearCacheStatsResponse:
+    """
+    Получить состояние near-cache.
+    
+    Returns:
+        NearCacheStatsResponse: Размер, попадания/промахи и статус подписки
+    """
+    return NearCacheStatsResponse(
+        listening=invalidation_bus.is_listening,
+        **near_cache.stats(),
+    )
+
+
 @router.post(
     "",
     response_model=CacheSetResponse,
@@ -4,8 +4,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from app.core.database import get_db
-from app.schemas.responses import HealthResponse, HealthDbResponse
+from app.core.database import get_db, get_pool_stats, replica_router
+from app.schemas.responses import (
+    HealthResponse,
+    HealthDbResponse,
+    DbPoolStatsResponse,
+    DbReplicaStatusResponse,
+)
 
 router = APIRouter()
 
@@ -100,3 +105,36 @@ async def health_check_db(db: AsyncSession = Depends(get_db)) -> HealthDbRespons
             version=None,
             error=str(e),
         )
+
+
+@router.get(
+    "/db/pool",
+    response_model=DbPoolStatsResponse,
+    summary="Database pool stats",
+    description="Текущее состояние пула соединений PostgreSQL в этом процессе: занятые/свободные соединения, overflow и время ожидания.",
+)
+async def health_db_pool() -> DbPoolStatsResponse:
+    """
+    Метрики пула соединений с БД.
+    
+    Returns:
+        DbPoolStatsResponse: Состояние пула и статистика выдачи соединений
+    """
+    return DbPoolStatsResponse(**get_pool_stats())
+
+
+@router.get(
+    "/db/replicas",
+    response_model=list[DbReplicaStatusResponse],
+    summary="Database replicas status",
+    description="Состояние read-реплик: отставание и участие в чтении. Пустой список, если реплики не настроены.",
+)
+async def health_db_replicas() -> list[DbReplicaStatusResponse]:
+    """
+    Проверка read-реплик.
+    
+    Returns:
+        list[DbReplicaStatusResponse]: Отставание и статус каждой реплики
+    """
+    await replica_router.check()
+    return [DbReplicaStatusResponse(**item) for item in replica_router.stats()]
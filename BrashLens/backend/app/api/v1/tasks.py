@@ -1,9 +1,15 @@
 """Celery tasks endpoints."""
-from fastapi import APIRouter, HTTPException, status
+from typing import AsyncIterator, Optional
 
-from app.core.celery_app import celery_app
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.core.celery_queues import get_queue_stats
+from app.core.config import settings
 from app.schemas.requests import CeleryTaskRequest
-from app.schemas.responses import CeleryTaskResponse, TaskStatusResponse
+from app.schemas.responses import CeleryTaskResponse, TaskQueuesResponse, TaskStatusResponse
+from app.services.task_idempotency import submit_idempotent
+from app.services.task_status import task_status
 
 router = APIRouter()
 
@@ -13,32 +19,50 @@ router = APIRouter()
     response_model=CeleryTaskResponse,
     status_code=status.HTTP_202_ACCEPTED,
     summary="Start test task",
-    description="Запустить тестовую Celery задачу. Задача выполняется асинхронно и занимает ~5 секунд.",
+    description=(
+        "Запустить тестовую Celery задачу. Задача выполняется асинхронно и занимает ~5 секунд. "
+        "С заголовком Idempotency-Key повторный запрос с тем же ключом (в течение TASK_IDEMPOTENCY_TTL) "
+        "не ставит задачу еще раз, а возвращает ID уже поставленной (duplicate=true)."
+    ),
     responses={
         202: {
             "description": "Задача принята в обработку",
             "content": {
                 "application/json": {
                     "example": {
-                        "task_id": "123e4567-e89b-12d3-a456-426614174000"
+                        "task_id": "123e4567-e89b-12d3-a456-426614174000",
+                        "duplicate": False
                     }
                 }
             }
         }
     }
 )
-async def test_celery(request: CeleryTaskRequest) -> CeleryTaskResponse:
+async def test_celery(
+    request: CeleryTaskRequest,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=128,
+        description="Ключ логического запроса: двойной клик или повтор не поставит задачу дважды",
+    ),
+) -> CeleryTaskResponse:
     """
     Запустить тестовую Celery задачу.
     
     Args:
         request: Данные для задачи
+        idempotency_key: Ключ идемпотентности (необязательный)
         
     Returns:
-        CeleryTaskResponse: ID запущенной задачи
+        CeleryTaskResponse: ID запущенной (или ранее поставленной) задачи
     """
     from app.services.tasks import test_task
     
+    if idempotency_key:
+        task_id, created = await submit_idempotent(test_task, idempotency_key, args=(request.message,))
+        return CeleryTaskResponse(task_id=task_id, duplicate=not created)
+    
     task = test_task.delay(request.message)
     return CeleryTaskResponse(task_id=task.id)
 
@@ -47,7 +71,10 @@ async def test_celery(request: CeleryTaskRequest) -> CeleryTaskResponse:
     "/status/{task_id}",
     response_model=TaskStatusResponse,
     summary="Get task status",
-    description="Получить статус выполнения Celery задачи по её ID. Возможные статусы: PENDING, SUCCESS, FAILURE.",
+    description=(
+        "Получить статус выполнения Celery задачи по её ID. Возможные статусы: PENDING, STARTED, SUCCESS, FAILURE. "
+        "Вместо опроса можно подписаться на GET /tasks/events/{task_id}."
+    ),
     responses={
         200: {
             "description": "Статус задачи",
@@ -97,26 +124,73 @@ async def get_task_status(task_id: str) -> TaskStatusResponse:
     Returns:
         TaskStatusResponse: Статус и результат задачи
     """
-    task_result = celery_app.AsyncResult(task_id)
+    # Ключ результата читается через async Redis - event loop не блокируется
+    return TaskStatusResponse(**await task_status.get(task_id))
+
+
+@router.get(
+    "/events/{task_id}",
+    summary="Task status events (SSE)",
+    description=(
+        "Server-Sent Events со сменами статуса задачи: текущий статус сразу, затем каждое "
+        "изменение (PENDING → STARTED → SUCCESS/FAILURE). Поток закрывается после "
+        "SUCCESS/FAILURE/REVOKED/IGNORED или через TASK_EVENTS_TIMEOUT секунд."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Поток событий status (data - TaskStatusResponse в JSON)",
+            "content": {
+                "text/event-stream": {
+                    "example": (
+                        'event: status\ndata: {"status": "STARTED", "task_id": "123e4567-e89b-12d3-a456-426614174000", '
+                        '"result": null, "error": null}\n\n'
+                    )
+                }
+            }
+        }
+    }
+)
+async def task_events(task_id: str) -> StreamingResponse:
+    """
+    Подписаться на смены статуса Celery задачи.
     
-    if task_result.state == "PENDING":
-        return TaskStatusResponse(
-            status=task_result.state,
-            task_id=task_id,
-            result=None,
-            error=None,
-        )
-    elif task_result.state == "FAILURE":
-        return TaskStatusResponse(
-            status=task_result.state,
-            task_id=task_id,
-            result=None,
-            error=str(task_result.info),
-        )
-    else:
-        return TaskStatusResponse(
-            status=task_result.state,
-            task_id=task_id,
-            result=task_result.result,
-            error=None,
-        )
+    Args:
+        task_id: ID задачи
+        
+    Returns:
+        StreamingResponse: text/event-stream
+    """
+    async def stream() -> AsyncIterator[str]:
+        async for event in task_status.watch(task_id, timeout=settings.TASK_EVENTS_TIMEOUT):
+            if event is None:
+                # Комментарий SSE: держит соединение через прокси
+                yield ": keepalive\n\n"
+                continue
+            payload = TaskStatusResponse(**event).model_dump_json()
+            yield f"event: status\ndata: {payload}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/queues",
+    response_model=TaskQueuesResponse,
+    summary="Task queues backlog",
+    description=(
+        "Сколько задач ждут в каждой очереди Celery (interactive, notifications, media, bulk) "
+        "и по ступеням приоритета. Растущий backlog очереди - повод добавить worker ее сервису."
+    ),
+)
+async def task_queues() -> TaskQueuesResponse:
+    """
+    Backlog очередей Celery.
+    
+    Returns:
+        TaskQueuesResponse: Длины очередей в брокере
+    """
+    return TaskQueuesResponse(**await get_queue_stats())
@@ -1,10 +1,23 @@
 """API endpoints для работы с пользователями."""
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+import csv
+import io
+import json
 
-from app.services.user_service import UserService
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncIterator, Literal, Optional
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.user_service import BulkLineTooLongError, UserService
 from app.api.dependencies import get_user_service
-from app.schemas.user import UserResponse, UserCreate, UserUpdate
+from app.schemas.user import (
+    UserResponse,
+    UserCreate,
+    UserUpdate,
+    UserBulkUpsertResponse,
+    UserListResponse,
+)
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -48,6 +61,156 @@ async def create_user(
         )
 
 
+async def _iter_ndjson_lines(request: Request, max_line_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Читать тело запроса построчно, не загружая его целиком в память.
+
+    Raises:
+        BulkLineTooLongError: Строка длиннее max_line_bytes (буфер не растет без предела)
+    """
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise BulkLineTooLongError(f"NDJSON line exceeds {max_line_bytes} bytes")
+            if line.strip():
+                yield line
+        if len(buffer) > max_line_bytes:
+            raise BulkLineTooLongError(f"NDJSON line exceeds {max_line_bytes} bytes")
+    if buffer.strip():
+        yield buffer
+
+
+@router.post(
+    "/bulk",
+    response_model=UserBulkUpsertResponse,
+    summary="Bulk import users",
+    description=(
+        "Массовый импорт пользователей. Тело - NDJSON (application/x-ndjson): "
+        "по одному объекту UserCreate на строку. Записи валидируются по мере чтения "
+        "и пишутся в БД пакетами через COPY."
+    ),
+    responses={
+        413: {"model": UserBulkUpsertResponse, "description": "Строка длиннее USER_BULK_MAX_LINE_BYTES; импорт остановлен"},
+        500: {"model": UserBulkUpsertResponse, "description": "Пакет не записан; импорт остановлен"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"type": "string"},
+                    "example": (
+                        '{"telegram_id": 123456789, "first_name": "Иван", "role": "client"}\n'
+                        '{"telegram_id": 987654321, "first_name": "Мария", "role": "client", "language": "en"}\n'
+                    ),
+                }
+            },
+        }
+    },
+)
+async def bulk_upsert_users(
+    request: Request,
+    on_conflict: Literal["skip", "update"] = Query(
+        "skip", description="skip - пропускать существующих, update - обновлять их"
+    ),
+    service: UserService = Depends(get_user_service)
+):
+    """
+    Массовый импорт пользователей из NDJSON потока
+    
+    Возвращает количество созданных/обновленных/пропущенных записей,
+    построчные ошибки и достигнутую скорость (rows/second).
+    Если импорт остановился (слишком длинная строка - 413, ошибка записи
+    пакета - 500), тело содержит счетчики закоммиченных пакетов и failure.offset
+    """
+    result = await service.bulk_upsert(
+        _iter_ndjson_lines(request, settings.USER_BULK_MAX_LINE_BYTES),
+        update_existing=on_conflict == "update",
+    )
+    if result.failure is None:
+        return result
+    status_code = (
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        if result.failure.reason == "line_too_long"
+        else status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+    return JSONResponse(status_code=status_code, content=result.model_dump(mode="json"))
+
+
+# Колонки экспорта (совпадают с User.to_dict)
+EXPORT_FIELDS = [
+    "id", "telegram_id", "username", "first_name", "last_name",
+    "role", "language", "is_active", "created_at", "updated_at",
+]
+# Сколько строк склеивать в один chunk ответа
+EXPORT_CHUNK_ROWS = 500
+
+
+async def _export_users(export_format: str) -> AsyncIterator[str]:
+    """
+    Сериализовать пользователей в NDJSON/CSV чанками по мере чтения из БД.
+
+    Сессия открывается внутри генератора: сессия из Depends(get_db)
+    закрывается до начала отправки StreamingResponse.
+    """
+    async with AsyncSessionLocal() as session:
+        service = UserService(session)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS) if export_format == "csv" else None
+        if writer:
+            writer.writeheader()
+
+        rows = 0
+        async for user in service.stream_users():
+            data = user.to_dict()
+            if writer:
+                writer.writerow(data)
+            else:
+                buffer.write(json.dumps(data, ensure_ascii=False))
+                buffer.write("\n")
+
+            rows += 1
+            if rows % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+
+@router.get(
+    "/export",
+    summary="Export users",
+    description=(
+        "Потоковый экспорт всех пользователей в NDJSON или CSV. "
+        "Строки читаются server-side курсором, память не зависит от размера таблицы."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {},
+                "text/csv": {},
+            }
+        }
+    },
+)
+async def export_users(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format")
+):
+    """Экспорт таблицы users для аналитики"""
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_users(export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+    )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
@@ -79,17 +242,28 @@ async def update_user(
     return user
 
 
-@router.get("", response_model=List[UserResponse])
+@router.get("", response_model=UserListResponse)
 async def get_users(
     role: str = Query(None, description="Filter by role"),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
     limit: int = Query(100, ge=1, le=1000),
     service: UserService = Depends(get_user_service)
 ):
-    """Получить список пользователей с фильтрацией"""
-    if role:
-        users = await service.get_users_by_role(role, skip, limit)
-    else:
-        # TODO: добавить метод get_all в следующей итерации
-        users = []
-    return users
+    """
+    Получить список пользователей с фильтрацией
+    
+    Keyset пагинация по (role, is_active, id): для следующей страницы
+    передайте next_cursor из ответа. С role - только активные пользователи роли,
+    без role - все пользователи
+    """
+    try:
+        if role:
+            users, next_cursor = await service.get_users_by_role(role, limit, cursor)
+        else:
+            users, next_cursor = await service.get_users(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return UserListResponse(items=users, next_cursor=next_cursor)
@@ -4,8 +4,17 @@ from fastapi.responses import Response
 from telegram import Update
 from telegram.error import TelegramError
 
-from app.bot.bot import get_application
+from app.bot.bot import get_application, update_queue
+from app.bot.flood_guard import flood_guard
+from app.bot.update_dedup import update_deduplicator
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.schemas.responses import (
+    BotRateLimiterStatsResponse,
+    FloodGuardStatsResponse,
+    UpdateProcessorStatsResponse,
+    WebhookQueueStatsResponse,
+)
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -15,11 +24,15 @@ logger = get_logger(__name__)
     "/webhook",
     status_code=status.HTTP_200_OK,
     summary="Telegram webhook",
-    description="Endpoint для получения обновлений от Telegram Bot API через webhook.",
+    description=(
+        "Endpoint для получения обновлений от Telegram Bot API через webhook. "
+        "При WEBHOOK_FAST_ACK=True update ставится в очередь и ответ возвращается сразу; "
+        "повторные доставки (тот же update_id) отбрасываются до очереди."
+    ),
     response_class=Response,
     responses={
         200: {
-            "description": "Обновление успешно обработано",
+            "description": "Обновление принято (поставлено в очередь или обработано)",
         },
         400: {
             "description": "Неверный формат данных",
@@ -27,6 +40,9 @@ logger = get_logger(__name__)
         500: {
             "description": "Ошибка обработки обновления",
         },
+        503: {
+            "description": "Очередь переполнена - Telegram повторит доставку позже",
+        },
     },
 )
 async def telegram_webhook(request: Request) -> Response:
@@ -37,20 +53,35 @@ async def telegram_webhook(request: Request) -> Response:
         request: FastAPI Request объект с телом запроса
         
     Returns:
-        Response: HTTP 200 OK если успешно обработано
+        Response: HTTP 200 OK если update принят, 503 если очередь переполнена
     """
     try:
         # Парсим Update из JSON
         update_data = await request.json()
-        update = Update.de_json(update_data, None)
+        application = await get_application()
+        update = Update.de_json(update_data, application.bot)
         
         if update is None:
             logger.warning("Received invalid update from Telegram")
             return Response(status_code=status.HTTP_200_OK)  # Всегда 200 для Telegram
         
-        # Получаем Application и обрабатываем обновление
-        application = await get_application()
-        await application.process_update(update)
+        if settings.WEBHOOK_FAST_ACK:
+            # Повторная доставка отбрасывается до очереди и не занимает ее место
+            if settings.UPDATE_DEDUP_ENABLED:
+                if not await update_deduplicator.claim(application.bot.id, update.update_id):
+                    logger.info(f"Skipping redelivered update {update.update_id}")
+                    return Response(status_code=status.HTTP_200_OK)
+                update_deduplicator.hand_off(application.bot.id, update.update_id)
+            # Отвечаем сразу: медленный обработчик не держит соединение доставки Telegram
+            if not await update_queue.submit(update):
+                if settings.UPDATE_DEDUP_ENABLED:
+                    # Update не принят - повторная доставка Telegram должна быть обработана
+                    await update_deduplicator.release(application.bot.id, update.update_id)
+                return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+            logger.debug(f"Queued update {update.update_id}")
+            return Response(status_code=status.HTTP_200_OK)
+        
+        await application.update_processor.process_update(update, application.process_update(update))
         
         logger.debug(f"Processed update {update.update_id}")
         return Response(status_code=status.HTTP_200_OK)
@@ -62,3 +93,69 @@ async def telegram_webhook(request: Request) -> Response:
     except Exception as e:
         logger.error(f"Error processing webhook: {e}", exc_info=True)
         return Response(status_code=status.HTTP_200_OK)  # Всегда возвращаем 200 для Telegram
+
+
+@router.get(
+    "/webhook/queue",
+    response_model=WebhookQueueStatsResponse,
+    summary="Webhook queue stats",
+    description="Глубина очереди webhook-обновлений, занятость обработчиков, отказы и время ожидания.",
+)
+async def webhook_queue_stats() -> WebhookQueueStatsResponse:
+    """
+    Метрики очереди webhook.
+    
+    Returns:
+        WebhookQueueStatsResponse: Состояние очереди в этом процессе
+    """
+    return WebhookQueueStatsResponse(**update_queue.stats())
+
+
+@router.get(
+    "/webhook/processor",
+    response_model=UpdateProcessorStatsResponse,
+    summary="Update processor stats",
+    description="Параллельная обработка update: занятые слоты, ожидающие update и время ожидания своего чата.",
+)
+async def update_processor_stats() -> UpdateProcessorStatsResponse:
+    """
+    Метрики update processor бота.
+    
+    Returns:
+        UpdateProcessorStatsResponse: Состояние обработки update в этом процессе
+    """
+    application = await get_application()
+    return UpdateProcessorStatsResponse(**application.update_processor.stats())
+
+
+@router.get(
+    "/webhook/rate-limiter",
+    response_model=BotRateLimiterStatsResponse,
+    summary="Outbound rate limiter stats",
+    description="Исходящие запросы к Bot API: ожидание токенов по полосам приоритета, повторы RetryAfter и задержка.",
+)
+async def rate_limiter_stats() -> BotRateLimiterStatsResponse:
+    """
+    Метрики rate limiter бота.
+    
+    Returns:
+        BotRateLimiterStatsResponse: Состояние исходящей очереди в этом процессе
+    """
+    application = await get_application()
+    return BotRateLimiterStatsResponse(**application.bot.rate_limiter.stats())
+
+
+@router.get(
+    "/webhook/flood-guard",
+    response_model=FloodGuardStatsResponse,
+    summary="Flood guard stats",
+    description="Входящие update, отброшенные до обработчиков: склейка повторов, лимиты пользователя и чата, блокировки.",
+)
+async def flood_guard_stats() -> FloodGuardStatsResponse:
+    """
+    Счетчики защиты от флуда.
+    
+    Returns:
+        FloodGuardStatsResponse: Счетчики этого процесса
+    """
+    return FloodGuardStatsResponse(**flood_guard.stats())
@@ -0,0 +1,83 @@
+"""Application бота: шаги обработки update вокруг unit of work."""
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from app.bot.flood_guard import FloodGuardHook, flood_guard
+from app.bot.persistence import ConversationSyncHook, RedisPersistence
+from app.bot.unit_of_work import UnitOfWorkApplication
+from app.bot.update_dedup import UpdateDedupHook, update_deduplicator
+from app.bot.update_hooks import UpdateHook
+from app.core.bot_mode import bot_mode
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _UpdateOutcome:
+    __slots__ = ("failed",)
+
+    def __init__(self) -> None:
+        self.failed = False
+
+
+# Итог обработки текущего update: process_error отмечает ошибку обработчика
+_current_outcome: ContextVar[Optional[_UpdateOutcome]] = ContextVar("bot_update_outcome", default=None)
+
+
+def default_update_hooks(application: "BotApplication") -> list[UpdateHook]:
+    """Шаги обработки update по настройкам (в порядке вызова before)."""
+    hooks: list[UpdateHook] = []
+    if settings.BOT_FLOOD_GUARD_ENABLED:
+        hooks.append(FloodGuardHook(flood_guard))
+    if settings.UPDATE_DEDUP_ENABLED:
+        hooks.append(UpdateDedupHook(update_deduplicator))
+    if isinstance(application.persistence, RedisPersistence):
+        hooks.append(ConversationSyncHook(application.persistence))
+    return hooks
+
+
+class BotApplication(UnitOfWorkApplication):
+    """
+    Application бота: цепочка UpdateHook вокруг unit of work.
+
+    Каждый шаг (флуд, дедупликация, перечитывание состояния разговора) живет
+    в своем модуле и подключается в default_update_hooks - его можно
+    проверить и отключить отдельно от остальных.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.update_hooks: list[UpdateHook] = default_update_hooks(self)
+
+    async def initialize(self) -> None:
+        await super().initialize()
+        # getMe уже выполнен при инициализации бота - режим определяется без лишнего запроса
+        bot_mode.set_username(self.bot.username)
+
+    async def process_update(self, update: object) -> None:
+        outcome = _UpdateOutcome()
+        token = _current_outcome.set(outcome)
+        entered: list[UpdateHook] = []
+        try:
+            for hook in self.update_hooks:
+                if not await hook.before(self, update):
+                    return
+                entered.append(hook)
+            await super().process_update(update)
+        except BaseException:
+            outcome.failed = True
+            raise
+        finally:
+            _current_outcome.reset(token)
+            for hook in reversed(entered):
+                try:
+                    await hook.after(self, update, outcome.failed)
+                except Exception as e:
+                    logger.error(f"Update hook {type(hook).__name__} failed after processing: {e}", exc_info=True)
+
+    async def process_error(self, update, error, job=None, coroutine=None) -> bool:
+        outcome = _current_outcome.get()
+        if outcome is not None:
+            outcome.failed = True
+        return await super().process_error(update, error, job=job, coroutine=coroutine)
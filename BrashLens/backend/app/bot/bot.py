@@ -1,29 +1,96 @@
 """Telegram bot setup and configuration."""
 import asyncio
 import logging
+from typing import Awaitable, Callable, Optional
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
-from app.bot.handlers import (
-    start_command,
-    handle_callback,
-    delete_me_command,
-    handle_sticker,
-    check_access_middleware,
-)
 from app.core.config import settings
+from app.bot.application import BotApplication
+from app.bot.unit_of_work import context_types
+from app.bot.update_processor import PerChatUpdateProcessor
+from app.bot.rate_limiter import TelegramRateLimiter
+from app.bot.persistence import RedisPersistence
+from app.bot.update_queue import UpdateQueue
+from app.bot.flood_guard import flood_guard
 
 logger = logging.getLogger(__name__)
 
 # Singleton для Application (используется в webhook режиме)
 _bot_application: Application | None = None
+# Защищает первую инициализацию от конкурентных webhook запросов
+_bot_application_lock = asyncio.Lock()
+
+# Очередь webhook-обновлений (режим WEBHOOK_FAST_ACK)
+update_queue = UpdateQueue(
+    maxsize=settings.WEBHOOK_QUEUE_SIZE,
+    workers=settings.WEBHOOK_WORKERS,
+    enqueue_timeout=settings.WEBHOOK_ENQUEUE_TIMEOUT,
+)
+
+
+def create_application(
+    register: Optional[Callable[[Application], None]] = None,
+    post_init: Optional[Callable[[Application], Awaitable[None]]] = None,
+) -> Application:
+    """
+    Create and configure the Telegram bot application.
+
+    Единая сборка Application для webhook (get_application, setup_webhook)
+    и polling (app.bot.main): точки входа отличаются только обработчиками
+    и post_init.
+
+    Args:
+        register: Регистрация обработчиков (по умолчанию register_handlers этого модуля)
+        post_init: Корутина, вызываемая после initialize() в run_polling
+    """
+    # Каждый update обрабатывается в своем unit of work (одна сессия БД на update),
+    # разные чаты - параллельно, update одного чата - по очереди;
+    # исходящие запросы к Bot API идут через rate limiter с лимитами Telegram
+    builder = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .application_class(BotApplication)
+        .context_types(context_types)
+        .concurrent_updates(PerChatUpdateProcessor(settings.BOT_CONCURRENT_UPDATES))
+        .rate_limiter(
+            TelegramRateLimiter(
+                overall_per_second=settings.BOT_RATE_LIMIT_PER_SECOND,
+                chat_per_second=settings.BOT_RATE_LIMIT_CHAT_PER_SECOND,
+                group_per_minute=settings.BOT_RATE_LIMIT_GROUP_PER_MINUTE,
+                max_retries=settings.BOT_RATE_LIMIT_MAX_RETRIES,
+            )
+        )
+    )
+    if settings.TELEGRAM_API_BASE_URL:
+        # Локальная заглушка Bot API (нагрузочные тесты)
+        api_url = settings.TELEGRAM_API_BASE_URL.rstrip("/")
+        builder = builder.base_url(f"{api_url}/bot").base_file_url(f"{api_url}/file/bot")
+    if settings.BOT_PERSISTENCE_ENABLED:
+        # user_data и состояния разговоров общие для всех реплик бота
+        builder = builder.persistence(RedisPersistence(update_interval=settings.BOT_PERSISTENCE_UPDATE_INTERVAL))
+    if post_init is not None:
+        builder = builder.post_init(post_init)
+    application = builder.build()
+    (register or register_handlers)(application)
+    return application
 
 
-def create_application() -> Application:
-    """Create and configure the Telegram bot application."""
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+def register_handlers(application: Application) -> None:
+    """
+    Зарегистрировать обработчики бота.
+    
+    Модули обработчиков импортируются здесь, а не при импорте app.bot.bot:
+    API с webhook загружает их только при первой инициализации бота.
+    """
+    from app.bot.handlers import (
+        start_command,
+        handle_callback,
+        delete_me_command,
+        handle_sticker,
+        check_access_middleware,
+    )
     
-    # Регистрация handlers
     # ВАЖНО: check_access_middleware должен быть ПЕРВЫМ (group=0) для проверки доступа
-    # перед обработкой любых сообщений, включая команды
+    # перед обработкой любых сообщений, включая команды (флуд отброшен раньше - FloodGuardHook)
     application.add_handler(MessageHandler(filters.ALL, check_access_middleware), group=0)
     application.add_handler(CallbackQueryHandler(check_access_middleware), group=0)
     
@@ -33,8 +100,6 @@ def create_application() -> Application:
     application.add_handler(CallbackQueryHandler(handle_callback), group=1)
     # Обработчик стикеров (для получения file_id) - только для разрешенных пользователей
     application.add_handler(MessageHandler(filters.Sticker.ALL, handle_sticker), group=1)
-    
-    return application
 
 
 async def get_application() -> Application:
@@ -46,39 +111,53 @@ async def get_application() -> Application:
         Application: Telegram bot application instance
     """
     global _bot_application
-    if _bot_application is None:
-        _bot_application = create_application()
-        await _bot_application.initialize()
-        await _bot_application.start()
-        logger.info("Bot application initialized for webhook mode")
+    if _bot_application is not None:
+        return _bot_application
+    
+    async with _bot_application_lock:
+        # Пока ждали lock, приложение мог инициализировать другой запрос
+        if _bot_application is None:
+            application = create_application()
+            await application.initialize()
+            await application.start()
+            if settings.WEBHOOK_FAST_ACK:
+                update_queue.start(application)
+            # Публикуем только полностью запущенное приложение
+            _bot_application = application
+            logger.info("Bot application initialized for webhook mode")
     
     return _bot_application
 
 
+async def shutdown_application() -> None:
+    """Остановить webhook Application: дообработать очередь и закрыть приложение."""
+    global _bot_application
+    async with _bot_application_lock:
+        if _bot_application is None:
+            return
+        await update_queue.stop()
+        await flood_guard.stop()
+        await _bot_application.stop()
+        await _bot_application.shutdown()
+        _bot_application = None
+        logger.info("Bot application stopped")
+
+
 async def setup_webhook(webhook_url: str) -> None:
     """
     Setup webhook для бота и запустить webhook сервер.
     Бот работает как отдельное приложение и обрабатывает обновления через свой webhook сервер.
     """
-    from telegram.error import RetryAfter, TelegramError
+    from telegram.error import TelegramError
     
     application = create_application()
     await application.initialize()
     await application.start()
     
     try:
+        # Flood control (RetryAfter) обрабатывает rate limiter бота
         await application.bot.set_webhook(webhook_url)
         logger.info(f"Webhook URL set to: {webhook_url}")
-    except RetryAfter as e:
-        # Обработка flood control - ждем указанное время и повторяем
-        logger.warning(f"Flood control: retry after {e.retry_after} seconds")
-        await asyncio.sleep(e.retry_after)
-        try:
-            await application.bot.set_webhook(webhook_url)
-            logger.info(f"Webhook URL set to: {webhook_url} (after retry)")
-        except TelegramError as retry_error:
-            logger.error(f"Failed to set webhook after retry: {retry_error}")
-            raise
     except TelegramError as e:
         logger.error(f"Failed to set webhook: {e}")
         raise
@@ -0,0 +1,245 @@
+"""Ранний фильтр флуда: отбрасывает всплески update до обработчиков и БД."""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from telegram import Update
+
+from app.bot.rate_limiter import TokenBucket
+from app.bot.update_hooks import UpdateHook
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class FloodGuard:
+    """
+    Token bucket на пользователя и на чат, проверяемый первым шагом обработки update.
+
+    Решение принимается в памяти процесса, без I/O. Update отбрасывается, если:
+    - повторяет предыдущий update пользователя (тот же текст или callback data)
+      в пределах coalesce_seconds - повторный /start склеивается с первым;
+    - у пользователя или чата закончились токены;
+    - пользователь наказан: продолжал флудить после исчерпания токенов.
+    С redis_sync наказания публикуются в Redis (sorted set, score - срок)
+    и раз в sync_interval подтягиваются другими репликами бота.
+    """
+
+    BLOCKED_KEY = "tg:flood:v1:blocked"
+    MAX_TRACKED = 100_000
+
+    def __init__(
+        self,
+        user_rate: float = 1.0,
+        user_burst: float = 5,
+        chat_rate: float = 5.0,
+        chat_burst: float = 20,
+        coalesce_seconds: float = 2.0,
+        penalty_seconds: float = 30.0,
+        redis_sync: bool = False,
+        sync_interval: float = 1.0,
+        redis: Optional[Redis] = None,
+    ):
+        """
+        Инициализация FloodGuard.
+
+        Args:
+            user_rate: Update в секунду на пользователя
+            user_burst: Всплеск update пользователя без ограничения
+            chat_rate: Update в секунду на чат (группы)
+            chat_burst: Всплеск update чата без ограничения
+            coalesce_seconds: Окно склейки одинаковых update пользователя
+            penalty_seconds: Блокировка пользователя, продолжающего флуд после исчерпания токенов
+            redis_sync: Делиться блокировками между репликами через Redis
+            sync_interval: Период синхронизации блокировок, секунд
+            redis: Redis client (по умолчанию общий client процесса)
+        """
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.coalesce_seconds = coalesce_seconds
+        self.penalty_seconds = penalty_seconds
+        self.redis_sync = redis_sync
+        self.sync_interval = sync_interval
+        self._redis = redis
+        self._users: dict[int, TokenBucket] = {}
+        self._chats: dict[int, TokenBucket] = {}
+        self._last: dict[int, tuple[str, float]] = {}
+        self._strikes: dict[int, int] = {}
+        self._blocked: dict[int, float] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        self.passed = 0
+        self.coalesced = 0
+        self.dropped_user = 0
+        self.dropped_chat = 0
+        self.dropped_blocked = 0
+        self.penalties = 0
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    @staticmethod
+    def _signature(update: Update) -> Optional[str]:
+        if update.callback_query is not None:
+            return f"cb:{update.callback_query.data}"
+        if update.effective_message is not None and update.effective_message.text:
+            return f"msg:{update.effective_message.text}"
+        return None
+
+    def _bucket(self, buckets: dict[int, TokenBucket], key: int, rate: float, burst: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= self.MAX_TRACKED:
+                self._prune()
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        self._users = {key: bucket for key, bucket in self._users.items() if not bucket.idle}
+        self._chats = {key: bucket for key, bucket in self._chats.items() if not bucket.idle}
+        self._last = {
+            key: last for key, last in self._last.items() if now - last[1] < self.coalesce_seconds
+        }
+        self._strikes = {key: strikes for key, strikes in self._strikes.items() if key in self._users}
+        self._blocked = {key: until for key, until in self._blocked.items() if until > time.time()}
+
+    def allow(self, update: object) -> bool:
+        """
+        Пропустить update дальше или отбросить (без I/O).
+
+        Returns:
+            bool: False - update нужно отбросить
+        """
+        if not isinstance(update, Update):
+            return True
+        if self.redis_sync:
+            self._ensure_sync()
+
+        user = update.effective_user
+        chat = update.effective_chat
+        now = time.monotonic()
+
+        if user is not None:
+            until = self._blocked.get(user.id)
+            if until is not None:
+                if until > time.time():
+                    self.dropped_blocked += 1
+                    return False
+                del self._blocked[user.id]
+
+            signature = self._signature(update)
+            if signature is not None:
+                last = self._last.get(user.id)
+                self._last[user.id] = (signature, now)
+                if last is not None and last[0] == signature and now - last[1] < self.coalesce_seconds:
+                    self.coalesced += 1
+                    return False
+
+            if not self._bucket(self._users, user.id, self.user_rate, self.user_burst).try_acquire():
+                self.dropped_user += 1
+                self._strike(user.id)
+                return False
+            self._strikes.pop(user.id, None)
+
+        # Личный чат совпадает с пользователем - отдельный лимит только для групп
+        if chat is not None and (user is None or chat.id != user.id):
+            if not self._bucket(self._chats, chat.id, self.chat_rate, self.chat_burst).try_acquire():
+                self.dropped_chat += 1
+                return False
+
+        self.passed += 1
+        return True
+
+    def _strike(self, user_id: int) -> None:
+        strikes = self._strikes.get(user_id, 0) + 1
+        self._strikes[user_id] = strikes
+        if strikes < self.user_burst:
+            return
+        # Флуд продолжается после исчерпания токенов - блокируем пользователя
+        until = time.time() + self.penalty_seconds
+        self._blocked[user_id] = until
+        self._strikes.pop(user_id, None)
+        self.penalties += 1
+        logger.warning(f"Flood guard: user {user_id} blocked for {self.penalty_seconds}s")
+        if self.redis_sync:
+            asyncio.get_running_loop().create_task(self._publish_block(user_id, until))
+
+    async def _publish_block(self, user_id: int, until: float) -> None:
+        try:
+            await self.redis.zadd(self.BLOCKED_KEY, {str(user_id): until}, gt=True)
+        except RedisError as e:
+            logger.warning(f"Flood guard: failed to publish block of user {user_id}: {e}")
+
+    def _ensure_sync(self) -> None:
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync(), name="flood-guard-sync")
+
+    async def _sync(self) -> None:
+        while True:
+            try:
+                now = time.time()
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.zremrangebyscore(self.BLOCKED_KEY, "-inf", now)
+                pipe.zrangebyscore(self.BLOCKED_KEY, now, "+inf", withscores=True)
+                _, blocked = await pipe.execute()
+                for user_id, until in blocked:
+                    user_id = int(user_id)
+                    self._blocked[user_id] = max(self._blocked.get(user_id, 0.0), until)
+            except RedisError as e:
+                logger.warning(f"Flood guard: Redis sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def stop(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+
+    def stats(self) -> dict:
+        return {
+            "passed": self.passed,
+            "coalesced": self.coalesced,
+            "dropped_user": self.dropped_user,
+            "dropped_chat": self.dropped_chat,
+            "dropped_blocked": self.dropped_blocked,
+            "penalties": self.penalties,
+            "blocked_users": sum(1 for until in self._blocked.values() if until > time.time()),
+            "tracked_users": len(self._users),
+        }
+
+
+class FloodGuardHook(UpdateHook):
+    """
+    Первый шаг обработки: флуд отбрасывается до дедупликации, persistence и БД.
+
+    Отброшенный update не стоит ни одного запроса к Redis или PostgreSQL.
+    """
+
+    def __init__(self, guard: FloodGuard):
+        self.guard = guard
+
+    async def before(self, application, update: object) -> bool:
+        return self.guard.allow(update)
+
+
+flood_guard = FloodGuard(
+    user_rate=settings.BOT_FLOOD_USER_RATE,
+    user_burst=settings.BOT_FLOOD_USER_BURST,
+    chat_rate=settings.BOT_FLOOD_CHAT_RATE,
+    chat_burst=settings.BOT_FLOOD_CHAT_BURST,
+    coalesce_seconds=settings.BOT_FLOOD_COALESCE_SECONDS,
+    penalty_seconds=settings.BOT_FLOOD_PENALTY_SECONDS,
+    redis_sync=settings.BOT_FLOOD_REDIS_SYNC,
+)
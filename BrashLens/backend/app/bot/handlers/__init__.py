@@ -1,3 +1,13 @@
 """Обработчики команд Telegram бота."""
-# Пустой файл - функции удаления импортируются напрямую из app.bot.handlers (старый файл)
-# в main.py через импорт с type: ignore для избежания конфликта имен
+from app.bot.handlers.common import (
+    check_access_middleware,
+    check_user_access,
+    delete_cancel_callback,
+    delete_confirm_callback,
+    delete_me_command,
+    delete_me_command_from_callback,
+    handle_callback,
+    handle_sticker,
+    send_unauthorized_access_message,
+    start_command,
+)
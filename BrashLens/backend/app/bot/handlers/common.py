@@ -1,17 +1,15 @@
-"""Telegram bot handlers."""
-# Test auto-deploy
+"""Общие обработчики бота: контроль доступа, /start, удаление аккаунта."""
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes
 import logging
 
+from app.core.bot_mode import bot_mode
 from app.core.config import settings
-from app.core.database import AsyncSessionLocal
-from app.services.user_service import UserService
+from app.bot.unit_of_work import BotContext
 
 logger = logging.getLogger(__name__)
 
 
-async def check_access_middleware(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def check_access_middleware(update: Update, context: BotContext) -> None:
     """
     Middleware для проверки доступа пользователя к тестовому боту.
     
@@ -26,7 +24,7 @@ async def check_access_middleware(update: Update, context: ContextTypes.DEFAULT_
     """
     # КРИТИЧЕСКИ ВАЖНО: Проверка доступа ТОЛЬКО для тестового бота!
     # Для продакшн бота - пропускаем без проверки
-    if not settings.IS_TEST_BOT:
+    if not bot_mode.is_test_bot():
         # Продакшн бот - не проверяем доступ, пропускаем дальше
         context.user_data.pop('_access_denied', None)
         return
@@ -70,7 +68,7 @@ async def check_access_middleware(update: Update, context: ContextTypes.DEFAULT_
     context.user_data.pop('_access_denied', None)
 
 
-async def handle_sticker(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def handle_sticker(update: Update, context: BotContext) -> None:
     """Handle sticker messages - log file_id for unauthorized access sticker."""
     # Проверка доступа уже выполнена в check_access_middleware (group=0)
     # Проверяем флаг доступа из контекста
@@ -100,7 +98,7 @@ async def handle_sticker(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
 
 
-async def send_unauthorized_access_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def send_unauthorized_access_message(update: Update, context: BotContext) -> None:
     """
     Отправляет сообщение о несанкционированном доступе со стикером.
     
@@ -167,7 +165,7 @@ def check_user_access(telegram_id: int) -> bool:
         bool: True если доступ разрешен, False если запрещен
     """
     # Продакшн бот - доступ для всех (IS_TEST_BOT может быть None, False или не установлен)
-    if not settings.IS_TEST_BOT:
+    if not bot_mode.is_test_bot():
         return True
     
     # Тестовый бот - проверяем доступ
@@ -187,7 +185,7 @@ def check_user_access(telegram_id: int) -> bool:
     return False
 
 
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def start_command(update: Update, context: BotContext) -> None:
     """Handle /start command."""
     user = update.effective_user
     
@@ -196,10 +194,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     if context.user_data.get('_access_denied'):
         return
     
-    # Проверяем существование пользователя
-    async with AsyncSessionLocal() as session:
-        service = UserService(session)
-        existing_user = await service.get_by_telegram_id(user.id)
+    # Проверяем существование пользователя (сессия update, отдаем до ответа в Telegram)
+    existing_user = await context.user_service.get_by_telegram_id(user.id)
+    await context.release_db()
     
     if existing_user:
         # Пользователь зарегистрирован - показываем меню с кнопкой удаления
@@ -248,7 +245,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     logger.info(f"User {user.id} sent /start command")
 
 
-async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def handle_callback(update: Update, context: BotContext) -> None:
     """Handle callback queries from inline buttons."""
     query = update.callback_query
     user = update.effective_user
@@ -277,7 +274,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await query.edit_message_text("Неизвестная команда.")
 
 
-async def delete_me_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def delete_me_command(update: Update, context: BotContext) -> None:
     """
     Команда /delete_me - показывает подтверждение удаления.
     
@@ -294,16 +291,15 @@ async def delete_me_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     
     # Проверяем что пользователь существует
-    async with AsyncSessionLocal() as session:
-        service = UserService(session)
-        existing_user = await service.get_by_telegram_id(user.id)
-        
-        if not existing_user:
-            await update.message.reply_text(
-                "❌ Аккаунт не найден. Возможно, уже удален.\n\n"
-                "Используйте /start для регистрации."
-            )
-            return
+    existing_user = await context.user_service.get_by_telegram_id(user.id)
+    await context.release_db()
+    
+    if not existing_user:
+        await update.message.reply_text(
+            "❌ Аккаунт не найден. Возможно, уже удален.\n\n"
+            "Используйте /start для регистрации."
+        )
+        return
     
     # Показываем предупреждение с подтверждением
     keyboard = [
@@ -344,24 +340,23 @@ async def delete_me_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def delete_me_command_from_callback(
     update: Update,
-    context: ContextTypes.DEFAULT_TYPE
+    context: BotContext
 ) -> None:
     """Показывает подтверждение удаления из callback (для кнопки в меню)."""
     query = update.callback_query
     user = update.effective_user
     
     # Проверяем что пользователь существует
-    async with AsyncSessionLocal() as session:
-        service = UserService(session)
-        existing_user = await service.get_by_telegram_id(user.id)
-        
-        if not existing_user:
-            await query.answer("Аккаунт не найден", show_alert=True)
-            await query.edit_message_text(
-                "❌ Аккаунт не найден. Возможно, уже удален.\n\n"
-                "Используйте /start для регистрации."
-            )
-            return
+    existing_user = await context.user_service.get_by_telegram_id(user.id)
+    await context.release_db()
+    
+    if not existing_user:
+        await query.answer("Аккаунт не найден", show_alert=True)
+        await query.edit_message_text(
+            "❌ Аккаунт не найден. Возможно, уже удален.\n\n"
+            "Используйте /start для регистрации."
+        )
+        return
     
     # Показываем предупреждение с подтверждением
     keyboard = [
@@ -402,7 +397,7 @@ async def delete_me_command_from_callback(
 
 async def delete_confirm_callback(
     update: Update, 
-    context: ContextTypes.DEFAULT_TYPE
+    context: BotContext
 ) -> None:
     """
     Подтверждение удаления - выполняет удаление.
@@ -419,30 +414,30 @@ async def delete_confirm_callback(
     telegram_id = user.id
     
     try:
-        async with AsyncSessionLocal() as session:
-            service = UserService(session)
-            deleted = await service.delete_user_by_telegram_id(telegram_id)
+        deleted = await context.user_service.delete_user_by_telegram_id(telegram_id)
+        # Фиксируем удаление до ответа: соединение не ждет Telegram API
+        await context.release_db()
+        
+        if deleted:
+            success_text = (
+                "✅ **Аккаунт успешно удален!**\n\n"
+                "Все ваши данные удалены из системы.\n\n"
+                "Для новой регистрации используйте команду:\n"
+                "`/start`\n\n"
+                "Спасибо за использование BrashLens! 👋"
+            )
+            
+            await query.edit_message_text(
+                success_text,
+                parse_mode="Markdown"
+            )
+            logger.info(f"User {telegram_id} successfully deleted their account")
+        else:
+            await query.edit_message_text(
+                "❌ Аккаунт не найден. Возможно, уже удален.\n\n"
+                "Используйте /start для регистрации."
+            )
             
-            if deleted:
-                success_text = (
-                    "✅ **Аккаунт успешно удален!**\n\n"
-                    "Все ваши данные удалены из системы.\n\n"
-                    "Для новой регистрации используйте команду:\n"
-                    "`/start`\n\n"
-                    "Спасибо за использование BrashLens! 👋"
-                )
-                
-                await query.edit_message_text(
-                    success_text,
-                    parse_mode="Markdown"
-                )
-                logger.info(f"User {telegram_id} successfully deleted their account")
-            else:
-                await query.edit_message_text(
-                    "❌ Аккаунт не найден. Возможно, уже удален.\n\n"
-                    "Используйте /start для регистрации."
-                )
-                
     except Exception as e:
         logger.error(
             f"Error deleting user {telegram_id}: {e}",
@@ -457,7 +452,7 @@ async def delete_confirm_callback(
 
 async def delete_cancel_callback(
     update: Update,
-    context: ContextTypes.DEFAULT_TYPE
+    context: BotContext
 ) -> None:
     """Отмена удаления."""
     query = update.callback_query
@@ -1,21 +1,18 @@
 """Обработчик команды /help."""
 from telegram import Update
-from telegram.ext import ContextTypes
-from app.core.database import AsyncSessionLocal
-from app.services.user_service import UserService
+from app.bot.unit_of_work import BotContext
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def help_command(update: Update, context: BotContext) -> None:
     """Обработчик команды /help - показывает доступные команды и функционал."""
     user = update.effective_user
     
     # Проверяем, зарегистрирован ли пользователь
-    async with AsyncSessionLocal() as db:
-        service = UserService(db)
-        existing_user = await service.get_by_telegram_id(user.id)
+    existing_user = await context.user_service.get_by_telegram_id(user.id)
+    await context.release_db()
     
     # Базовые команды (доступны всем)
     base_commands = (
@@ -1,9 +1,8 @@
 """Обработчики команды /start и регистрации пользователей."""
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from app.services.user_service import UserService
 from app.schemas.user import UserCreate
-from app.core.database import AsyncSessionLocal
+from app.bot.unit_of_work import BotContext
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +11,7 @@ logger = logging.getLogger(__name__)
 CHOOSING_ROLE = 0
 
 
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def start_command(update: Update, context: BotContext):
     """
     Обработка команды /start
     
@@ -22,10 +21,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     user = update.effective_user
     
-    # Получаем сервис для работы с БД
-    async with AsyncSessionLocal() as db:
-        service = UserService(db)
-        existing_user = await service.get_by_telegram_id(user.id)
+    # Сессия и сервис update (unit of work); соединение отдаем до ответа в Telegram
+    existing_user = await context.user_service.get_by_telegram_id(user.id)
+    await context.release_db()
     
     if existing_user:
         # Пользователь уже зарегистрирован
@@ -73,7 +71,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return CHOOSING_ROLE
 
 
-async def role_chosen(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def role_chosen(update: Update, context: BotContext):
     """Обработка выбора роли"""
     query = update.callback_query
     await query.answer()
@@ -95,9 +93,14 @@ async def role_chosen(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     try:
-        async with AsyncSessionLocal() as db:
-            service = UserService(db)
-            created_user = await service.create_user(user_data)
+        # Upsert: повторный/параллельный выбор роли не приводит к ошибке дубликата
+        created_user, created = await context.user_service.get_or_create_user(user.id, user_data)
+        await context.release_db()
+        
+        if not created:
+            logger.info(f"User {user.id} is already registered, skipping creation")
+            # Показываем фактическую роль, а не выбранную повторно
+            role = created_user.role.value
         
         if role == "photographer":
             text = (
@@ -125,13 +128,14 @@ async def role_chosen(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
     except Exception as e:
         logger.error(f"Error creating user {user.id}: {e}", exc_info=True)
+        await context.uow.rollback()
         await query.edit_message_text(
             "Произошла ошибка при регистрации. Попробуйте позже или обратитесь в поддержку."
         )
         return ConversationHandler.END
 
 
-async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def cancel(update: Update, context: BotContext):
     """Отмена регистрации"""
     await update.message.reply_text(
         "Регистрация отменена. Используйте /start для повторной попытки."
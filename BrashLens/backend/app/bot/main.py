@@ -2,25 +2,10 @@
 import logging
 from telegram import Update, BotCommand
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ConversationHandler, ContextTypes
-from app.bot.config import TELEGRAM_BOT_TOKEN
-from app.bot.handlers.start import start_command, role_chosen, cancel, CHOOSING_ROLE
-from app.bot.handlers.help import help_command
-# Импортируем функции удаления из старого файла handlers.py
-# Используем импорт с указанием модуля напрямую для избежания конфликта с папкой handlers/
-import sys
-import importlib.util
-from pathlib import Path
-
-# Загружаем старый handlers.py напрямую
-handlers_file = Path(__file__).parent / "handlers.py"
-spec = importlib.util.spec_from_file_location("app.bot.handlers_old", handlers_file)
-handlers_old = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(handlers_old)
-
-delete_me_command = handlers_old.delete_me_command
-delete_me_command_from_callback = handlers_old.delete_me_command_from_callback
-delete_confirm_callback = handlers_old.delete_confirm_callback
-delete_cancel_callback = handlers_old.delete_cancel_callback
+from app.core.config import settings
+from app.bot.bot import create_application
+from app.core.database import replica_router
+from app.services.near_cache import invalidation_bus
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -41,12 +26,33 @@ async def post_init(application: Application) -> None:
     
     await application.bot.set_my_commands(commands)
     logger.info("Bot commands menu set successfully")
+    
+    if settings.NEAR_CACHE_ENABLED:
+        invalidation_bus.ensure_started()
+    replica_router.ensure_monitor()
 
 
 def main():
     """Запуск бота"""
-    # Создаем приложение
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).post_init(post_init).build()
+    # Создаем приложение: та же сборка, что и в webhook режиме, со своими обработчиками
+    application = create_application(register=register_handlers, post_init=post_init)
+    
+    # Запускаем polling (для разработки)
+    # В продакшене использовать webhook
+    logger.info("Starting bot in polling mode...")
+    application.run_polling()
+
+
+def register_handlers(application: Application) -> None:
+    """Зарегистрировать обработчики (модули обработчиков импортируются при регистрации)."""
+    from app.bot.handlers.start import start_command, role_chosen, cancel, CHOOSING_ROLE
+    from app.bot.handlers.help import help_command
+    from app.bot.handlers.common import (
+        delete_me_command,
+        delete_me_command_from_callback,
+        delete_confirm_callback,
+        delete_cancel_callback,
+    )
     
     # Conversation handler для регистрации
     registration_handler = ConversationHandler(
@@ -56,7 +62,9 @@ def main():
                 CallbackQueryHandler(role_chosen, pattern="^role_")
             ],
         },
-        fallbacks=[CommandHandler("cancel", cancel)]
+        fallbacks=[CommandHandler("cancel", cancel)],
+        name="registration",
+        persistent=settings.BOT_PERSISTENCE_ENABLED,
     )
     
     # Обработчики для удаления пользователя
@@ -80,11 +88,6 @@ def main():
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("delete_me", delete_me_command))
     application.add_handler(callback_handler)
-    
-    # Запускаем polling (для разработки)
-    # В продакшене использовать webhook
-    logger.info("Starting bot in polling mode...")
-    application.run_polling()
 
 
 if __name__ == "__main__":
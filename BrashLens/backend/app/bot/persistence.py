@@ -0,0 +1,321 @@
+"""Redis persistence для user_data, chat_data и состояний ConversationHandler."""
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from telegram import Update
+from telegram.ext import BasePersistence, ConversationHandler, PersistenceInput
+
+from app.bot.update_hooks import UpdateHook
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RedisPersistence(BasePersistence[dict, dict, dict]):
+    """
+    BasePersistence поверх Redis: состояние бота общее для всех реплик.
+
+    Раскладка: по одному hash на user_data, chat_data и на каждый
+    ConversationHandler (поле - id или ключ разговора, значение - JSON),
+    bot_data - отдельная строка. Ключи включают id бота.
+
+    user_data, chat_data и bot_data записываются пачкой: значения, не
+    изменившиеся с последней записи или чтения (отпечаток JSON в памяти),
+    пропускаются, остальные уходят одним pipeline. Состояние разговора
+    пишется сразу (update_conversation ждет записи) - следующий update
+    разговора может прийти на другую реплику. ConversationSyncHook передает
+    изменения в persistence после каждого update и перечитывает состояние
+    разговора перед ним.
+    """
+
+    KEY_PREFIX = "tg:persist:v1"
+
+    def __init__(self, redis: Optional[Redis] = None, update_interval: float = 1.0):
+        """
+        Инициализация RedisPersistence.
+
+        Args:
+            redis: Redis client (по умолчанию общий client процесса)
+            update_interval: Период записи накопленных изменений, секунд
+        """
+        super().__init__(
+            store_data=PersistenceInput(bot_data=True, chat_data=True, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self._redis = redis
+        # Отпечатки последних записанных/прочитанных значений: (hash key, field) -> hash(JSON)
+        self._fingerprints: dict[tuple[str, str], int] = {}
+        # Изменения, ожидающие записи: (hash key, field) -> JSON или None (удалить)
+        self._pending: dict[tuple[str, str], Optional[str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.writes = 0
+        self.skipped = 0
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    def _key(self, kind: str) -> str:
+        return f"{self.KEY_PREFIX}:{self.bot.id}:{kind}"
+
+    @staticmethod
+    def _conversation_field(key: tuple) -> str:
+        return json.dumps(list(key))
+
+    @staticmethod
+    def _dump(data: Any) -> str:
+        return json.dumps(data, ensure_ascii=False, sort_keys=True)
+
+    async def _load_hash(self, kind: str) -> dict[str, str]:
+        key = self._key(kind)
+        raw = await self.redis.hgetall(key)
+        for field, value in raw.items():
+            self._fingerprints[(key, field)] = hash(value)
+        return raw
+
+    # --- Запись с батчингом ---
+
+    def _stage(self, key: str, field: str, value: Optional[str]) -> None:
+        fingerprint = None if value is None else hash(value)
+        if (key, field) not in self._pending and self._fingerprints.get((key, field)) == fingerprint:
+            self.skipped += 1
+            return
+        self._pending[(key, field)] = value
+        if self._flush_task is None or self._flush_task.done():
+            # Application вызывает update_* пачкой через gather - задача запишет их все разом
+            self._flush_task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        pipe = self.redis.pipeline(transaction=False)
+        for (key, field), value in pending.items():
+            if key.endswith(":bot_data"):
+                if value is None:
+                    pipe.delete(key)
+                else:
+                    pipe.set(key, value)
+            elif value is None:
+                pipe.hdel(key, field)
+            else:
+                pipe.hset(key, field, value)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            # Вернем несохраненное в очередь, кроме уже перезаписанного новыми значениями
+            for item, value in pending.items():
+                self._pending.setdefault(item, value)
+            logger.error(f"Failed to write bot persistence ({len(pending)} entries): {e}")
+            return
+        for item, value in pending.items():
+            if value is None:
+                self._fingerprints.pop(item, None)
+            else:
+                self._fingerprints[item] = hash(value)
+        self.writes += len(pending)
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self._write_pending()
+
+    # --- user_data / chat_data / bot_data ---
+
+    async def get_user_data(self) -> dict[int, dict]:
+        return {int(field): json.loads(value) for field, value in (await self._load_hash("user_data")).items()}
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        return {int(field): json.loads(value) for field, value in (await self._load_hash("chat_data")).items()}
+
+    async def get_bot_data(self) -> dict:
+        key = self._key("bot_data")
+        raw = await self.redis.get(key)
+        if raw is None:
+            return {}
+        self._fingerprints[(key, "")] = hash(raw)
+        return json.loads(raw)
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._stage(self._key("user_data"), str(user_id), self._dump(data))
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._stage(self._key("chat_data"), str(chat_id), self._dump(data))
+
+    async def update_bot_data(self, data: dict) -> None:
+        self._stage(self._key("bot_data"), "", self._dump(data))
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._stage(self._key("user_data"), str(user_id), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._stage(self._key("chat_data"), str(chat_id), None)
+
+    def _refresh(self, key: str, field: str, raw: Optional[str], data: dict) -> None:
+        # Локальное незаписанное значение новее того, что лежит в Redis
+        if (key, field) in self._pending:
+            return
+        fingerprint = None if raw is None else hash(raw)
+        if self._fingerprints.get((key, field)) == fingerprint:
+            return
+        data.clear()
+        if raw is None:
+            self._fingerprints.pop((key, field), None)
+        else:
+            data.update(json.loads(raw))
+            self._fingerprints[(key, field)] = fingerprint
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        key = self._key("user_data")
+        self._refresh(key, str(user_id), await self.redis.hget(key, str(user_id)), user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        key = self._key("chat_data")
+        self._refresh(key, str(chat_id), await self.redis.hget(key, str(chat_id)), chat_data)
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        key = self._key("bot_data")
+        self._refresh(key, "", await self.redis.get(key), bot_data)
+
+    # --- callback_data не хранится (store_data.callback_data=False) ---
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    # --- ConversationHandler ---
+
+    async def get_conversations(self, name: str) -> dict:
+        return {
+            tuple(json.loads(field)): json.loads(value)
+            for field, value in (await self._load_hash(f"conv:{name}")).items()
+        }
+
+    async def update_conversation(self, name: str, key: tuple, new_state: Optional[object]) -> None:
+        """Записать состояние разговора сразу, без батчинга."""
+        redis_key = self._key(f"conv:{name}")
+        field = self._conversation_field(key)
+        value = None if new_state is None else self._dump(new_state)
+        self._pending.pop((redis_key, field), None)
+        if self._fingerprints.get((redis_key, field)) == (None if value is None else hash(value)):
+            self.skipped += 1
+            return
+        try:
+            if value is None:
+                await self.redis.hdel(redis_key, field)
+                self._fingerprints.pop((redis_key, field), None)
+            else:
+                await self.redis.hset(redis_key, field, value)
+                self._fingerprints[(redis_key, field)] = hash(value)
+            self.writes += 1
+        except RedisError as e:
+            # Повторим со следующей пачкой
+            logger.error(f"Failed to write conversation {name} state for {key}: {e}")
+            self._stage(redis_key, field, value)
+
+    async def refresh_conversations(self, handlers: list[ConversationHandler], update: object) -> None:
+        """
+        Перечитать из Redis состояние разговора, которому принадлежит update.
+
+        PTB читает состояния разговоров из persistence только при запуске,
+        поэтому без этого шага реплика не увидит переход, сделанный другой.
+        Публичного API для этого в PTB нет: используются ConversationHandler._get_key
+        и _conversations (версия PTB закреплена в requirements.txt, совместимость
+        проверяет check_conversation_internals и test_bot_persistence.py).
+        """
+        if not isinstance(update, Update):
+            return
+        for handler in handlers:
+            try:
+                conversation = handler._get_key(update)
+            except RuntimeError:
+                # У update нет чата/пользователя, нужного для ключа этого разговора
+                continue
+            key = self._key(f"conv:{handler.name}")
+            field = self._conversation_field(conversation)
+            if (key, field) in self._pending:
+                continue
+            raw = await self.redis.hget(key, field)
+            fingerprint = None if raw is None else hash(raw)
+            if self._fingerprints.get((key, field)) == fingerprint:
+                continue
+            if raw is None:
+                self._fingerprints.pop((key, field), None)
+            else:
+                self._fingerprints[(key, field)] = fingerprint
+            state = None if raw is None else json.loads(raw)
+            # Без отметки для записи: это уже сохраненное состояние
+            if state is None or state == handler.END:
+                handler._conversations.data.pop(conversation, None)
+            else:
+                handler._conversations.update_no_track({conversation: state})
+
+    def stats(self) -> dict:
+        return {
+            "writes": self.writes,
+            "skipped_unchanged": self.skipped,
+            "pending": len(self._pending),
+        }
+
+
+def check_conversation_internals() -> None:
+    """
+    Проверить, что в установленной версии PTB есть внутренности ConversationHandler,
+    на которые опирается refresh_conversations.
+
+    Raises:
+        RuntimeError: PTB обновлен несовместимо - ошибка при запуске, а не тихая рассинхронизация
+    """
+    try:
+        # Application подменяет _conversations persistent-разговора на TrackingDict
+        from telegram.ext._utils.trackingdict import TrackingDict
+    except ImportError:
+        TrackingDict = None
+    if not (
+        TrackingDict is not None
+        and callable(getattr(ConversationHandler, "_get_key", None))
+        and callable(getattr(TrackingDict, "update_no_track", None))
+        and hasattr(TrackingDict(), "data")
+    ):
+        raise RuntimeError(
+            "RedisPersistence.refresh_conversations is incompatible with the installed "
+            "python-telegram-bot version: ConversationHandler internals changed"
+        )
+
+
+class ConversationSyncHook(UpdateHook):
+    """
+    Шаг обработки: синхронизация состояния разговоров между репликами.
+
+    До обработчиков состояние разговора update перечитывается из Redis
+    (предыдущий update чата мог обработать другой экземпляр бота); после -
+    изменения сразу передаются в persistence через Application.update_persistence(),
+    не дожидаясь периодической записи раз в update_interval.
+    """
+
+    def __init__(self, persistence: RedisPersistence):
+        check_conversation_internals()
+        self.persistence = persistence
+
+    async def before(self, application, update: object) -> bool:
+        handlers = [
+            handler
+            for group in application.handlers.values()
+            for handler in group
+            if isinstance(handler, ConversationHandler) and handler.persistent
+        ]
+        if handlers:
+            await self.persistence.refresh_conversations(handlers, update)
+        return True
+
+    async def after(self, application, update: object, failed: bool) -> None:
+        # Переход состояния фиксируется и после ошибки обработчика - как это сделал бы PTB
+        await application.update_persistence()
@@ -0,0 +1,261 @@
+"""Планировщик исходящих запросов к Bot API с учетом лимитов Telegram."""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Полосы приоритета: передаются в методы бота через rate_limit_args,
+# например bot.send_message(chat_id, text, rate_limit_args=PRIORITY_BULK)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+_LANES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk"}
+
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше capacity подряд.
+
+    acquire() с приоритетом: bulk-запрос не забирает токен, пока
+    его ждет хотя бы один interactive-запрос. Ожидающие стоят в очередях
+    (FIFO внутри полосы) и просыпаются по одному таймеру на момент
+    появления следующего токена - без периодического опроса.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.waiting = {priority: 0 for priority in _LANES}
+        self._waiters: dict[int, deque[asyncio.Future]] = {priority: deque() for priority in _LANES}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _has_waiters(self, up_to_priority: int) -> bool:
+        return any(self._waiters[lane] for lane in self._waiters if lane <= up_to_priority)
+
+    @property
+    def idle(self) -> bool:
+        """Bucket полон и никто не ждет - его можно забыть."""
+        self._refill()
+        return self.tokens >= self.capacity and not any(self.waiting.values())
+
+    def try_acquire(self) -> bool:
+        """Взять токен без ожидания: False, если токенов нет."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        self._refill()
+        # Очередь своей и более срочных полос обслуживается первой
+        if self.tokens >= 1 and not self._has_waiters(priority):
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        self.waiting[priority] += 1
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Токен уже выдан отмененному запросу - возвращаем его следующему
+                self.tokens += 1
+                self._dispatch()
+            elif future in self._waiters[priority]:
+                self._waiters[priority].remove(future)
+            raise
+        finally:
+            self.waiting[priority] -= 1
+
+    def _dispatch(self) -> None:
+        """Раздать накопившиеся токены ожидающим по приоритету и запланировать следующее пробуждение."""
+        self._timer = None
+        self._refill()
+        for lane in sorted(self._waiters):
+            waiters = self._waiters[lane]
+            while waiters and self.tokens >= 1:
+                future = waiters.popleft()
+                if not future.done():
+                    self.tokens -= 1
+                    future.set_result(None)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not any(self._waiters.values()):
+            return
+        delay = max(1 - self.tokens, 0) / self.rate
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+
+class TelegramRateLimiter(BaseRateLimiter[int]):
+    """
+    Rate limiter бота: общий лимит, лимит на личный чат и на группу.
+
+    Все запросы Application.bot (reply_text, edit_message_text, send_message...)
+    проходят через process_request. Запрос ждет токен своего чата, затем
+    общий токен; interactive-ответы обгоняют bulk-рассылки. RetryAfter от
+    Telegram приостанавливает все исходящие запросы на указанное время,
+    после чего запрос повторяется (до max_retries раз). Bucket чатов, в
+    которые давно не писали, удаляются фоновой задачей раз в PRUNE_INTERVAL.
+    """
+
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        overall_per_second: float = 30.0,
+        chat_per_second: float = 1.0,
+        group_per_minute: float = 20.0,
+        max_retries: int = 3,
+    ):
+        """
+        Инициализация TelegramRateLimiter.
+
+        Args:
+            overall_per_second: Общий лимит запросов в секунду
+            chat_per_second: Лимит сообщений в секунду в один личный чат
+            group_per_minute: Лимит сообщений в минуту в одну группу/канал
+            max_retries: Сколько раз повторять запрос после RetryAfter
+        """
+        self.overall = TokenBucket(overall_per_second, overall_per_second)
+        self.chat_per_second = chat_per_second
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self._chats: dict[Union[int, str], TokenBucket] = {}
+        self._paused_until = 0.0
+        self._prune_task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def initialize(self) -> None:
+        if self._prune_task is None or self._prune_task.done():
+            self._prune_task = asyncio.get_running_loop().create_task(
+                self._prune_idle(), name="bot-rate-limiter-prune"
+            )
+
+    async def shutdown(self) -> None:
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            try:
+                await self._prune_task
+            except asyncio.CancelledError:
+                pass
+            self._prune_task = None
+        logger.info(f"Outbound rate limiter stopped: {self.stats()}")
+
+    async def _prune_idle(self) -> None:
+        while True:
+            await asyncio.sleep(self.PRUNE_INTERVAL)
+            self._chats = {key: bucket for key, bucket in self._chats.items() if not bucket.idle}
+
+    @staticmethod
+    def _is_group(chat_id: Union[int, str]) -> bool:
+        # Группы, супергруппы и каналы имеют отрицательный id; @username - публичный канал
+        if isinstance(chat_id, str):
+            return chat_id.startswith("@") or chat_id.startswith("-")
+        return chat_id < 0
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if self._is_group(chat_id):
+                bucket = TokenBucket(self.group_per_minute / 60, self.group_per_minute)
+            else:
+                bucket = TokenBucket(self.chat_per_second, 1)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def _wait_pause(self) -> None:
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, dict, list[dict]]]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Union[bool, dict, list[dict]]:
+        priority = PRIORITY_BULK if rate_limit_args == PRIORITY_BULK else PRIORITY_INTERACTIVE
+        chat_id = data.get("chat_id")
+
+        attempt = 0
+        while True:
+            queued_at = time.monotonic()
+            await self._wait_pause()
+            if chat_id is not None:
+                await self._chat_bucket(chat_id).acquire(priority)
+            await self.overall.acquire(priority)
+            # RetryAfter мог прийти, пока запрос ждал токен: не отправляем его в flood wait
+            await self._wait_pause()
+            started_at = time.monotonic()
+            wait = started_at - queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                delay = _seconds(e.retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Flood control on {endpoint}: retry in {delay}s (attempt {attempt})")
+                continue
+
+            latency = time.monotonic() - started_at
+            self.sent += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            return result
+
+    def stats(self) -> dict:
+        attempts = self.sent + self.retries + self.failed
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "paused": self._paused_until > time.monotonic(),
+            "waiting": {
+                name: self.overall.waiting[lane]
+                + sum(bucket.waiting[lane] for bucket in self._chats.values())
+                for lane, name in _LANES.items()
+            },
+            "tracked_chats": len(self._chats),
+            "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_latency_ms": round(self.total_latency / self.sent * 1000, 3) if self.sent else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 3),
+        }
+
+
+def _seconds(value: Union[int, float, timedelta]) -> float:
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
@@ -0,0 +1,138 @@
+"""Unit of work на один Telegram update: одна сессия БД и один UserService."""
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from telegram.ext import Application, CallbackContext, ContextTypes, ExtBot
+
+from app.core.database import AsyncSessionLocal
+from app.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateUnitOfWork:
+    """
+    Сессия и сервисы одного update.
+
+    Сессия создается лениво - update, которому БД не нужна, не берет
+    соединение из пула. Сервисы работают с autocommit=False: транзакция
+    фиксируется один раз в release()/close(), кеш инвалидируется после нее.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.failed = False
+        self._session: Optional[AsyncSession] = None
+        self._user_service: Optional[UserService] = None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self.session_factory()
+        return self._session
+
+    @property
+    def user_service(self) -> UserService:
+        if self._user_service is None:
+            self._user_service = UserService(self.session, autocommit=False)
+        return self._user_service
+
+    async def release(self) -> None:
+        """
+        Зафиксировать накопленные изменения и вернуть соединение в пул.
+
+        Вызывается перед медленными запросами к Telegram API. Сессия остается
+        рабочей: следующий запрос к БД откроет новую транзакцию.
+        """
+        if self._session is None:
+            return
+        if self._session.in_transaction():
+            await self._session.commit()
+        if self._user_service is not None:
+            await self._user_service.run_after_commit()
+
+    async def rollback(self) -> None:
+        """Откатить изменения update и вернуть соединение в пул."""
+        if self._session is None:
+            return
+        await self._session.rollback()
+        if self._user_service is not None:
+            self._user_service.discard_after_commit()
+
+    async def close(self) -> None:
+        """Завершить update: commit (или rollback при ошибке обработчика) и close."""
+        if self._session is None:
+            return
+        try:
+            if self.failed:
+                await self.rollback()
+            else:
+                await self.release()
+        except Exception as e:
+            logger.error(f"Failed to commit update unit of work: {e}", exc_info=True)
+            await self.rollback()
+        finally:
+            await self._session.close()
+            self._session = None
+            self._user_service = None
+
+
+# Unit of work update, который сейчас обрабатывается в этой задаче
+_current_uow: ContextVar[Optional[UpdateUnitOfWork]] = ContextVar("bot_update_uow", default=None)
+
+
+class BotContext(CallbackContext[ExtBot, dict, dict, dict]):
+    """CallbackContext с доступом к unit of work текущего update."""
+
+    @property
+    def uow(self) -> UpdateUnitOfWork:
+        uow = _current_uow.get()
+        if uow is None:
+            raise RuntimeError("Unit of work is available only while processing an update")
+        return uow
+
+    @property
+    def db(self) -> AsyncSession:
+        """Сессия БД update (создается при первом обращении)."""
+        return self.uow.session
+
+    @property
+    def user_service(self) -> UserService:
+        """UserService на сессии update."""
+        return self.uow.user_service
+
+    async def release_db(self) -> None:
+        """Закоммитить и отдать соединение перед вызовом Telegram API."""
+        await self.uow.release()
+
+
+class UnitOfWorkApplication(Application):
+    """
+    Application, оборачивающий обработку каждого update в UpdateUnitOfWork.
+
+    Unit of work открывается до первого обработчика и закрывается после
+    последнего: commit, если обработчики не упали, иначе rollback.
+    """
+
+    async def process_update(self, update: object) -> None:
+        uow = UpdateUnitOfWork()
+        token = _current_uow.set(uow)
+        try:
+            await super().process_update(update)
+        except BaseException:
+            uow.failed = True
+            raise
+        finally:
+            _current_uow.reset(token)
+            await uow.close()
+
+    async def process_error(self, update, error, job=None, coroutine=None) -> bool:
+        uow = _current_uow.get()
+        if uow is not None:
+            uow.failed = True
+        return await super().process_error(update, error, job=job, coroutine=coroutine)
+
+
+context_types = ContextTypes(context=BotContext)
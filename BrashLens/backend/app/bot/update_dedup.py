@@ -0,0 +1,168 @@
+"""Дедупликация повторно доставленных Telegram update по update_id."""
+import logging
+import time
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from telegram import Update
+
+from app.bot.update_hooks import UpdateHook
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    """
+    Отметки update_id в Redis.
+
+    Каждый update_id - отдельный ключ с TTL. Перед обработкой update
+    занимается коротким ключом "processing" (SET NX EX processing_ttl):
+    повтор, пришедший во время обработки, отбрасывается. После успешной
+    обработки ключ продлевается до ttl ("done") - это скользящее окно, в
+    котором повторы отбрасываются; если обработчик упал, ключ удаляется и
+    повторная доставка Telegram будет обработана. Если процесс умер посреди
+    обработки, ключ истечет через processing_ttl - update не потеряется на
+    сутки. Ключ включает id бота, чтобы тестовый и боевой бот на одном Redis
+    не пересекались. Если Redis недоступен, update обрабатывается
+    (fail-open): лучше редкий повтор, чем потерянный update.
+
+    Webhook с быстрым ответом занимает update_id до постановки в очередь
+    (повторы не занимают ее места) и передает отметку обработчику очереди
+    через hand_off(): шаг обработки не считает ее повтором.
+    """
+
+    KEY_PREFIX = "tg:update:v1"
+    PROCESSING = "processing"
+    DONE = "done"
+
+    def __init__(self, redis: Optional[Redis] = None, ttl: int = 86400, processing_ttl: int = 300):
+        """
+        Инициализация UpdateDeduplicator.
+
+        Args:
+            redis: Redis client (по умолчанию общий client процесса)
+            ttl: Сколько секунд помнить обработанный update_id
+            processing_ttl: Сколько секунд держать отметку update в обработке
+        """
+        self._redis = redis
+        self.ttl = ttl
+        self.processing_ttl = processing_ttl
+        # Занятые webhook и переданные в очередь update: (bot_id, update_id) -> time.monotonic()
+        self._handed_off: dict[tuple[int, int], float] = {}
+        self._pruned_at = time.monotonic()
+        self.checked = 0
+        self.duplicates = 0
+        self.released = 0
+        self.errors = 0
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    @classmethod
+    def key(cls, bot_id: int, update_id: int) -> str:
+        return f"{cls.KEY_PREFIX}:{bot_id}:{update_id}"
+
+    async def claim(self, bot_id: int, update_id: int) -> bool:
+        """
+        Занять update_id на время обработки.
+
+        Returns:
+            bool: False если update уже обработан или обрабатывается (повторная доставка)
+        """
+        self.checked += 1
+        try:
+            first_seen = await self.redis.set(
+                self.key(bot_id, update_id), self.PROCESSING, nx=True, ex=self.processing_ttl
+            )
+        except RedisError as e:
+            self.errors += 1
+            logger.warning(f"Update dedup unavailable, processing update {update_id}: {e}")
+            return True
+
+        if first_seen:
+            return True
+        self.duplicates += 1
+        return False
+
+    def hand_off(self, bot_id: int, update_id: int) -> None:
+        """Update занят через claim() и передан в очередь этого процесса."""
+        now = time.monotonic()
+        self._handed_off[(bot_id, update_id)] = now
+        if now - self._pruned_at > self.processing_ttl:
+            # Update, отброшенные до шага дедупликации (флуд), не забираются из очереди
+            self._pruned_at = now
+            self._handed_off = {
+                item: at for item, at in self._handed_off.items() if now - at <= self.processing_ttl
+            }
+
+    def take_handed_off(self, bot_id: int, update_id: int) -> bool:
+        """Забрать отметку, переданную через hand_off() (один раз)."""
+        return self._handed_off.pop((bot_id, update_id), None) is not None
+
+    async def complete(self, bot_id: int, update_id: int) -> None:
+        """Update обработан: помнить update_id ttl секунд."""
+        try:
+            await self.redis.set(self.key(bot_id, update_id), self.DONE, ex=self.ttl)
+        except RedisError as e:
+            self.errors += 1
+            logger.warning(f"Failed to mark update {update_id} as processed: {e}")
+
+    async def release(self, bot_id: int, update_id: int) -> None:
+        """Обработка не удалась: снять отметку, чтобы повторная доставка была обработана."""
+        self._handed_off.pop((bot_id, update_id), None)
+        try:
+            await self.redis.delete(self.key(bot_id, update_id))
+            self.released += 1
+        except RedisError as e:
+            self.errors += 1
+            logger.warning(f"Failed to release update {update_id}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "released": self.released,
+            "handed_off": len(self._handed_off),
+            "errors": self.errors,
+        }
+
+
+class UpdateDedupHook(UpdateHook):
+    """
+    Шаг обработки: повторно доставленные Telegram update отбрасываются до unit of work.
+
+    Отметка подтверждается после успешной обработки и снимается после ошибки.
+    """
+
+    def __init__(self, deduplicator: UpdateDeduplicator):
+        self.deduplicator = deduplicator
+
+    async def before(self, application, update: object) -> bool:
+        if not isinstance(update, Update):
+            return True
+        if self.deduplicator.take_handed_off(application.bot.id, update.update_id):
+            return True
+        if not await self.deduplicator.claim(application.bot.id, update.update_id):
+            logger.info(f"Skipping redelivered update {update.update_id}")
+            return False
+        return True
+
+    async def after(self, application, update: object, failed: bool) -> None:
+        if not isinstance(update, Update):
+            return
+        if failed:
+            await self.deduplicator.release(application.bot.id, update.update_id)
+        else:
+            await self.deduplicator.complete(application.bot.id, update.update_id)
+
+
+update_deduplicator = UpdateDeduplicator(
+    ttl=settings.UPDATE_DEDUP_TTL,
+    processing_ttl=settings.UPDATE_DEDUP_PROCESSING_TTL,
+)
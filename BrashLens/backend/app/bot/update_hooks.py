@@ -0,0 +1,22 @@
+"""Шаги обработки update до и после обработчиков (вокруг unit of work)."""
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from telegram.ext import Application
+
+
+class UpdateHook:
+    """
+    Шаг конвейера BotApplication.process_update.
+
+    before() вызывается до unit of work и обработчиков: False - update
+    отбрасывается, следующие шаги и обработчики не вызываются. after()
+    вызывается после обработки для каждого шага, чей before() вернул True,
+    в обратном порядке; failed=True, если обработчик или шаг упал.
+    """
+
+    async def before(self, application: "Application", update: object) -> bool:
+        return True
+
+    async def after(self, application: "Application", update: object, failed: bool) -> None:
+        return None
@@ -0,0 +1,120 @@
+"""Параллельная обработка update с сохранением порядка внутри одного чата."""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def chat_key(update: object) -> Optional[int]:
+    """
+    Ключ сериализации update: effective_chat, а если его нет (inline query
+    и т.п.) - effective_user; None - update можно обрабатывать в любом порядке.
+    """
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return None
+
+
+class _ChatSlot:
+    """Lock чата и число update, которые его держат или ждут."""
+
+    __slots__ = ("lock", "refs")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.refs = 0
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update processor: разные чаты параллельно, один чат - строго по очереди.
+
+    Ключ сериализации - chat_key(): effective_chat или effective_user, поэтому
+    состояния ConversationHandler не перемешиваются.
+    Update сначала ждет свой чат и только потом занимает слот общего лимита
+    max_concurrent_updates - медленный чат не держит слоты других чатов.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._slots: dict[int, _ChatSlot] = {}
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.started = 0
+        self.processed = 0
+        self.total_chat_wait = 0.0
+        self.max_chat_wait = 0.0
+
+    async def process_update(self, update: object, coroutine: Awaitable) -> None:
+        key = chat_key(update)
+        queued_at = time.monotonic()
+        started = False
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+        async def run() -> None:
+            # Чат свободен и слот лимита получен: update больше не в очереди
+            nonlocal started
+            started = True
+            self.started += 1
+            self.waiting -= 1
+            wait = time.monotonic() - queued_at
+            self.total_chat_wait += wait
+            self.max_chat_wait = max(self.max_chat_wait, wait)
+            self.in_flight += 1
+            try:
+                await coroutine
+            finally:
+                self.in_flight -= 1
+                self.processed += 1
+
+        try:
+            if key is None:
+                await super().process_update(update, run())
+                return
+
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = _ChatSlot()
+            slot.refs += 1
+            try:
+                async with slot.lock:
+                    await super().process_update(update, run())
+            finally:
+                slot.refs -= 1
+                if slot.refs == 0:
+                    del self._slots[key]
+        finally:
+            if not started:
+                self.waiting -= 1
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        logger.info(f"Concurrent update processing: up to {self.max_concurrent_updates} updates")
+
+    async def shutdown(self) -> None:
+        logger.info(f"Update processor stopped: {self.stats()}")
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent_updates": self.max_concurrent_updates,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "active_chats": len(self._slots),
+            "processed": self.processed,
+            "avg_chat_wait_ms": round(self.total_chat_wait / self.started * 1000, 3) if self.started else 0.0,
+            "max_chat_wait_ms": round(self.max_chat_wait * 1000, 3),
+        }
@@ -0,0 +1,171 @@
+"""Ограниченная очередь webhook-обновлений с пулом обработчиков."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import Application
+
+from app.bot.update_processor import chat_key
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateQueue:
+    """
+    Очередь Update между webhook endpoint и Application.process_update.
+
+    Webhook кладет Update в очередь и сразу отвечает Telegram; N корутин-
+    обработчиков разбирают очередь. Очередь ограничена: если она полна
+    дольше enqueue_timeout, submit() возвращает False и webhook отвечает
+    ошибкой - Telegram доставит update повторно позже (backpressure).
+
+    Update одного чата обрабатываются по порядку одним обработчиком: если
+    чат уже занят, обработчик откладывает update в очередь чата и сразу
+    берет следующий - серия update одного чата занимает один обработчик,
+    а не все, и update других чатов не ждут за ней.
+    """
+
+    def __init__(self, maxsize: int = 1000, workers: int = 8, enqueue_timeout: float = 1.0):
+        """
+        Инициализация UpdateQueue.
+
+        Args:
+            maxsize: Максимальное количество ожидающих update
+            workers: Количество корутин-обработчиков
+            enqueue_timeout: Сколько секунд ждать места в полной очереди
+        """
+        self.maxsize = maxsize
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        # Ключ чата -> update, ждущие обработчика, который сейчас занят этим чатом
+        self._chats: dict[int, deque] = {}
+        self.busy = 0
+        self.deferred = 0
+        self.max_depth = 0
+        self.enqueued = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self, application: Application) -> None:
+        """Запустить обработчики в текущем event loop (идемпотентно)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self._worker(application), name=f"webhook-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Webhook update queue started: {self.workers} workers, maxsize={self.maxsize}")
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Дождаться обработки очереди (не дольше drain_timeout) и остановить обработчики."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Webhook queue stopped with {self.depth} unprocessed updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, update: Update) -> bool:
+        """
+        Поставить update в очередь.
+
+        Returns:
+            bool: False если очередь переполнена (update не принят)
+        """
+        item = (update, time.monotonic())
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(item), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                logger.warning(
+                    f"Webhook queue full ({self.maxsize}), rejecting update {update.update_id}"
+                )
+                return False
+
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    async def _worker(self, application: Application) -> None:
+        while True:
+            update, enqueued_at = await self._queue.get()
+            wait = time.monotonic() - enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            key = chat_key(update)
+            if key is not None:
+                pending = self._chats.get(key)
+                if pending is not None:
+                    # Чат занят другим обработчиком - он возьмет update следом, порядок сохраняется
+                    pending.append(update)
+                    self.deferred += 1
+                    continue
+                pending = self._chats[key] = deque()
+
+            self.busy += 1
+            try:
+                await self._process(application, update)
+                while key is not None and pending:
+                    self.deferred -= 1
+                    await self._process(application, pending.popleft())
+            finally:
+                if key is not None:
+                    del self._chats[key]
+                self.busy -= 1
+
+    async def _process(self, application: Application, update: Update) -> None:
+        try:
+            # Через update processor: общий лимит параллельности и порядок внутри чата
+            await application.update_processor.process_update(
+                update, application.process_update(update)
+            )
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+        finally:
+            self._queue.task_done()
+
+    def stats(self) -> dict:
+        dequeued = self.processed + self.failed + self.busy + self.deferred
+        return {
+            "running": self.is_running,
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            "depth": self.depth,
+            "deferred": self.deferred,
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait / dequeued * 1000, 3) if dequeued else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
@@ -0,0 +1,169 @@
+"""Определение режима бота (тестовый/продакшн) без сетевых запросов при импорте."""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_test_username(username: str) -> bool:
+    """Тестовый бот - username содержит "test" (без учета регистра)."""
+    return "test" in username.lower()
+
+
+class BotModeDetector:
+    """
+    Режим бота: явный IS_TEST_BOT или определение по username.
+
+    Username берется из getMe: бот получает его сам при initialize(),
+    остальные процессы - из файла-кеша, ключ которого - хеш токена
+    (смена токена не использует чужой результат). Устаревший кеш
+    обновляется фоновой задачей, а до ее завершения используется старое
+    значение. Если кеша нет, режим считается продакшн (IS_TEST_BOT=False).
+    Неудачный getMe повторяется не раньше чем через RETRY_DELAY секунд
+    (с удвоением до MAX_RETRY_DELAY), а не при каждом обращении к режиму.
+    """
+
+    RETRY_DELAY = 60.0
+    MAX_RETRY_DELAY = 3600.0
+
+    def __init__(
+        self,
+        token: str,
+        explicit: Optional[bool] = None,
+        cache_dir: Optional[str] = None,
+        ttl: float = 86400,
+        api_base_url: Optional[str] = None,
+    ):
+        """
+        Инициализация BotModeDetector.
+
+        Args:
+            token: Telegram bot token
+            explicit: Значение IS_TEST_BOT из настроек (None - определять автоматически)
+            cache_dir: Каталог файла-кеша (по умолчанию системный tmp)
+            ttl: Через сколько секунд кеш считается устаревшим
+            api_base_url: Адрес Bot API (по умолчанию https://api.telegram.org)
+        """
+        self.token = token
+        self.explicit = explicit
+        self.ttl = ttl
+        self.api_base_url = (api_base_url or "https://api.telegram.org").rstrip("/")
+        token_hash = hashlib.sha256(token.encode()).hexdigest()[:16]
+        self.cache_path = Path(cache_dir or tempfile.gettempdir()) / f"brashlens-bot-mode-{token_hash}.json"
+        self._value: Optional[bool] = None
+        self._checked_at = 0.0
+        self._retry_at = 0.0
+        self._retry_delay = self.RETRY_DELAY
+        self._loaded = False
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            data = json.loads(self.cache_path.read_text())
+            self._value = bool(data["is_test_bot"])
+            self._checked_at = float(data["checked_at"])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring corrupted bot mode cache {self.cache_path}: {e}")
+
+    def _store(self, username: str, is_test: bool) -> None:
+        payload = {"username": username, "is_test_bot": is_test, "checked_at": self._checked_at}
+        tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(payload))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to write bot mode cache {self.cache_path}: {e}")
+
+    def is_test_bot(self) -> bool:
+        """
+        Текущий режим бота (без сетевых запросов).
+
+        Returns:
+            bool: True если бот тестовый
+        """
+        if self.explicit is not None:
+            return self.explicit
+        if not self._loaded:
+            self._load()
+        now = time.time()
+        if now - self._checked_at > self.ttl and now >= self._retry_at:
+            self._schedule_refresh()
+        return bool(self._value)
+
+    def set_username(self, username: str) -> bool:
+        """
+        Запомнить режим по username бота (результат getMe).
+
+        Returns:
+            bool: Определенное значение IS_TEST_BOT
+        """
+        is_test = is_test_username(username)
+        changed = self._value != is_test
+        self._value = is_test
+        self._loaded = True
+        self._checked_at = time.time()
+        self._retry_at = 0.0
+        self._retry_delay = self.RETRY_DELAY
+        self._store(username, is_test)
+        if changed and self.explicit is None:
+            logger.info(f"Auto-detected bot mode: username={username}, IS_TEST_BOT={is_test}")
+        return is_test
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop (Alembic, синхронный код) - обойдемся кешем
+            return
+        self._refresh_task = loop.create_task(self.refresh())
+
+    async def refresh(self) -> Optional[bool]:
+        """
+        Запросить getMe и обновить кеш.
+
+        Returns:
+            Optional[bool]: Новое значение или None, если Telegram недоступен
+        """
+        import httpx
+
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(f"{self.api_base_url}/bot{self.token}/getMe")
+            data = response.json()
+            if response.status_code != 200 or not data.get("ok"):
+                logger.warning(f"Telegram getMe returned {response.status_code}, keeping bot mode cache")
+                self._postpone_refresh()
+                return None
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Failed to auto-detect bot mode: {e}, keeping bot mode cache")
+            self._postpone_refresh()
+            return None
+        return self.set_username(data["result"].get("username", ""))
+
+    def _postpone_refresh(self) -> None:
+        # Пока Telegram недоступен, getMe не повторяется при каждом is_test_bot()
+        self._retry_at = time.time() + self._retry_delay
+        self._retry_delay = min(self._retry_delay * 2, self.MAX_RETRY_DELAY)
+
+
+bot_mode = BotModeDetector(
+    settings.TELEGRAM_BOT_TOKEN,
+    explicit=settings.IS_TEST_BOT,
+    cache_dir=settings.BOT_MODE_CACHE_DIR,
+    ttl=settings.BOT_MODE_CACHE_TTL,
+    api_base_url=settings.TELEGRAM_API_BASE_URL,
+)
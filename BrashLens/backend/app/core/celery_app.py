@@ -1,8 +1,19 @@
 """Celery application configuration."""
 import logging
 from celery import Celery
+from kombu import Queue
 
+from app.core.celery_queues import (
+    DEFAULT_QUEUE,
+    PRIORITY_NORMAL,
+    PRIORITY_SEP,
+    PRIORITY_STEPS,
+    QUEUES,
+    TASK_ROUTES,
+)
 from app.core.config import settings
+# Сигналы метрик: время публикации (в публикующем процессе) и выполнения (в worker)
+import app.core.celery_metrics  # noqa: F401
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +23,8 @@ celery_app = Celery(
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
     include=["app.services.tasks"],
+    # Задачи могут быть coroutine: выполняются в постоянном event loop процесса worker
+    task_cls="app.core.celery_async:AsyncTask",
 )
 
 # Конфигурация Celery
@@ -32,6 +45,19 @@ celery_app.conf.update(
     # Логируем все ошибки подключения
     broker_connection_retry=True,
     broker_connection_max_retries=10,
+    # Очереди по срочности: тяжелые задачи (media, bulk) не задерживают interactive и
+    # notifications - каждую очередь обслуживает свой worker (см. docker-compose)
+    task_queues=[Queue(name, routing_key=name) for name in QUEUES],
+    task_default_queue=DEFAULT_QUEUE,
+    task_default_routing_key=DEFAULT_QUEUE,
+    task_routes=TASK_ROUTES,
+    # Приоритеты внутри очереди (Redis): priority_steps/sep задают списки по ступеням
+    # (см. celery_queues) - apply_async(priority=PRIORITY_HIGH) обгоняет остальные
+    task_default_priority=PRIORITY_NORMAL,
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_SEP,
+    },
 )
 
 # Логируем конфигурацию брокера для отладки
@@ -0,0 +1,184 @@
+"""Выполнение async задач Celery в постоянном event loop процесса worker."""
+import asyncio
+import contextvars
+import inspect
+import logging
+import os
+import sys
+import threading
+from typing import Any, Coroutine, Optional
+
+from celery import Task
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_TIMEOUT = 10.0
+
+# Запрос Celery текущей задачи внутри loop: request_stack привязан к потоку,
+# а coroutine выполняются в потоке loop
+_current_request: contextvars.ContextVar = contextvars.ContextVar("celery_request")
+
+
+class WorkerLoop:
+    """
+    Один event loop на процесс worker в отдельном потоке.
+
+    Engine SQLAlchemy и Redis pool привязаны к loop, в котором открыты их
+    соединения, - поэтому loop живет, пока жив процесс, а не один вызов
+    (как asyncio.run). Потоки, исполняющие задачи (prefork, threads, solo),
+    передают coroutine в loop и ждут результат: при --pool threads
+    несколько I/O-задач выполняются в одном loop одновременно.
+
+    После fork (prefork) loop создается заново: потоки не наследуются,
+    а соединения, открытые родителем, сбрасываются без закрытия.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                _reset_inherited_clients()
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="celery-async-loop", daemon=True
+                )
+                self._thread.start()
+                logger.info(f"Async task loop started in worker process {self._pid}")
+            return self._loop
+
+    def run(self, coro: Coroutine, request: Any = None) -> Any:
+        """
+        Выполнить coroutine в loop процесса и дождаться результата.
+
+        Если ожидание прервано в потоке задачи (SoftTimeLimitExceeded,
+        KeyboardInterrupt), coroutine отменяется в loop, а не продолжает
+        работать после того, как задача уже завершилась.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(_with_request(coro, request), loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        """Закрыть соединения (engine, Redis) и остановить loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = None
+        try:
+            asyncio.run_coroutine_threadsafe(_close_clients(), loop).result(timeout=SHUTDOWN_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Failed to close async clients on worker shutdown: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=SHUTDOWN_TIMEOUT)
+        if not thread.is_alive():
+            loop.close()
+        logger.info(f"Async task loop stopped in worker process {os.getpid()}")
+
+
+async def _with_request(coro: Coroutine, request: Any) -> Any:
+    # Каждая coroutine выполняется в своем asyncio.Task - значение видно только ей
+    _current_request.set(request)
+    if "app.core.database" in sys.modules:
+        # Задачи читают через RoutingSession: без монитора отставания реплики не используются
+        from app.core.database import replica_router
+
+        replica_router.ensure_monitor()
+    return await coro
+
+
+def _reset_inherited_clients() -> None:
+    """Забыть соединения, унаследованные от родителя или другого loop (без I/O)."""
+    if "app.core.database" in sys.modules:
+        from app.core.database import engine, replica_router
+
+        for async_engine in (engine, *replica_router.engines):
+            async_engine.sync_engine.dispose(close=False)
+        replica_router.reset()
+    if "app.core.redis" in sys.modules:
+        import app.core.redis as redis_module
+
+        redis_module.redis_client = None
+        redis_module.redis_pool = None
+        redis_module.result_backend_client = None
+        redis_module.broker_client = None
+
+
+async def _close_clients() -> None:
+    # Закрываем только то, что процесс действительно импортировал
+    if "app.services.near_cache" in sys.modules:
+        from app.services.near_cache import invalidation_bus
+
+        await invalidation_bus.stop()
+    if "app.core.database" in sys.modules:
+        from app.core.database import engine, replica_router
+
+        await replica_router.stop()
+        for async_engine in (engine, *replica_router.engines):
+            await async_engine.dispose()
+    if "app.core.redis" in sys.modules:
+        from app.core.redis import close_redis
+
+        await close_redis()
+
+
+worker_loop = WorkerLoop()
+
+
+class AsyncTask(Task):
+    """
+    Базовый класс задач celery_app: задача может быть coroutine.
+
+        @celery_app.task(name="app.services.tasks.sync_user")
+        async def sync_user(user_id: int) -> dict:
+            async with AsyncSessionLocal() as session:
+                ...
+
+    Coroutine выполняется в WorkerLoop процесса; синхронные задачи
+    выполняются как обычно. self.request (bind=True) доступен и внутри
+    coroutine. Задача, поставленная через submit_idempotent, выполняется
+    не больше одного раза на ключ идемпотентности.
+    """
+
+    def __call__(self, *args, **kwargs):
+        redis_key = self.request.get("idempotency_key")
+        if redis_key:
+            from app.services.task_idempotency import run_once
+
+            return run_once(self, redis_key, lambda: self._execute(args, kwargs))
+        return self._execute(args, kwargs)
+
+    def _execute(self, args: tuple, kwargs: dict) -> Any:
+        # Tracer Celery уже положил request в request_stack - вызываем run напрямую
+        result = self.run(*args, **kwargs)
+        if inspect.isawaitable(result):
+            return worker_loop.run(result, self.request)
+        return result
+
+    @property
+    def request(self):
+        request = _current_request.get(None)
+        return request if request is not None else self._get_request()
+
+
+@worker_process_shutdown.connect
+def _stop_child_loop(**kwargs) -> None:
+    # Дочерний процесс prefork завершается (в т.ч. по worker_max_tasks_per_child)
+    worker_loop.stop()
+
+
+@worker_shutdown.connect
+def _stop_main_loop(**kwargs) -> None:
+    # Основной процесс worker (--pool threads/solo выполняет задачи в нем)
+    worker_loop.stop()
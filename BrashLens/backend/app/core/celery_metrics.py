@@ -0,0 +1,76 @@
+"""Метрики задач Celery из сигналов: ожидание в очереди и время выполнения."""
+import logging
+import time
+from typing import Optional
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import (
+    CELERY_RUNTIME_KEY,
+    CELERY_WAIT_KEY,
+    TASK_BUCKETS,
+    observe_to_redis_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+# Заголовок сообщения: время публикации (time.time() публикующего процесса)
+PUBLISHED_AT_HEADER = "published_at"
+
+# task_id -> (perf_counter начала, ожидание в очереди или None)
+_started: dict[str, tuple[float, Optional[float]]] = {}
+_redis: Optional[Redis] = None
+
+
+def _client() -> Redis:
+    # Синхронный client: сигналы выполняются в потоке задачи; pool redis-py
+    # сам пересоздает соединения после fork
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.REDIS_URL, decode_responses=True, socket_timeout=1)
+    return _redis
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers: Optional[dict] = None, **kwargs) -> None:
+    if settings.METRICS_ENABLED and headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def _task_started(task_id: str = None, task=None, **kwargs) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+    published_at = task.request.get(PUBLISHED_AT_HEADER)
+    wait = max(time.time() - float(published_at), 0.0) if published_at else None
+    _started[task_id] = (time.perf_counter(), wait)
+
+
+@task_postrun.connect
+def _task_finished(task_id: str = None, task=None, state: Optional[str] = None, **kwargs) -> None:
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+    started_at, wait = started
+    runtime = time.perf_counter() - started_at
+    queue = (task.request.delivery_info or {}).get("routing_key") or "unknown"
+
+    # Одна пачка команд на задачу: гистограммы всех worker складываются в Redis
+    pipe = _client().pipeline(transaction=False)
+    bucket, total, count = observe_to_redis_fields((task.name, queue, state or "UNKNOWN"), runtime, TASK_BUCKETS)
+    pipe.hincrby(CELERY_RUNTIME_KEY, bucket, 1)
+    pipe.hincrbyfloat(CELERY_RUNTIME_KEY, total, runtime)
+    pipe.hincrby(CELERY_RUNTIME_KEY, count, 1)
+    if wait is not None:
+        bucket, total, count = observe_to_redis_fields((task.name, queue), wait, TASK_BUCKETS)
+        pipe.hincrby(CELERY_WAIT_KEY, bucket, 1)
+        pipe.hincrbyfloat(CELERY_WAIT_KEY, total, wait)
+        pipe.hincrby(CELERY_WAIT_KEY, count, 1)
+    try:
+        pipe.execute()
+    except RedisError as e:
+        # Метрики не должны ронять задачи
+        logger.warning(f"Failed to record metrics of task {task.name}[{task_id}]: {e}")
@@ -0,0 +1,71 @@
+"""Топология очередей Celery: имена, маршруты задач и приоритеты (без импорта Celery)."""
+from app.core.redis import get_broker_client
+
+# Очереди в порядке срочности; у каждой свой сервис worker в docker-compose
+QUEUE_INTERACTIVE = "interactive"  # Ответ нужен пользователю сейчас (Mini App, бот)
+QUEUE_NOTIFICATIONS = "notifications"  # Уведомления о бронированиях, рассылки в Telegram
+QUEUE_MEDIA = "media"  # Обработка изображений: долго и нагружает CPU
+QUEUE_BULK = "bulk"  # Фоновые пакетные задачи без срока
+QUEUES = (QUEUE_INTERACTIVE, QUEUE_NOTIFICATIONS, QUEUE_MEDIA, QUEUE_BULK)
+
+DEFAULT_QUEUE = QUEUE_INTERACTIVE
+
+# Маршруты по имени задачи (glob); задачи без маршрута идут в DEFAULT_QUEUE
+TASK_ROUTES = {
+    "app.services.tasks.add_numbers": {"queue": QUEUE_INTERACTIVE},
+    "app.services.tasks.test_task": {"queue": QUEUE_BULK},
+    "app.services.notifications.*": {"queue": QUEUE_NOTIFICATIONS},
+    "app.services.media.*": {"queue": QUEUE_MEDIA},
+}
+
+# Приоритет внутри очереди (Redis broker): 0 - самый срочный.
+# Redis хранит по списку на ступень, задача берется из первой непустой.
+PRIORITY_STEPS = [0, 3, 6, 9]
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 6
+
+# Разделитель имени очереди и ступени приоритета в ключах Redis ("bulk:6")
+PRIORITY_SEP = ":"
+
+
+def queue_keys(queue: str) -> dict[int, str]:
+    """
+    Ключи списков Redis, в которых kombu хранит сообщения очереди.
+
+    Returns:
+        dict: Ступень приоритета -> ключ (ступень 0 - имя очереди без суффикса)
+    """
+    return {step: f"{queue}{PRIORITY_SEP}{step}" if step else queue for step in PRIORITY_STEPS}
+
+
+async def get_queue_stats() -> dict:
+    """
+    Очередь задач в брокере по каждой очереди (чтение async Redis, без Celery).
+
+    Returns:
+        dict: queues (backlog всего и по ступеням приоритета), total_backlog,
+              reserved (получено worker, но еще не подтверждено)
+    """
+    redis = get_broker_client()
+    pipe = redis.pipeline(transaction=False)
+    for queue in QUEUES:
+        for key in queue_keys(queue).values():
+            pipe.llen(key)
+    # kombu хранит выданные worker, но не подтвержденные сообщения в hash "unacked"
+    pipe.hlen("unacked")
+    lengths = await pipe.execute()
+
+    queues = []
+    position = 0
+    for queue in QUEUES:
+        by_priority = {}
+        for step in PRIORITY_STEPS:
+            by_priority[str(step)] = lengths[position]
+            position += 1
+        queues.append({"queue": queue, "backlog": sum(by_priority.values()), "by_priority": by_priority})
+    return {
+        "queues": queues,
+        "total_backlog": sum(queue["backlog"] for queue in queues),
+        "reserved": lengths[position],
+    }
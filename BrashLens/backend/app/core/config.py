@@ -5,61 +5,6 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def _auto_detect_test_bot(token: str) -> bool:
-    """
-    Автоматически определяет тестовый бот по username через Telegram API.
-    
-    Логика:
-    - Если username содержит "test" (case-insensitive) - тестовый бот
-    - Иначе - продакшн бот
-    
-    Args:
-        token: Telegram bot token
-        
-    Returns:
-        bool: True если тестовый бот, False если продакшн
-    """
-    try:
-        import httpx
-        import sys
-        
-        # Получаем информацию о боте через getMe API
-        response = httpx.get(
-            f"https://api.telegram.org/bot{token}/getMe",
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("ok") and "result" in data:
-                username = data["result"].get("username", "").lower()
-                is_test = "test" in username
-                bot_username = data["result"].get("username", "unknown")
-                
-                # Логируем в stderr для гарантированного вывода
-                print(
-                    f"[AUTO-DETECT] Bot username: {bot_username}, IS_TEST_BOT={is_test}",
-                    file=sys.stderr
-                )
-                logger.info(
-                    f"Auto-detected bot mode: username={bot_username}, IS_TEST_BOT={is_test}"
-                )
-                return is_test
-            else:
-                print("[AUTO-DETECT] Failed to get bot info from Telegram API, using default IS_TEST_BOT=False", file=sys.stderr)
-                logger.warning("Failed to get bot info from Telegram API, using default IS_TEST_BOT=False")
-                return False
-        else:
-            print(f"[AUTO-DETECT] Telegram API returned {response.status_code}, using default IS_TEST_BOT=False", file=sys.stderr)
-            logger.warning(f"Telegram API returned {response.status_code}, using default IS_TEST_BOT=False")
-            return False
-            
-    except Exception as e:
-        print(f"[AUTO-DETECT] Failed to auto-detect bot mode: {e}, using default IS_TEST_BOT=False", file=sys.stderr)
-        logger.warning(f"Failed to auto-detect bot mode: {e}, using default IS_TEST_BOT=False")
-        return False
-
-
 class Settings(BaseSettings):
     """Настройки приложения из переменных окружения."""
 
@@ -70,6 +15,63 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_TOKEN: str
     SECRET_KEY: str
     WEBHOOK_URL: str | None = Field(default=None, description="Webhook URL для Telegram бота (опционально, для production)")
+    TELEGRAM_API_BASE_URL: str | None = Field(default=None, description="Адрес Bot API (по умолчанию https://api.telegram.org); для нагрузочных тестов - локальная заглушка loadtest.fake_bot_api")
+    WEBHOOK_API_ENABLED: bool = Field(default=False, description="Принимать webhook Telegram в FastAPI (POST /api/v1/webhook)")
+    WEBHOOK_FAST_ACK: bool = Field(default=True, description="Отвечать Telegram сразу, обрабатывая update в фоновой очереди")
+    WEBHOOK_QUEUE_SIZE: int = Field(default=1000, description="Максимум ожидающих update в очереди webhook")
+    WEBHOOK_WORKERS: int = Field(default=8, description="Количество корутин-обработчиков очереди webhook")
+    WEBHOOK_ENQUEUE_TIMEOUT: float = Field(default=1.0, description="Сколько секунд ждать места в полной очереди перед отказом (Telegram повторит доставку)")
+    UPDATE_DEDUP_ENABLED: bool = Field(default=True, description="Пропускать повторно доставленные Telegram update (отметки update_id в Redis)")
+    UPDATE_DEDUP_TTL: int = Field(default=86400, description="Сколько секунд помнить update_id (Telegram хранит недоставленные update до суток)")
+    UPDATE_DEDUP_PROCESSING_TTL: int = Field(default=300, description="Сколько секунд update_id занят на время обработки (после сбоя процесса повтор будет обработан)")
+    BOT_CONCURRENT_UPDATES: int = Field(default=16, description="Сколько update бот обрабатывает одновременно (update одного чата - всегда по очереди)")
+    BOT_PERSISTENCE_ENABLED: bool = Field(default=True, description="Хранить user_data и состояния разговоров бота в Redis (нужно для нескольких реплик)")
+    BOT_PERSISTENCE_UPDATE_INTERVAL: float = Field(default=1.0, description="Период фоновой записи изменений persistence в Redis, секунд (изменения update передаются и сразу после его обработки)")
+    
+    # Лимиты исходящих запросов к Bot API
+    BOT_RATE_LIMIT_PER_SECOND: float = Field(default=30.0, description="Общий лимит запросов бота в секунду")
+    BOT_RATE_LIMIT_CHAT_PER_SECOND: float = Field(default=1.0, description="Сообщений в секунду в один личный чат")
+    BOT_RATE_LIMIT_GROUP_PER_MINUTE: float = Field(default=20.0, description="Сообщений в минуту в одну группу или канал")
+    BOT_RATE_LIMIT_MAX_RETRIES: int = Field(default=3, description="Повторов запроса после RetryAfter (flood control)")
+    
+    # Защита от флуда входящими update (первый шаг обработки, до дедупликации, обработчиков и БД)
+    BOT_FLOOD_GUARD_ENABLED: bool = Field(default=True, description="Отбрасывать всплески update от одного пользователя или чата")
+    BOT_FLOOD_USER_RATE: float = Field(default=1.0, description="Update в секунду на пользователя")
+    BOT_FLOOD_USER_BURST: float = Field(default=5, description="Всплеск update пользователя без ограничения")
+    BOT_FLOOD_CHAT_RATE: float = Field(default=5.0, description="Update в секунду на групповой чат")
+    BOT_FLOOD_CHAT_BURST: float = Field(default=20, description="Всплеск update группового чата без ограничения")
+    BOT_FLOOD_COALESCE_SECONDS: float = Field(default=2.0, description="Окно склейки одинаковых update пользователя (повторный /start, двойной клик)")
+    BOT_FLOOD_PENALTY_SECONDS: float = Field(default=30.0, description="Блокировка пользователя, продолжающего флуд после исчерпания лимита")
+    BOT_FLOOD_REDIS_SYNC: bool = Field(default=False, description="Делиться блокировками флудеров между репликами бота через Redis")
+    
+    # Метрики Prometheus (GET /metrics)
+    METRICS_ENABLED: bool = Field(default=True, description="Собирать метрики HTTP, пулов и Celery и отдавать их на /metrics")
+    
+    # Push-уведомления о статусе Celery задач (SSE)
+    TASK_EVENTS_TIMEOUT: float = Field(default=300.0, description="Максимальная длительность SSE-подписки на статус задачи, секунд")
+    TASK_EVENTS_KEEPALIVE: float = Field(default=15.0, description="Интервал keepalive-комментариев SSE без смены статуса, секунд")
+    
+    TASK_IDEMPOTENCY_TTL: int = Field(default=86400, description="Сколько секунд помнить ключ идемпотентности задачи и ее результат")
+    
+    # Read-реплики PostgreSQL (чтения UserService и списков)
+    DATABASE_REPLICA_URLS: list[str] = Field(
+        default_factory=list,
+        description="URL read-реплик. Пусто - все запросы идут в DATABASE_URL"
+    )
+    DB_REPLICA_MAX_LAG_SECONDS: float = Field(default=5.0, description="Реплика с большим отставанием исключается из чтения")
+    DB_REPLICA_CHECK_INTERVAL: float = Field(default=5.0, description="Период проверки отставания реплик, секунд")
+    
+    # Пул соединений PostgreSQL
+    DB_POOL_SIZE: int = Field(default=5, description="Постоянных соединений в пуле")
+    DB_MAX_OVERFLOW: int = Field(default=10, description="Дополнительных соединений сверх pool size")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, description="Ожидание свободного соединения, секунд")
+    DB_POOL_RECYCLE: int = Field(default=1800, description="Пересоздавать соединения старше N секунд (-1 - никогда)")
+    DB_POOL_PRE_PING: bool = Field(default=True, description="Проверять соединение перед выдачей из пула")
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, description="Размер кеша prepared statements asyncpg на соединение")
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = Field(
+        default=False,
+        description="Подключение через PgBouncer в режиме transaction pooling (отключает кеш prepared statements)"
+    )
     
     # CORS настройки
     ALLOWED_ORIGINS: list[str] = Field(
@@ -93,12 +95,34 @@ class Settings(BaseSettings):
     RATE_LIMIT_ENABLED: bool = Field(default=True, description="Включить rate limiting")
     RATE_LIMIT_PER_MINUTE: int = Field(default=60, description="Лимит запросов в минуту")
     
+    # Кеш пользователей (read-through поверх Redis)
+    USER_CACHE_ENABLED: bool = Field(default=True, description="Кешировать пользователей в Redis")
+    USER_CACHE_TTL: int = Field(default=300, description="TTL записи кеша пользователей в секундах")
+    
+    # Массовый импорт пользователей
+    USER_BULK_BATCH_SIZE: int = Field(default=5000, description="Размер пакета COPY при массовом импорте")
+    USER_BULK_MAX_REPORTED_ERRORS: int = Field(default=1000, description="Максимум строк с ошибками в ответе импорта")
+    USER_BULK_MAX_LINE_BYTES: int = Field(default=65536, description="Максимальная длина одной строки NDJSON при импорте, байт")
+    
+    # Near-cache в памяти процесса перед Redis (инвалидация через Redis pub/sub)
+    NEAR_CACHE_ENABLED: bool = Field(default=True, description="Включить in-process near-cache")
+    NEAR_CACHE_MAX_ENTRIES: int = Field(default=10_000, description="Максимум записей near-cache")
+    NEAR_CACHE_MAX_BYTES: int = Field(default=16 * 1024 * 1024, description="Максимальный размер near-cache")
+    NEAR_CACHE_TTL: float = Field(default=30.0, description="TTL записи near-cache в секундах (страховка от потерянной инвалидации)")
+    
+    # Склейка конкурентных lookup-ов пользователей по telegram_id
+    USER_LOADER_ENABLED: bool = Field(default=True, description="Собирать get_by_telegram_id в пакетные запросы WHERE telegram_id = ANY(...)")
+    USER_LOADER_WINDOW_MS: float = Field(default=2.0, description="Окно сбора lookup-ов в миллисекундах")
+    USER_LOADER_MAX_BATCH: int = Field(default=500, description="Максимальный размер пачки lookup-ов")
+    
     # Test bot access control
-    # Если IS_TEST_BOT не указан в .env, автоматически определяется по username бота
+    # Если IS_TEST_BOT не указан в .env, определяется по username бота (app.core.bot_mode)
     IS_TEST_BOT: bool | None = Field(
         default=None,
         description="Флаг тестового бота. Если None - определяется автоматически по username. Если True - проверяется доступ через TEST_BOT_ALLOWED_USER_ID"
     )
+    BOT_MODE_CACHE_DIR: str | None = Field(default=None, description="Каталог кеша результата getMe (по умолчанию системный tmp)")
+    BOT_MODE_CACHE_TTL: float = Field(default=86400, description="Через сколько секунд кеш getMe обновляется в фоне")
     TEST_BOT_ALLOWED_USER_ID: int | None = Field(
         default=None,
         description="Telegram ID пользователя, которому разрешено использовать тестового бота (только если IS_TEST_BOT=True)"
@@ -110,17 +134,6 @@ class Settings(BaseSettings):
         case_sensitive=True,
         extra="ignore",  # Игнорируем дополнительные переменные из .env
     )
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        
-        # Автоматически определяем IS_TEST_BOT если не указан явно
-        if self.IS_TEST_BOT is None:
-            import sys
-            print("[AUTO-DETECT] IS_TEST_BOT not set, auto-detecting from bot username...", file=sys.stderr)
-            self.IS_TEST_BOT = _auto_detect_test_bot(self.TELEGRAM_BOT_TOKEN)
-            print(f"[AUTO-DETECT] Final IS_TEST_BOT={self.IS_TEST_BOT}", file=sys.stderr)
-            logger.info(f"Auto-detected IS_TEST_BOT={self.IS_TEST_BOT} from bot username")
 
 
 settings = Settings()
@@ -1,30 +1,298 @@
-from typing import AsyncGenerator
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Optional
+from uuid import uuid4
 
+from sqlalchemy import Select, event, exc, text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
-# Преобразуем postgresql:// в postgresql+asyncpg:// для async драйвера
-database_url = settings.DATABASE_URL
-if database_url.startswith("postgresql://"):
-    database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+logger = logging.getLogger(__name__)
+
+
+def _async_url(url: str) -> str:
+    """Преобразуем postgresql:// в postgresql+asyncpg:// для async драйвера."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+database_url = _async_url(settings.DATABASE_URL)
+
+
+class PoolMetrics:
+    """Накопительные метрики выдачи соединений из пула (в пределах процесса)."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_acquire_seconds = 0.0
+        self.max_acquire_seconds = 0.0
+        self.queries = 0
+
+    def observe(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.total_acquire_seconds += seconds
+        if seconds > self.max_acquire_seconds:
+            self.max_acquire_seconds = seconds
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool, замеряющий время получения соединения.
+
+    Время включает ожидание свободного соединения, создание нового
+    (overflow) и pre-ping - то есть всё, что запрос ждет до первого SQL.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.observe(time.perf_counter() - started)
+
+
+def _connect_args() -> dict:
+    """Параметры asyncpg: кеш prepared statements или режим PgBouncer."""
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # PgBouncer (pool_mode=transaction) не сохраняет prepared statements
+        # между транзакциями: отключаем оба кеша и делаем имена уникальными
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def _count_query(*args) -> None:
+    pool_metrics.queries += 1
+
+
+def _create_engine(url: str, poolclass=AsyncAdaptedQueuePool) -> AsyncEngine:
+    """Создать async engine с настройками пула из Settings."""
+    async_engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(),
+    )
+    # Счетчик выполненных SQL-запросов (primary и реплики) - для оценки запросов на update/запрос
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count_query)
+    return async_engine
+
+
+# Создание async engine (primary: все записи)
+engine = _create_engine(database_url, poolclass=InstrumentedAsyncPool)
+
+
+def get_pool_stats() -> dict:
+    """
+    Текущее состояние пула соединений.
+
+    Returns:
+        dict: Размер, занятые/свободные соединения, overflow и метрики ожидания
+    """
+    pool = engine.pool
+    checkouts = pool_metrics.checkouts
+    return {
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "timeouts": pool_metrics.timeouts,
+        "avg_acquire_ms": round(pool_metrics.total_acquire_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+        "max_acquire_ms": round(pool_metrics.max_acquire_seconds * 1000, 3),
+        "queries": pool_metrics.queries,
+    }
+
+
+class ReplicaRouter:
+    """
+    Выбор read-реплики: round-robin по здоровым репликам.
+
+    Фоновый монитор периодически измеряет отставание каждой реплики;
+    реплика, которая недоступна или отстает больше DB_REPLICA_MAX_LAG_SECONDS,
+    исключается до следующей успешной проверки. Реплика без свежей проверки
+    (монитор в процессе не запущен или остановился) тоже не используется.
+    Если здоровых реплик нет, чтение идет в primary.
+    """
+
+    LAG_SQL = text("""
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """)
+    # Результат проверки действителен столько интервалов проверки
+    STALE_AFTER_CHECKS = 3
+
+    def __init__(self, urls: list[str]):
+        self.engines: list[AsyncEngine] = [_create_engine(_async_url(url)) for url in urls]
+        self.healthy: list[bool] = [False] * len(self.engines)
+        self.lag: list[Optional[float]] = [None] * len(self.engines)
+        # time.monotonic() последней проверки каждой реплики
+        self.checked_at: list[Optional[float]] = [None] * len(self.engines)
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _is_usable(self, index: int) -> bool:
+        checked_at = self.checked_at[index]
+        return (
+            self.healthy[index]
+            and checked_at is not None
+            and time.monotonic() - checked_at
+            <= settings.DB_REPLICA_CHECK_INTERVAL * self.STALE_AFTER_CHECKS
+        )
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Следующая здоровая реплика со свежей проверкой или None (читать из primary)."""
+        for _ in range(len(self.engines)):
+            index = self._next % len(self.engines)
+            self._next += 1
+            if self._is_usable(index):
+                return self.engines[index]
+        return None
+
+    def ensure_monitor(self) -> None:
+        """Запустить фоновую проверку отставания в текущем event loop (идемпотентно)."""
+        if not self.engines:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._task = loop.create_task(self._monitor(), name="db-replica-monitor")
+
+    def reset(self) -> None:
+        """Забыть монитор и результаты проверок, унаследованные от родителя после fork."""
+        self._task = None
+        self._loop = None
+        self.healthy = [False] * len(self.engines)
+        self.lag = [None] * len(self.engines)
+        self.checked_at = [None] * len(self.engines)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _measure(self, replica: AsyncEngine) -> float:
+        async with replica.connect() as conn:
+            return float((await conn.execute(self.LAG_SQL)).scalar() or 0)
+
+    async def check(self) -> None:
+        """Один проход проверки всех реплик."""
+        for index, replica in enumerate(self.engines):
+            try:
+                lag = await self._measure(replica)
+                self.lag[index] = lag
+                healthy = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            except Exception as e:
+                logger.warning(f"Replica {self._name(index)} check failed: {e}")
+                self.lag[index] = None
+                healthy = False
+
+            if healthy != self.healthy[index]:
+                logger.warning(
+                    f"Replica {self._name(index)} is now {'healthy' if healthy else 'excluded'} "
+                    f"(lag={self.lag[index]})"
+                )
+            self.healthy[index] = healthy
+            self.checked_at[index] = time.monotonic()
+
+    async def _monitor(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(settings.DB_REPLICA_CHECK_INTERVAL)
+
+    def _name(self, index: int) -> str:
+        return self.engines[index].url.render_as_string(hide_password=True)
+
+    def stats(self) -> list[dict]:
+        return [
+            {"url": self._name(i), "healthy": self._is_usable(i), "lag_seconds": self.lag[i]}
+            for i in range(len(self.engines))
+        ]
+
+
+replica_router = ReplicaRouter(settings.DATABASE_REPLICA_URLS)
+
+
+class RoutingSession(Session):
+    """
+    Session, отправляющая чтения на реплики.
+
+    На реплику идут только ORM/Core SELECT без FOR UPDATE. Всё остальное
+    (INSERT/UPDATE/DELETE, text(), flush, session.connection()) - в primary.
+    После первой записи сессия закрепляется за primary до конца жизни:
+    так чтение сразу после create_user видит только что вставленную строку.
+    Реплика выбирается один раз на сессию - все чтения сессии видят один снимок.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("use_primary"):
+            return engine.sync_engine
+
+        is_read = (
+            isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and not self._flushing
+        )
+        if not is_read:
+            self.info["use_primary"] = True
+            return engine.sync_engine
+
+        if "replica" not in self.info:
+            self.info["replica"] = replica_router.choose()
+        replica = self.info["replica"]
+        return replica.sync_engine if replica is not None else engine.sync_engine
+
+
+def use_primary(session: AsyncSession) -> AsyncSession:
+    """Принудительно читать из primary в этой сессии (read-your-own-writes)."""
+    session.sync_session.info["use_primary"] = True
+    return session
 
-# Создание async engine
-engine = create_async_engine(
-    database_url,
-    echo=False,
-    future=True,
-)
 
 # Создание session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    # Без реплик - обычная Session, без накладных расходов на маршрутизацию
+    sync_session_class=RoutingSession if replica_router.engines else Session,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
@@ -0,0 +1,306 @@
+"""Метрики в текстовом формате Prometheus: HTTP, пул PostgreSQL, Redis, Celery."""
+import logging
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Задачи Celery длиннее HTTP-запросов: до task_time_limit (30 минут)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 1800.0)
+
+# Гистограммы Celery собираются из всех процессов worker в hash Redis
+# (поля "<метки через |>|b<i>", "...|sum", "...|count") и отдаются API
+CELERY_RUNTIME_KEY = "metrics:v1:celery_task_runtime"
+CELERY_WAIT_KEY = "metrics:v1:celery_task_queue_wait"
+CELERY_RUNTIME_LABELS = ("task", "queue", "state")
+CELERY_WAIT_LABELS = ("task", "queue")
+LABEL_SEP = "|"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """
+    Гистограмма в памяти процесса.
+
+    observe() - bisect и два сложения, без блокировок: API однопоточный
+    (event loop), поэтому гистограмму можно держать включенной постоянно.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Метки -> [счетчики по bucket (не накопительные) + +Inf, сумма, количество]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        return render_histogram(
+            self.name,
+            self.documentation,
+            self.labelnames,
+            self.buckets,
+            {labels: tuple(series) for labels, series in self._series.items()},
+        )
+
+
+def render_histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...],
+    buckets: tuple[float, ...],
+    series: dict[tuple[str, ...], tuple[list[int], float, int]],
+) -> list[str]:
+    """Строки гистограммы: накопительные bucket, _sum и _count для каждого набора меток."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} histogram"]
+    for labels, (counts, total, count) in sorted(series.items()):
+        cumulative = 0
+        for bound, bucket_count in zip((*buckets, float("inf")), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else _number(bound)
+            bucket_labels = _labels(labelnames, labels, f'le="{le}"')
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labelnames, labels)} {_number(total)}")
+        lines.append(f"{name}_count{_labels(labelnames, labels)} {count}")
+    return lines
+
+
+def render_gauge(
+    name: str,
+    documentation: str,
+    samples: dict[tuple, float],
+    labelnames: tuple[str, ...] = (),
+    kind: str = "gauge",
+) -> list[str]:
+    """Строки gauge (или counter) с одним значением на набор меток."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+    return lines
+
+
+http_request_duration = Histogram(
+    "brashlens_http_request_duration_seconds",
+    "HTTP time to response start (first byte for streaming responses) by route template",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: время до ответа каждого HTTP-запроса по шаблону маршрута.
+
+    Время измеряется до http.response.start (статус и заголовки): для
+    потоковых ответов (SSE /tasks/events/{task_id}, /users/export) это время
+    до первого байта, а не время жизни соединения. Запросы, упавшие до
+    ответа, учитываются со статусом 500 в момент ошибки.
+
+    Метка route - шаблон пути (/api/v1/tasks/status/{task_id}), а не сам путь:
+    число рядов не растет с числом id. Запросы, не совпавшие ни с одним
+    маршрутом (сканеры, 404), собираются под route="<unmatched>". Сам
+    /metrics не учитывается.
+    """
+
+    EXCLUDED_ROUTES = frozenset({"/metrics"})
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status_code: int) -> None:
+            nonlocal observed
+            observed = True
+            # Router FastAPI кладет найденный маршрут в тот же scope
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            if route in self.EXCLUDED_ROUTES:
+                return
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], route, str(status_code))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and not observed:
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not observed:
+                observe(500)
+
+
+def _db_pool_metrics() -> list[str]:
+    from app.core.database import get_pool_stats, pool_metrics
+
+    stats = get_pool_stats()
+    lines = render_gauge(
+        "brashlens_db_pool_connections",
+        "PostgreSQL pool connections by state",
+        {("in_use",): stats["in_use"], ("idle",): stats["idle"], ("overflow",): stats["overflow"]},
+        ("state",),
+    )
+    lines += render_gauge(
+        "brashlens_db_pool_capacity",
+        "Maximum PostgreSQL connections (pool size + max overflow)",
+        {(): stats["size"] + stats["max_overflow"]},
+    )
+    lines += render_gauge(
+        "brashlens_db_pool_checkouts_total", "Connections handed out by the pool", {(): stats["checkouts"]}, kind="counter"
+    )
+    lines += render_gauge(
+        "brashlens_db_pool_timeouts_total", "Pool checkouts that timed out", {(): stats["timeouts"]}, kind="counter"
+    )
+    lines += render_gauge(
+        "brashlens_db_pool_acquire_seconds_total",
+        "Total time spent waiting for a pool connection",
+        {(): pool_metrics.total_acquire_seconds},
+        kind="counter",
+    )
+    lines += render_gauge(
+        "brashlens_db_queries_total", "SQL statements executed", {(): stats["queries"]}, kind="counter"
+    )
+    return lines
+
+
+def _redis_pool_metrics() -> list[str]:
+    import app.core.redis as redis_module
+
+    pool = redis_module.redis_pool
+    if pool is None:
+        return []
+    # Публичного API у redis.asyncio.ConnectionPool нет - читаем его списки соединений
+    return render_gauge(
+        "brashlens_redis_pool_connections",
+        "Redis pool connections by state",
+        {
+            ("in_use",): len(pool._in_use_connections),
+            ("idle",): len(pool._available_connections),
+            ("max",): pool.max_connections,
+        },
+        ("state",),
+    )
+
+
+def _parse_redis_histogram(
+    fields: dict[str, str], bucket_count: int
+) -> dict[tuple[str, ...], tuple[list[int], float, int]]:
+    series: dict[tuple[str, ...], list] = {}
+    for field, value in fields.items():
+        *labels, part = field.split(LABEL_SEP)
+        entry = series.setdefault(tuple(labels), [[0] * (bucket_count + 1), 0.0, 0])
+        if part == "sum":
+            entry[1] = float(value)
+        elif part == "count":
+            entry[2] = int(value)
+        elif part.startswith("b"):
+            entry[0][int(part[1:])] = int(value)
+    return {labels: tuple(entry) for labels, entry in series.items()}
+
+
+async def _celery_metrics() -> list[str]:
+    from app.core.celery_queues import get_queue_stats
+    from app.core.redis import get_redis_client
+
+    redis = get_redis_client()
+    pipe = redis.pipeline(transaction=False)
+    pipe.hgetall(CELERY_RUNTIME_KEY)
+    pipe.hgetall(CELERY_WAIT_KEY)
+    runtime, wait = await pipe.execute()
+    queues = await get_queue_stats()
+
+    lines = render_histogram(
+        "brashlens_celery_task_runtime_seconds",
+        "Celery task execution time (all workers)",
+        CELERY_RUNTIME_LABELS,
+        TASK_BUCKETS,
+        _parse_redis_histogram(runtime, len(TASK_BUCKETS)),
+    )
+    lines += render_histogram(
+        "brashlens_celery_task_queue_wait_seconds",
+        "Time from publish to task start (all workers)",
+        CELERY_WAIT_LABELS,
+        TASK_BUCKETS,
+        _parse_redis_histogram(wait, len(TASK_BUCKETS)),
+    )
+    lines += render_gauge(
+        "brashlens_celery_queue_backlog",
+        "Celery messages waiting in the broker",
+        {
+            (queue["queue"], priority): count
+            for queue in queues["queues"]
+            for priority, count in queue["by_priority"].items()
+        },
+        ("queue", "priority"),
+    )
+    lines += render_gauge(
+        "brashlens_celery_reserved", "Celery messages taken by workers but not acknowledged", {(): queues["reserved"]}
+    )
+    return lines
+
+
+async def render_metrics() -> str:
+    """
+    Все метрики процесса API в текстовом формате Prometheus.
+
+    Метрики PostgreSQL и Redis - пулы этого процесса; Celery - общие для
+    всех worker (из Redis). Недоступный Redis не ломает остальные метрики.
+    """
+    lines = http_request_duration.render()
+    lines += _db_pool_metrics()
+    lines += _redis_pool_metrics()
+    try:
+        lines += await _celery_metrics()
+        up = 1
+    except Exception as e:
+        logger.warning(f"Failed to collect Celery metrics: {e}")
+        up = 0
+    lines += render_gauge("brashlens_celery_metrics_up", "Celery metrics were read from Redis", {(): up})
+    return "\n".join(lines) + "\n"
+
+
+def observe_to_redis_fields(labels: tuple[str, ...], value: float, buckets: tuple[float, ...]) -> tuple[str, str, str]:
+    """
+    Поля hash Redis для одного наблюдения гистограммы (используется worker).
+
+    Returns:
+        tuple: (поле bucket, поле sum, поле count)
+    """
+    prefix = LABEL_SEP.join(label.replace(LABEL_SEP, "_") for label in labels)
+    return (
+        f"{prefix}{LABEL_SEP}b{bisect_left(buckets, value)}",
+        f"{prefix}{LABEL_SEP}sum",
+        f"{prefix}{LABEL_SEP}count",
+    )
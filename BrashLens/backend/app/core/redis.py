@@ -10,6 +10,9 @@ from app.core.config import settings
 # Создаем connection pool для Redis
 redis_pool: ConnectionPool | None = None
 redis_client: Redis | None = None
+# Отдельные clients для result backend и брокера Celery (может быть другая БД Redis)
+result_backend_client: Redis | None = None
+broker_client: Redis | None = None
 
 
 def get_redis_pool() -> ConnectionPool:
@@ -33,6 +36,29 @@ def get_redis_client() -> Redis:
     return redis_client
 
 
+def _client_for_url(url: str) -> Redis:
+    """Общий client, если URL совпадает с REDIS_URL, иначе отдельный."""
+    if url == settings.REDIS_URL:
+        return get_redis_client()
+    return Redis.from_url(url, decode_responses=True, max_connections=10)
+
+
+def get_result_backend_client() -> Redis:
+    """Получить async Redis client для ключей result backend Celery."""
+    global result_backend_client
+    if result_backend_client is None:
+        result_backend_client = _client_for_url(settings.CELERY_RESULT_BACKEND)
+    return result_backend_client
+
+
+def get_broker_client() -> Redis:
+    """Получить async Redis client брокера Celery (очереди задач)."""
+    global broker_client
+    if broker_client is None:
+        broker_client = _client_for_url(settings.CELERY_BROKER_URL)
+    return broker_client
+
+
 async def get_redis() -> AsyncGenerator[Redis, None]:
     """
     Dependency для получения Redis client в FastAPI.
@@ -50,7 +76,11 @@ async def get_redis() -> AsyncGenerator[Redis, None]:
 
 async def close_redis() -> None:
     """Закрыть Redis connection pool."""
-    global redis_client, redis_pool
+    global redis_client, redis_pool, result_backend_client, broker_client
+    for client in {result_backend_client, broker_client}:
+        if client is not None and client is not redis_client:
+            await client.aclose()
+    result_backend_client = broker_client = None
     if redis_client:
         await redis_client.aclose()
         redis_client = None
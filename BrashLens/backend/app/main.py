@@ -3,14 +3,14 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 
 from app.core.config import settings
 from app.core.logging import setup_logging, get_logger
 from app.core.exceptions import global_exception_handler, validation_exception_handler
-from app.core.limiter import limiter
 from app.api.v1 import api_router
+from app.core.database import replica_router
+from app.services.near_cache import invalidation_bus
+from app.services.task_status import task_status
 
 # Настройка логирования
 setup_logging()
@@ -25,9 +25,14 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
-# Подключение rate limiter
-app.state.limiter = limiter
+# Подключение rate limiter (slowapi импортируется, только если он включен)
 if settings.RATE_LIMIT_ENABLED:
+    from slowapi.errors import RateLimitExceeded
+    from slowapi.middleware import SlowAPIMiddleware
+
+    from app.core.limiter import limiter
+
+    app.state.limiter = limiter
     app.add_middleware(SlowAPIMiddleware)
     # Обработчик превышения rate limit
     app.add_exception_handler(
@@ -41,6 +46,20 @@ if settings.RATE_LIMIT_ENABLED:
         ),
     )
 
+# Метрики: гистограмма длительности запросов по маршрутам и GET /metrics.
+# Добавляется после SlowAPIMiddleware - внешним слоем, учитывает и ответы 429
+if settings.METRICS_ENABLED:
+    from fastapi.responses import PlainTextResponse
+
+    from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        """Метрики в текстовом формате Prometheus."""
+        return PlainTextResponse(await render_metrics(), media_type=CONTENT_TYPE)
+
 # CORS middleware с настройками из config
 app.add_middleware(
     CORSMiddleware,
@@ -74,9 +93,21 @@ async def startup_event() -> None:
     """Событие запуска приложения."""
     logger.info("BrashLens API starting up...")
     logger.info(f"CORS allowed origins: {settings.ALLOWED_ORIGINS}")
+    if settings.NEAR_CACHE_ENABLED:
+        # Подписываемся на инвалидации заранее, чтобы near-cache работал с первого запроса
+        invalidation_bus.ensure_started()
+    replica_router.ensure_monitor()
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     """Событие остановки приложения."""
     logger.info("BrashLens API shutting down...")
+    if settings.WEBHOOK_API_ENABLED:
+        from app.bot.bot import shutdown_application
+
+        # Дообрабатываем принятые webhook update до остановки
+        await shutdown_application()
+    await invalidation_bus.stop()
+    await task_status.stop()
+    await replica_router.stop()
@@ -49,9 +49,10 @@ class User(Base):
         DateTime(timezone=True), onupdate=func.now(), nullable=True
     )
 
-    # Composite index для быстрых фильтраций по роли и активности
+    # Composite index для быстрых фильтраций по роли и активности.
+    # id в конце дает порядок для keyset пагинации по (role, is_active, id)
     __table_args__ = (
-        Index("ix_users_role_is_active", "role", "is_active"),
+        Index("ix_users_role_is_active", "role", "is_active", "id"),
     )
 
     def __repr__(self) -> str:
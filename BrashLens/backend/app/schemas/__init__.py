@@ -1,16 +1,22 @@
 """Pydantic schemas for request and response validation."""
 from app.schemas.user import (
     UserBase,
+    UserBulkRowError,
+    UserBulkUpsertResponse,
     UserCreate,
     UserInDB,
+    UserListResponse,
     UserResponse,
     UserUpdate,
 )
 
 __all__ = [
     "UserBase",
+    "UserBulkRowError",
+    "UserBulkUpsertResponse",
     "UserCreate",
     "UserInDB",
+    "UserListResponse",
     "UserResponse",
     "UserUpdate",
 ]
@@ -18,6 +18,96 @@ class HealthDbResponse(BaseModel):
     error: Optional[str] = Field(None, description="Ошибка подключения")
 
 
+class DbPoolStatsResponse(BaseModel):
+    """Состояние пула соединений с БД в текущем процессе."""
+    size: int = Field(..., description="Размер пула (pool_size)")
+    in_use: int = Field(..., description="Выдано соединений")
+    idle: int = Field(..., description="Свободных соединений в пуле")
+    overflow: int = Field(..., description="Открыто соединений сверх pool_size")
+    max_overflow: int = Field(..., description="Лимит overflow")
+    checkouts: int = Field(..., description="Всего выдач соединений")
+    timeouts: int = Field(..., description="Выдач, завершившихся по pool_timeout")
+    avg_acquire_ms: float = Field(..., description="Среднее время получения соединения")
+    max_acquire_ms: float = Field(..., description="Максимальное время получения соединения")
+    queries: int = Field(..., description="Выполнено SQL-запросов (primary и реплики)")
+
+
+class DbReplicaStatusResponse(BaseModel):
+    """Состояние read-реплики."""
+    url: str = Field(..., description="URL реплики (без пароля)")
+    healthy: bool = Field(..., description="Используется ли реплика для чтения")
+    lag_seconds: Optional[float] = Field(None, description="Последнее измеренное отставание, секунд")
+
+
+class WebhookQueueStatsResponse(BaseModel):
+    """Состояние очереди webhook-обновлений."""
+    running: bool = Field(..., description="Запущены ли обработчики очереди")
+    workers: int = Field(..., description="Количество обработчиков")
+    busy_workers: int = Field(..., description="Обработчиков, занятых update")
+    depth: int = Field(..., description="Update в очереди сейчас")
+    deferred: int = Field(..., description="Update, ждущие обработчика своего чата")
+    max_depth: int = Field(..., description="Максимальная наблюдавшаяся глубина очереди")
+    maxsize: int = Field(..., description="Емкость очереди")
+    enqueued: int = Field(..., description="Принято update")
+    rejected: int = Field(..., description="Отклонено из-за переполнения (Telegram доставит повторно)")
+    processed: int = Field(..., description="Обработано update")
+    failed: int = Field(..., description="Update, обработка которых упала")
+    avg_wait_ms: float = Field(..., description="Среднее время ожидания в очереди")
+    max_wait_ms: float = Field(..., description="Максимальное время ожидания в очереди")
+
+
+class UpdateProcessorStatsResponse(BaseModel):
+    """Состояние параллельной обработки update бота."""
+    max_concurrent_updates: int = Field(..., description="Лимит одновременно обрабатываемых update")
+    in_flight: int = Field(..., description="Update в обработке сейчас")
+    waiting: int = Field(..., description="Update, ожидающие свой чат или свободный слот")
+    max_waiting: int = Field(..., description="Максимальное наблюдавшееся число ожидающих update")
+    active_chats: int = Field(..., description="Чатов с update в обработке или в ожидании")
+    processed: int = Field(..., description="Обработано update")
+    avg_chat_wait_ms: float = Field(..., description="Среднее ожидание перед началом обработки")
+    max_chat_wait_ms: float = Field(..., description="Максимальное ожидание перед началом обработки")
+
+
+class BotRateLimiterStatsResponse(BaseModel):
+    """Состояние планировщика исходящих запросов бота."""
+    sent: int = Field(..., description="Успешно отправлено запросов")
+    failed: int = Field(..., description="Запросов, не прошедших после всех повторов RetryAfter")
+    retries: int = Field(..., description="Повторов после RetryAfter")
+    paused: bool = Field(..., description="Отправка приостановлена flood control прямо сейчас")
+    waiting: dict[str, int] = Field(..., description="Запросов в ожидании по полосам приоритета")
+    tracked_chats: int = Field(..., description="Чатов с отдельным token bucket")
+    avg_wait_ms: float = Field(..., description="Среднее ожидание токена")
+    max_wait_ms: float = Field(..., description="Максимальное ожидание токена")
+    avg_latency_ms: float = Field(..., description="Средняя задержка запроса к Bot API")
+    max_latency_ms: float = Field(..., description="Максимальная задержка запроса к Bot API")
+
+
+class FloodGuardStatsResponse(BaseModel):
+    """Счетчики защиты от флуда входящими update."""
+    passed: int = Field(..., description="Пропущено update")
+    coalesced: int = Field(..., description="Отброшено повторов того же update пользователя")
+    dropped_user: int = Field(..., description="Отброшено сверх лимита пользователя")
+    dropped_chat: int = Field(..., description="Отброшено сверх лимита группового чата")
+    dropped_blocked: int = Field(..., description="Отброшено от заблокированных флудеров")
+    penalties: int = Field(..., description="Блокировок флудеров")
+    blocked_users: int = Field(..., description="Заблокировано пользователей сейчас")
+    tracked_users: int = Field(..., description="Пользователей с отдельным token bucket")
+
+
+class TaskQueueStatsResponse(BaseModel):
+    """Очередь Celery в брокере."""
+    queue: str = Field(..., description="Имя очереди")
+    backlog: int = Field(..., description="Задач ждут worker")
+    by_priority: dict[str, int] = Field(..., description="Задач по ступеням приоритета (0 - самый срочный)")
+
+
+class TaskQueuesResponse(BaseModel):
+    """Очереди Celery: сколько задач ждут выполнения."""
+    queues: list[TaskQueueStatsResponse] = Field(..., description="Очереди в порядке срочности")
+    total_backlog: int = Field(..., description="Задач ждут во всех очередях")
+    reserved: int = Field(..., description="Получено worker, но не подтверждено (выполняются или предвыбраны)")
+
+
 class TestConnectionResponse(BaseModel):
     """Ответ при создании тестовой записи."""
     status: str = Field(..., description="Статус операции")
@@ -56,14 +146,33 @@ class CacheGetResponse(BaseModel):
     value: str = Field(..., description="Значение")
 
 
+class UserCacheStatsResponse(BaseModel):
+    """Счетчики кеша пользователей текущего процесса."""
+    hits: int = Field(..., description="Попадания в кеш (запрос в БД не выполнялся)")
+    misses: int = Field(..., description="Промахи (чтение из БД)")
+    invalidations: int = Field(..., description="Инвалидации после записи")
+    hit_ratio: float = Field(..., description="Доля попаданий")
+
+
+class NearCacheStatsResponse(BaseModel):
+    """Состояние near-cache текущего процесса."""
+    listening: bool = Field(..., description="Подписка на канал инвалидации активна")
+    entries: int = Field(..., description="Количество записей")
+    bytes: int = Field(..., description="Суммарный размер записей")
+    hits: int = Field(..., description="Попадания (без обращения к Redis)")
+    misses: int = Field(..., description="Промахи")
+    evictions: int = Field(..., description="Вытеснения по LRU")
+
+
 class CeleryTaskResponse(BaseModel):
     """Ответ при запуске Celery задачи."""
     task_id: str = Field(..., description="ID задачи")
+    duplicate: bool = Field(False, description="Задача с этим Idempotency-Key уже была поставлена - возвращен ее ID")
 
 
 class TaskStatusResponse(BaseModel):
     """Ответ со статусом Celery задачи."""
-    status: str = Field(..., description="Статус задачи (PENDING/SUCCESS/FAILURE)")
+    status: str = Field(..., description="Статус задачи (PENDING/STARTED/SUCCESS/FAILURE)")
     task_id: str = Field(..., description="ID задачи")
     result: Optional[dict] = Field(None, description="Результат выполнения")
     error: Optional[str] = Field(None, description="Ошибка выполнения")
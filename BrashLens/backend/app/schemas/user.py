@@ -65,9 +65,66 @@ class UserResponse(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserListResponse(BaseModel):
+    """Страница списка пользователей (keyset пагинация)."""
+
+    items: list[UserResponse]
+    next_cursor: Optional[str] = Field(
+        None, description="Передайте в cursor для следующей страницы; null - страниц больше нет"
+    )
+
+
 class UserInDB(UserResponse):
     """Схема для внутреннего использования (полная)."""
 
     updated_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserBulkRowError(BaseModel):
+    """Строка массового импорта, которая не была вставлена."""
+
+    row: int = Field(..., description="Порядковый номер записи в импорте (с 1)")
+    telegram_id: Optional[int] = Field(None, description="Telegram ID, если удалось разобрать")
+    status: Literal["invalid", "duplicate", "conflict"] = Field(
+        ...,
+        description=(
+            "invalid - не прошла валидацию, duplicate - повтор telegram_id внутри импорта, "
+            "conflict - пользователь уже существует (режим on_conflict=skip)"
+        ),
+    )
+    detail: str
+
+
+class UserBulkFailure(BaseModel):
+    """Причина, по которой массовый импорт остановился на середине."""
+
+    offset: int = Field(
+        ...,
+        description="Номер первой записи, которая не была записана: импорт можно повторить начиная с нее",
+    )
+    reason: Literal["line_too_long", "batch_failed"] = Field(
+        ...,
+        description="line_too_long - строка NDJSON длиннее лимита, batch_failed - ошибка записи пакета в БД",
+    )
+    detail: str
+
+
+class UserBulkUpsertResponse(BaseModel):
+    """Результат массового импорта пользователей."""
+
+    received: int = Field(..., description="Получено записей")
+    inserted: int = Field(..., description="Создано пользователей")
+    updated: int = Field(..., description="Обновлено существующих (on_conflict=update)")
+    conflicts: int = Field(..., description="Пропущено существующих (on_conflict=skip)")
+    invalid: int = Field(..., description="Отклонено валидацией или как дубликаты")
+    batches: int = Field(..., description="Количество пакетов записи в БД")
+    elapsed_seconds: float
+    rows_per_second: float = Field(..., description="Пропускная способность по полученным записям")
+    errors: list[UserBulkRowError] = Field(default_factory=list)
+    errors_truncated: bool = Field(False, description="Список errors обрезан по лимиту")
+    failure: Optional[UserBulkFailure] = Field(
+        None,
+        description="Импорт остановлен: счетчики описывают уже закоммиченные пакеты",
+    )
@@ -1,4 +1,13 @@
 """Services module."""
-from app.services.user_service import UserService
 
 __all__ = ["UserService"]
+
+
+def __getattr__(name: str):
+    # UserService (SQLAlchemy, Redis) загружается по требованию: Celery worker
+    # импортирует app.services.tasks и не должен платить за весь слой данных
+    if name == "UserService":
+        from app.services.user_service import UserService
+
+        return UserService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -66,7 +66,8 @@ class CacheService:
         try:
             value = await self.redis.get(key)
             if value:
-                logger.info(f"Cache get: {key} = {value}")
+                # debug, а не info: get вызывается на горячем пути (кеш пользователей)
+                logger.debug(f"Cache get: {key} = {value}")
             return value
         except Exception as e:
             logger.error(f"Cache get failed for key {key}: {e}")
@@ -89,3 +90,47 @@ class CacheService:
         except Exception as e:
             logger.error(f"Cache delete failed for key {key}: {e}")
             return False
+
+    async def set_many(self, mapping: dict[str, str], expire: int = 3600) -> bool:
+        """
+        Сохранить несколько значений за один round trip (pipeline).
+        
+        Args:
+            mapping: Словарь ключ -> значение
+            expire: Время жизни в секундах (по умолчанию 3600)
+            
+        Returns:
+            bool: True если успешно сохранено
+        """
+        if not mapping:
+            return True
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, value, ex=expire)
+                await pipe.execute()
+            logger.debug(f"Cache set_many: {list(mapping)}")
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_many failed for keys {list(mapping)}: {e}")
+            return False
+
+    async def delete_many(self, *keys: str) -> int:
+        """
+        Удалить несколько ключей одной командой.
+        
+        Args:
+            keys: Ключи для удаления
+            
+        Returns:
+            int: Количество удаленных ключей (0 при ошибке)
+        """
+        if not keys:
+            return 0
+        try:
+            result = await self.redis.delete(*keys)
+            logger.debug(f"Cache delete_many: {list(keys)}")
+            return result
+        except Exception as e:
+            logger.error(f"Cache delete_many failed for keys {list(keys)}: {e}")
+            return 0
@@ -0,0 +1,263 @@
+"""In-process near-cache перед Redis с межпроцессной инвалидацией через pub/sub."""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+from app.services.cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "brashlens:cache:invalidate"
+
+
+class NearCache:
+    """
+    LRU/TTL кеш в памяти процесса.
+
+    Ограничен количеством записей и суммарным размером (ключ + значение,
+    в символах - приближенно к байтам для ASCII/JSON).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        """
+        Инициализация NearCache.
+
+        Args:
+            max_entries: Максимальное количество записей
+            max_bytes: Максимальный суммарный размер записей
+            ttl: Время жизни записи в секундах
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, int, str]] = OrderedDict()
+        self._bytes = 0
+        # Растет при каждой инвалидации: защищает от заполнения кеша
+        # значением, прочитанным из Redis до прихода инвалидации
+        self.invalidation_seq = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._pop(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: str, seq: Optional[int] = None) -> None:
+        """
+        Сохранить значение.
+
+        Args:
+            key: Ключ
+            value: Значение
+            seq: invalidation_seq на момент чтения значения из Redis.
+                Если с тех пор была инвалидация - значение не сохраняется.
+        """
+        if seq is not None and seq != self.invalidation_seq:
+            return
+
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+
+        self._pop(key)
+        self._data[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._pop(oldest)
+            self.evictions += 1
+
+    def invalidate(self, *keys: str) -> None:
+        self.invalidation_seq += 1
+        for key in keys:
+            self._pop(key)
+
+    def clear(self) -> None:
+        self.invalidation_seq += 1
+        self._data.clear()
+        self._bytes = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CacheInvalidationBus:
+    """
+    Шина инвалидации near-cache через Redis pub/sub.
+
+    Каждый процесс (backend, chat-bot, celery-worker) подписан на канал
+    и удаляет из своего NearCache ключи, удаленные любым процессом.
+    Пока подписка не активна, near-cache не используется: иначе процесс
+    мог бы отдавать значения, инвалидацию которых пропустил.
+    """
+
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self, near_cache: NearCache, channel: str = INVALIDATION_CHANNEL):
+        self.near_cache = near_cache
+        self.channel = channel
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listening = False
+
+    @property
+    def is_listening(self) -> bool:
+        return self._listening and self._loop is asyncio.get_running_loop()
+
+    def ensure_started(self) -> None:
+        """Запустить слушателя в текущем event loop (идемпотентно)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+
+        # Новый loop (например, asyncio.run в отдельной задаче) - всё, что
+        # было в кеше, могло устареть без нашего ведома
+        self._listening = False
+        self.near_cache.clear()
+        self._loop = loop
+        self._task = loop.create_task(self._listen(), name="cache-invalidation-bus")
+
+    async def stop(self) -> None:
+        """Остановить слушателя."""
+        self._listening = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, redis: Redis, *keys: str) -> None:
+        """Разослать инвалидацию ключей всем процессам (включая текущий)."""
+        self.near_cache.invalidate(*keys)
+        try:
+            await redis.publish(self.channel, json.dumps(keys))
+        except Exception as e:
+            logger.error(f"Failed to publish cache invalidation for {keys}: {e}")
+
+    async def _listen(self) -> None:
+        delay = self.RECONNECT_DELAY
+        while True:
+            pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # Сообщения, пришедшие до подписки, потеряны - начинаем с чистого кеша
+                self.near_cache.clear()
+                self._listening = True
+                delay = self.RECONNECT_DELAY
+                logger.info(f"Subscribed to cache invalidation channel {self.channel}")
+
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        keys = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        logger.warning(f"Malformed invalidation message: {message['data']!r}")
+                        continue
+                    self.near_cache.invalidate(*keys)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation bus disconnected: {e}")
+            finally:
+                self._listening = False
+                self.near_cache.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+
+class NearCachedCacheService(CacheService):
+    """
+    CacheService с near-cache в памяти процесса.
+
+    Чтения сначала идут в NearCache, удаления публикуются в шину инвалидации.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        near_cache: NearCache,
+        bus: CacheInvalidationBus,
+    ):
+        super().__init__(redis_client)
+        self.near_cache = near_cache
+        self.bus = bus
+
+    async def get(self, key: str) -> Optional[str]:
+        self.bus.ensure_started()
+        use_near = self.bus.is_listening
+        if use_near:
+            value = self.near_cache.get(key)
+            if value is not None:
+                return value
+
+        seq = self.near_cache.invalidation_seq
+        value = await super().get(key)
+        if value is not None and use_near:
+            self.near_cache.set(key, value, seq=seq)
+        return value
+
+    async def delete(self, key: str) -> bool:
+        result = await super().delete(key)
+        await self.bus.publish(self.redis, key)
+        return result
+
+    async def delete_many(self, *keys: str) -> int:
+        result = await super().delete_many(*keys)
+        if keys:
+            await self.bus.publish(self.redis, *keys)
+        return result
+
+
+# Синглтоны процесса
+near_cache = NearCache(
+    max_entries=settings.NEAR_CACHE_MAX_ENTRIES,
+    max_bytes=settings.NEAR_CACHE_MAX_BYTES,
+    ttl=settings.NEAR_CACHE_TTL,
+)
+invalidation_bus = CacheInvalidationBus(near_cache)
+
+
+def get_near_cached_service() -> NearCachedCacheService:
+    """Получить CacheService с near-cache на общем Redis pool процесса."""
+    return NearCachedCacheService(get_redis_client(), near_cache, invalidation_bus)
@@ -0,0 +1,174 @@
+"""Идемпотентная постановка Celery задач и защита от повторного выполнения."""
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+if TYPE_CHECKING:
+    # API импортирует модуль без Celery: задачу передает вызывающий код
+    from celery import Task
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "task:idem:v1"
+# Заголовок сообщения Celery с ключом идемпотентности (виден задаче как request.idempotency_key)
+HEADER = "idempotency_key"
+
+# Удалить ключ, только если он все еще указывает на нашу задачу
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Проверка результата и захват выполнения одной операцией: между ними
+# не вклинится _finish другой копии (иначе задача выполнится дважды).
+# KEYS: ключ идемпотентности, :result, :running; ARGV[1] - TTL блокировки
+_CLAIM_SCRIPT = """
+local stored = redis.call('GET', KEYS[2])
+if stored then
+    return {'done', stored}
+end
+if redis.call('SET', KEYS[3], '1', 'NX', 'EX', ARGV[1]) then
+    return {'claimed'}
+end
+return {'busy', redis.call('GET', KEYS[1])}
+"""
+
+
+def idempotency_key(task_name: str, key: str) -> str:
+    """Ключ Redis: task_id задачи для логического запроса key."""
+    return f"{KEY_PREFIX}:{task_name}:{key}"
+
+
+async def submit_idempotent(
+    task: "Task",
+    key: str,
+    args: tuple = (),
+    kwargs: Optional[dict] = None,
+    **options: Any,
+) -> tuple[str, bool]:
+    """
+    Поставить задачу один раз на логический запрос.
+
+    SET NX связывает key с task_id на TASK_IDEMPOTENCY_TTL секунд: повторный
+    вызов с тем же key (двойной клик, повтор запроса клиентом) возвращает
+    task_id уже поставленной задачи и ничего не ставит в очередь.
+
+    Args:
+        task: Celery задача
+        key: Ключ идемпотентности от клиента
+        args, kwargs: Аргументы задачи
+        **options: Опции apply_async (priority, countdown...)
+
+    Returns:
+        tuple: (task_id, True если задача поставлена этим вызовом)
+    """
+    redis = get_redis_client()
+    redis_key = idempotency_key(task.name, key)
+    task_id = str(uuid4())
+
+    if not await redis.set(redis_key, task_id, nx=True, ex=settings.TASK_IDEMPOTENCY_TTL):
+        existing = await redis.get(redis_key)
+        if existing is not None:
+            return existing, False
+        # Ключ истек между SET и GET - занимаем заново
+        if not await redis.set(redis_key, task_id, nx=True, ex=settings.TASK_IDEMPOTENCY_TTL):
+            return await redis.get(redis_key), False
+
+    headers = {**options.pop("headers", {}), HEADER: redis_key}
+    try:
+        # Публикация в брокер синхронная - не блокируем event loop
+        await asyncio.to_thread(
+            task.apply_async, args, kwargs, task_id=task_id, headers=headers, **options
+        )
+    except Exception:
+        # Задача не поставлена - следующая попытка с тем же key должна ее поставить
+        await redis.eval(_RELEASE_SCRIPT, 1, redis_key, task_id)
+        raise
+    return task_id, True
+
+
+async def _claim(redis_key: str, lock_ttl: int) -> tuple[str, Any]:
+    """
+    Занять выполнение по ключу.
+
+    Returns:
+        tuple: ("done", сохраненный результат), ("claimed", None) или
+        ("busy", task_id, за которым закреплен ключ, либо None, если ключ истек)
+    """
+    reply = await get_redis_client().eval(
+        _CLAIM_SCRIPT, 3, redis_key, f"{redis_key}:result", f"{redis_key}:running", lock_ttl
+    )
+    state = reply[0]
+    # nil в массиве ответа Lua обрезает его: у "busy" без владельца нет второго элемента
+    value = reply[1] if len(reply) > 1 else None
+    if state == "done":
+        return state, json.loads(value)
+    return state, value
+
+
+_FAILED = object()
+
+
+async def _finish(redis_key: str, result: Any) -> None:
+    # MULTI: результат появляется одновременно со снятием блокировки
+    pipe = get_redis_client().pipeline(transaction=True)
+    if result is not _FAILED:
+        pipe.set(f"{redis_key}:result", json.dumps(result), ex=settings.TASK_IDEMPOTENCY_TTL)
+    pipe.delete(f"{redis_key}:running")
+    await pipe.execute()
+
+
+def run_once(task: "Task", redis_key: str, execute: Callable[[], Any]) -> Any:
+    """
+    Выполнить задачу с ключом идемпотентности не больше одного раза.
+
+    Результат успешного выполнения сохраняется в Redis: повторная доставка
+    (перезапуск worker, visibility timeout) или повторная постановка с тем же
+    ключом вернет его без выполнения. Пока задача выполняется, параллельная
+    копия пропускается (статус IGNORED). После ошибки задачу можно выполнить снова.
+
+    Args:
+        task: Выполняемая задача
+        redis_key: Ключ идемпотентности из заголовка сообщения
+        execute: Функция без аргументов, выполняющая задачу
+
+    Returns:
+        Any: Результат задачи (новый или сохраненный)
+    """
+    from celery import states
+    from celery.exceptions import Ignore
+
+    from app.core.celery_async import worker_loop
+
+    lock_ttl = int(task.time_limit or task.app.conf.task_time_limit or settings.TASK_IDEMPOTENCY_TTL)
+    state, value = worker_loop.run(_claim(redis_key, lock_ttl))
+    if state == "done":
+        logger.info(f"Task {task.name}[{task.request.id}] already completed for {redis_key}, skipping")
+        return value
+    if state == "busy":
+        logger.warning(f"Task {task.name}[{task.request.id}] is already running for {redis_key}, skipping")
+        # Копия с другим task_id иначе так и останется STARTED (task_track_started).
+        # Повторная доставка того же сообщения имеет тот же task_id - статус
+        # выполняющегося оригинала не перезаписываем
+        if value is not None and value != task.request.id:
+            task.update_state(state=states.IGNORED, meta={"reason": "duplicate", "idempotency_key": redis_key})
+        raise Ignore()
+
+    result = _FAILED
+    try:
+        result = execute()
+        return result
+    finally:
+        try:
+            worker_loop.run(_finish(redis_key, result))
+        except Exception as e:
+            # Не подменяем результат или исключение задачи ошибкой Redis:
+            # блокировка :running истечет сама через lock_ttl
+            logger.error(f"Failed to finish idempotent task {task.name}[{task.request.id}] for {redis_key}: {e}")
@@ -0,0 +1,220 @@
+"""Статус Celery задач через async Redis и push-уведомления о смене состояния."""
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.core.redis import get_result_backend_client
+
+logger = logging.getLogger(__name__)
+
+# Ключ результата в Redis result backend Celery; тот же ключ - канал,
+# в который worker публикует каждое сохраненное состояние (STARTED, SUCCESS...)
+TASK_META_PREFIX = "celery-task-meta-"
+READY_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED", "IGNORED"})
+
+
+def _error_message(result: object) -> str:
+    """Текст исключения из сериализованного результата FAILURE (как str(exc))."""
+    if not isinstance(result, dict):
+        return str(result)
+    message = result.get("exc_message")
+    if isinstance(message, (list, tuple)):
+        return str(message[0]) if len(message) == 1 else str(tuple(message))
+    return str(message if message is not None else result.get("exc_type", "Task failed"))
+
+
+def parse_task_meta(task_id: str, raw: Optional[str]) -> dict:
+    """
+    Статус задачи из значения ключа celery-task-meta-<task_id>.
+
+    Returns:
+        dict: status, task_id, result, error (как TaskStatusResponse)
+    """
+    if raw is None:
+        # Celery не хранит PENDING: задача в очереди или неизвестна
+        return {"status": "PENDING", "task_id": task_id, "result": None, "error": None}
+    meta = json.loads(raw)
+    status = meta.get("status", "PENDING")
+    result = meta.get("result")
+    if status == "FAILURE":
+        return {"status": status, "task_id": task_id, "result": None, "error": _error_message(result)}
+    return {
+        "status": status,
+        "task_id": task_id,
+        "result": result if isinstance(result, dict) else None,
+        "error": None,
+    }
+
+
+class TaskStatusBackend:
+    """
+    Чтение статуса задач и подписка на его изменения без блокировки event loop.
+
+    get() читает ключ результата через async Redis. watch() отдает смены
+    состояния: один psubscribe на celery-task-meta-* на процесс, сообщения
+    раздаются очередям подписчиков по task_id. Слушатель запускается первым
+    watch() и останавливается, когда уходит последний подписчик, - без
+    открытых SSE процесс не получает поток состояний всех задач. Пока
+    подписчики есть, слушатель переподключается при обрывах (с чтением
+    актуального статуса).
+    """
+
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self):
+        self._watchers: dict[str, set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribed = asyncio.Event()
+        self.events = 0
+
+    async def get(self, task_id: str) -> dict:
+        """
+        Текущий статус задачи.
+
+        Returns:
+            dict: status, task_id, result, error
+        """
+        raw = await get_result_backend_client().get(f"{TASK_META_PREFIX}{task_id}")
+        return parse_task_meta(task_id, raw)
+
+    def ensure_started(self) -> None:
+        """Запустить слушателя в текущем event loop (идемпотентно)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._subscribed = asyncio.Event()
+        self._task = loop.create_task(self._listen(), name="task-status-events")
+
+    def _release_listener(self) -> None:
+        """Отменить слушателя, если подписчиков не осталось (pubsub закроется в _listen)."""
+        if self._watchers or self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._subscribed.clear()
+
+    async def stop(self) -> None:
+        """Остановить слушателя."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        # Событие этого слушателя: отмененный слушатель не сбросит событие следующего
+        subscribed = self._subscribed
+        delay = self.RECONNECT_DELAY
+        while True:
+            pubsub = get_result_backend_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{TASK_META_PREFIX}*")
+                subscribed.set()
+                delay = self.RECONNECT_DELAY
+                # Состояния, сохраненные до подписки, подписчики дочитают из ключей
+                await self._resync()
+
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    task_id = message["channel"][len(TASK_META_PREFIX):]
+                    queues = self._watchers.get(task_id)
+                    if not queues:
+                        continue
+                    self.events += 1
+                    try:
+                        status = parse_task_meta(task_id, message["data"])
+                    except (TypeError, ValueError):
+                        logger.warning(f"Malformed task meta for {task_id}: {message['data']!r}")
+                        continue
+                    for queue in queues:
+                        queue.put_nowait(status)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task status events disconnected: {e}")
+            finally:
+                subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    async def _resync(self) -> None:
+        for task_id in list(self._watchers):
+            status = await self.get(task_id)
+            for queue in self._watchers.get(task_id, ()):
+                queue.put_nowait(status)
+
+    async def watch(self, task_id: str, timeout: float) -> AsyncIterator[Optional[dict]]:
+        """
+        Смены статуса задачи до завершения (SUCCESS/FAILURE/REVOKED/IGNORED) или timeout.
+
+        Первым отдается текущий статус. Если за keepalive-интервал ничего не
+        произошло, отдается None (повод отправить клиенту keepalive).
+
+        Yields:
+            Optional[dict]: Новый статус или None
+        """
+        self.ensure_started()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(task_id, set()).add(queue)
+        deadline = time.monotonic() + timeout
+        try:
+            # Подписка раньше чтения ключа: переход между ними не потеряется
+            try:
+                await asyncio.wait_for(self._subscribed.wait(), timeout=settings.TASK_EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                logger.warning("Task status events are not subscribed yet, falling back to key reads")
+            queue.put_nowait(await self.get(task_id))
+
+            last_status = None
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    status = await asyncio.wait_for(
+                        queue.get(), timeout=min(remaining, settings.TASK_EVENTS_KEEPALIVE)
+                    )
+                except asyncio.TimeoutError:
+                    # Без подписки (обрыв Redis) статус опрашивается из ключа
+                    status = None if self._subscribed.is_set() else await self.get(task_id)
+                    if status is None or status["status"] == last_status:
+                        yield None
+                        continue
+                if status["status"] == last_status:
+                    continue
+                last_status = status["status"]
+                yield status
+                if last_status in READY_STATES:
+                    return
+        finally:
+            queues = self._watchers.get(task_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._watchers[task_id]
+            self._release_listener()
+
+    def stats(self) -> dict:
+        return {
+            "watched_tasks": len(self._watchers),
+            "watchers": sum(len(queues) for queues in self._watchers.values()),
+            "subscribed": self._subscribed.is_set(),
+            "events": self.events,
+        }
+
+
+task_status = TaskStatusBackend()
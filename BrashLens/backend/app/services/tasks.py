@@ -1,6 +1,6 @@
 """Celery tasks."""
+import asyncio
 import logging
-import time
 
 from app.core.celery_app import celery_app
 
@@ -8,10 +8,12 @@ logger = logging.getLogger(__name__)
 
 
 @celery_app.task(name="app.services.tasks.test_task")
-def test_task(message: str) -> dict[str, str]:
+async def test_task(message: str) -> dict[str, str]:
     """
     Тестовая задача для проверки работы Celery.
     
+    Coroutine (AsyncTask): ожидание не занимает поток worker.
+    
     Args:
         message: Сообщение для логирования
         
@@ -21,7 +23,7 @@ def test_task(message: str) -> dict[str, str]:
     logger.info(f"Test task started with message: {message}")
     
     # Имитация работы (5 секунд)
-    time.sleep(5)
+    await asyncio.sleep(5)
     
     result = {
         "status": "completed",
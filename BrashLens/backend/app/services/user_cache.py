@@ -0,0 +1,174 @@
+"""Read-through кеш пользователей поверх Redis."""
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+from app.models.user import User, UserRole
+from app.services.cache_service import CacheService
+from app.services.near_cache import get_near_cached_service
+
+logger = logging.getLogger(__name__)
+
+
+class UserCacheStats:
+    """Счетчики кеша пользователей (в пределах процесса)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> dict:
+        """
+        Снимок счетчиков.
+
+        Returns:
+            dict: hits, misses, invalidations и доля попаданий
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Общие счетчики процесса: UserCache создается на каждый запрос/апдейт
+user_cache_stats = UserCacheStats()
+
+
+class UserCache:
+    """
+    Кеш сериализованных строк users.
+
+    Одна и та же запись хранится под тремя ключами (id, telegram_id, username),
+    чтобы любой из lookup-методов UserService обходился одним GET.
+    Инвалидация удаляет все три ключа.
+    """
+
+    # Версия формата: при изменении User.to_dict() достаточно поднять версию
+    KEY_PREFIX = "user:v1"
+
+    def __init__(
+        self,
+        cache: CacheService,
+        ttl: int = 300,
+        stats: UserCacheStats = user_cache_stats,
+    ):
+        """
+        Инициализация UserCache.
+
+        Args:
+            cache: CacheService поверх Redis
+            ttl: Время жизни записи в секундах
+            stats: Счетчики попаданий/промахов
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.stats = stats
+
+    @classmethod
+    def default(cls) -> "UserCache":
+        """
+        Создать кеш на общем Redis connection pool процесса.
+
+        При NEAR_CACHE_ENABLED перед Redis стоит near-cache процесса.
+        """
+        if settings.NEAR_CACHE_ENABLED:
+            return cls(get_near_cached_service(), ttl=settings.USER_CACHE_TTL)
+        return cls(CacheService(get_redis_client()), ttl=settings.USER_CACHE_TTL)
+
+    @classmethod
+    def key_by_id(cls, user_id: int) -> str:
+        return f"{cls.KEY_PREFIX}:id:{user_id}"
+
+    @classmethod
+    def key_by_telegram_id(cls, telegram_id: int) -> str:
+        return f"{cls.KEY_PREFIX}:tg:{telegram_id}"
+
+    @classmethod
+    def key_by_username(cls, username: str) -> str:
+        return f"{cls.KEY_PREFIX}:un:{username}"
+
+    @classmethod
+    def keys_for(
+        cls, user_id: int, telegram_id: int, username: Optional[str]
+    ) -> list[str]:
+        """Все ключи, под которыми может лежать пользователь."""
+        keys = [cls.key_by_id(user_id), cls.key_by_telegram_id(telegram_id)]
+        if username:
+            keys.append(cls.key_by_username(username))
+        return keys
+
+    async def get(self, key: str) -> Optional[User]:
+        """
+        Получить пользователя из кеша.
+
+        Args:
+            key: Ключ (key_by_id / key_by_telegram_id / key_by_username)
+
+        Returns:
+            Optional[User]: Отсоединенный от сессии User или None при промахе
+        """
+        raw = await self.cache.get(key)
+        if raw is None:
+            self.stats.misses += 1
+            return None
+
+        try:
+            user = self.deserialize(raw)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Corrupted user cache entry {key}: {e}")
+            self.stats.misses += 1
+            await self.cache.delete(key)
+            return None
+
+        self.stats.hits += 1
+        return user
+
+    async def set(self, user: User) -> bool:
+        """Положить пользователя в кеш под всеми его ключами."""
+        payload = self.serialize(user)
+        keys = self.keys_for(user.id, user.telegram_id, user.username)
+        return await self.cache.set_many(
+            {key: payload for key in keys}, expire=self.ttl
+        )
+
+    async def invalidate(
+        self, user_id: int, telegram_id: int, username: Optional[str]
+    ) -> None:
+        """Удалить пользователя из кеша (вызывается после каждой записи в users)."""
+        await self.cache.delete_many(*self.keys_for(user_id, telegram_id, username))
+        self.stats.invalidations += 1
+
+    async def invalidate_many(
+        self, users: list[tuple[int, int, Optional[str]]]
+    ) -> None:
+        """Инвалидация пачки пользователей одной командой DEL."""
+        keys = [key for user in users for key in self.keys_for(*user)]
+        if keys:
+            await self.cache.delete_many(*keys)
+            self.stats.invalidations += len(users)
+
+    @staticmethod
+    def serialize(user: User) -> str:
+        return json.dumps(user.to_dict(), ensure_ascii=False)
+
+    @staticmethod
+    def deserialize(raw: str) -> User:
+        """
+        Восстановить User из JSON.
+
+        Объект не привязан к сессии: подходит для чтения,
+        но не для изменения через ORM.
+        """
+        data = json.loads(raw)
+        data["role"] = UserRole(data["role"])
+        for field in ("created_at", "updated_at"):
+            if data.get(field):
+                data[field] = datetime.fromisoformat(data[field])
+        return User(**data)
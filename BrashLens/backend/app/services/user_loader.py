@@ -0,0 +1,125 @@
+"""Склейка конкурентных lookup-ов пользователей по telegram_id в один запрос."""
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import BigInteger, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramIdLoader:
+    """
+    DataLoader для users по telegram_id.
+
+    Lookup-и, пришедшие в течение окна (несколько миллисекунд), уходят в БД
+    одним запросом WHERE telegram_id = ANY(:ids). Повторный lookup id, который
+    уже ждет ответа (в очереди или в выполняющемся запросе), не создает
+    нового запроса, а ждет тот же результат.
+
+    Запрос выполняется в собственной короткой сессии, поэтому возвращаемые
+    User не привязаны к сессии вызывающего (как и значения из UserCache)
+    и могут разделяться между несколькими вызывающими - только для чтения.
+    """
+
+    # Один параметр-массив: один prepared statement для любого размера пачки
+    QUERY = select(User).where(
+        User.telegram_id == any_(bindparam("ids", type_=ARRAY(BigInteger)))
+    )
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        window: float = 0.002,
+        max_batch: int = 500,
+    ):
+        """
+        Инициализация TelegramIdLoader.
+
+        Args:
+            session_factory: Фабрика сессий для пакетных запросов
+            window: Сколько секунд собирать lookup-и перед запросом
+            max_batch: Максимальный размер пачки; при достижении запрос уходит сразу
+        """
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._futures: dict[int, asyncio.Future] = {}
+        self._queue: list[int] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def load(self, telegram_id: int) -> Optional[User]:
+        """
+        Получить пользователя по telegram_id.
+
+        Args:
+            telegram_id: Telegram ID пользователя
+
+        Returns:
+            Optional[User]: Отсоединенный от сессии User или None
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures привязаны к loop: в новом loop (asyncio.run в задаче Celery)
+            # начинаем с чистого состояния
+            self._loop = loop
+            self._futures = {}
+            self._queue = []
+            self._timer = None
+
+        future = self._futures.get(telegram_id)
+        if future is None:
+            future = loop.create_future()
+            self._futures[telegram_id] = future
+            self._queue.append(telegram_id)
+            if len(self._queue) >= self.max_batch:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._dispatch)
+
+        # shield: отмена одного ожидающего не должна отменять результат для остальных
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        """Отправить накопленную пачку в БД."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        ids, self._queue = self._queue, []
+        if ids:
+            self._loop.create_task(self._run(ids), name="user-loader-batch")
+
+    async def _run(self, ids: list[int]) -> None:
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(self.QUERY, {"ids": ids})
+                users = {user.telegram_id: user for user in result.scalars()}
+        except Exception as e:
+            logger.error(f"Batched user lookup for {len(ids)} ids failed: {e}")
+            for telegram_id in ids:
+                future = self._futures.pop(telegram_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                    # Ошибку получают ожидающие; если все отменились - не шумим в лог
+                    future.exception()
+            return
+
+        for telegram_id in ids:
+            future = self._futures.pop(telegram_id, None)
+            if future is not None and not future.done():
+                future.set_result(users.get(telegram_id))
+
+
+# Синглтон процесса: склеивает lookup-и из всех конкурентных запросов/апдейтов
+user_loader = TelegramIdLoader(
+    AsyncSessionLocal,
+    window=settings.USER_LOADER_WINDOW_MS / 1000,
+    max_batch=settings.USER_LOADER_MAX_BATCH,
+)
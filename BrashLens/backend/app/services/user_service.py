@@ -1,98 +1,594 @@
 """Сервис для работы с пользователями."""
-from typing import List, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Union
+from functools import partial
+import base64
+import json
 import logging
+import time
 
-from sqlalchemy import and_, delete, select
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.database import use_primary
 from app.models.user import User, UserRole
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import (
+    UserBulkFailure,
+    UserBulkRowError,
+    UserBulkUpsertResponse,
+    UserCreate,
+    UserUpdate,
+)
+from app.services.user_cache import UserCache
+from app.services.user_loader import user_loader
 
 logger = logging.getLogger(__name__)
 
+# Запись массового импорта: готовая схема, dict или сырая JSON-строка (NDJSON)
+BulkRecord = Union[UserCreate, dict, str, bytes]
+
+
+class BulkLineTooLongError(ValueError):
+    """Строка NDJSON длиннее USER_BULK_MAX_LINE_BYTES (источник записей импорта)."""
+
+_STAGING_TABLE = "users_import_staging"
+_STAGING_COLUMNS = (
+    "telegram_id", "username", "first_name", "last_name", "role", "language",
+)
+
+# ON COMMIT DROP: таблица живет одну транзакцию (совместимо с PgBouncer transaction mode)
+_CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE {_STAGING_TABLE} (
+        telegram_id BIGINT NOT NULL,
+        username VARCHAR(255),
+        first_name VARCHAR(255) NOT NULL,
+        last_name VARCHAR(255),
+        role TEXT NOT NULL,
+        language VARCHAR(5) NOT NULL
+    ) ON COMMIT DROP
+""")
+
+_STAGING_EXISTING_SQL = text(f"""
+    SELECT u.id, u.telegram_id, u.username
+    FROM users u JOIN {_STAGING_TABLE} s USING (telegram_id)
+""")
+
+_MERGE_SKIP_SQL = text(f"""
+    INSERT INTO users (telegram_id, username, first_name, last_name, role, language, is_active)
+    SELECT telegram_id, username, first_name, last_name, role::user_role, language, true
+    FROM {_STAGING_TABLE}
+    ON CONFLICT (telegram_id) DO NOTHING
+    RETURNING id, telegram_id, username, (xmax = 0) AS inserted
+""")
+
+# Роль при обновлении не меняется (как и в UserUpdate)
+_MERGE_UPDATE_SQL = text(f"""
+    INSERT INTO users (telegram_id, username, first_name, last_name, role, language, is_active)
+    SELECT telegram_id, username, first_name, last_name, role::user_role, language, true
+    FROM {_STAGING_TABLE}
+    ON CONFLICT (telegram_id) DO UPDATE SET
+        username = EXCLUDED.username,
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        language = EXCLUDED.language,
+        updated_at = now()
+    RETURNING id, telegram_id, username, (xmax = 0) AS inserted
+""")
+
+
+def encode_user_cursor(user: User) -> str:
+    """Непрозрачный cursor пагинации: ключ (role, is_active, id) последней строки."""
+    raw = json.dumps([user.role.value, user.is_active, user.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_user_cursor(cursor: str) -> tuple[UserRole, bool, int]:
+    """
+    Разобрать cursor пагинации.
+
+    Raises:
+        ValueError: Некорректный cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        role, is_active, user_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(is_active, bool) or not isinstance(user_id, int):
+            raise TypeError("unexpected cursor field types")
+        return UserRole(role), is_active, user_id
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _record_telegram_id(record: Any) -> Optional[int]:
+    """telegram_id невалидной записи (dict или JSON-строка), если его удается прочитать."""
+    if isinstance(record, (str, bytes)):
+        try:
+            record = json.loads(record)
+        except ValueError:
+            return None
+    telegram_id = record.get("telegram_id") if isinstance(record, dict) else None
+    return telegram_id if isinstance(telegram_id, int) and not isinstance(telegram_id, bool) else None
+
+
+async def _aiter_records(records: Union[AsyncIterable[Any], Iterable[Any]]):
+    """Единый async-итератор поверх sync/async источника записей."""
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
+
 
 class UserService:
     """Сервис для работы с пользователями."""
 
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache: Optional[UserCache] = None,
+        autocommit: bool = True,
+    ):
+        """
+        Инициализация UserService.
+
+        Args:
+            db: Сессия базы данных
+            cache: Кеш пользователей. Если не передан - используется общий
+                Redis кеш процесса (при USER_CACHE_ENABLED=True)
+            autocommit: Коммитить после каждой записи. При False коммит
+                делает владелец сессии (unit of work), а операции с кешем
+                откладываются до его вызова run_after_commit()
+        """
         self.db = db
+        if cache is None and settings.USER_CACHE_ENABLED:
+            cache = UserCache.default()
+        self.cache = cache
+        self.autocommit = autocommit
+        # Инвалидации/write-through, которые можно выполнить только после commit
+        self._after_commit: list[Callable[[], Awaitable[None]]] = []
+
+    async def _commit(self) -> None:
+        """Зафиксировать запись (или оставить это unit of work)."""
+        if self.autocommit:
+            await self.db.commit()
+            await self.run_after_commit()
+
+    async def _rollback(self) -> None:
+        await self.db.rollback()
+        self._after_commit.clear()
+
+    async def run_after_commit(self) -> None:
+        """Выполнить отложенные операции с кешем (после commit транзакции)."""
+        operations, self._after_commit = self._after_commit, []
+        for operation in operations:
+            await operation()
+
+    def discard_after_commit(self) -> None:
+        """Отбросить отложенные операции (транзакция откатилась)."""
+        self._after_commit.clear()
 
     async def create_user(self, user_data: UserCreate) -> User:
-        """Создать нового пользователя."""
-        # Проверка существования по telegram_id
-        existing = await self.get_by_telegram_id(user_data.telegram_id)
-        if existing:
+        """
+        Создать нового пользователя.
+
+        Один запрос INSERT ... ON CONFLICT (telegram_id) DO NOTHING RETURNING:
+        без предварительного SELECT и без refresh после commit.
+
+        Raises:
+            ValueError: Пользователь с таким telegram_id уже существует
+        """
+        stmt = (
+            pg_insert(User)
+            .values(**self._insert_values(user_data))
+            .on_conflict_do_nothing(index_elements=[User.telegram_id])
+            .returning(User)
+        )
+        result = await self.db.execute(stmt)
+        user = result.scalar_one_or_none()
+        if user is None:
             raise ValueError(
                 f"User with telegram_id {user_data.telegram_id} already exists"
             )
 
-        # Создание пользователя
+        self._remember(user)
+        await self._commit()
+        return user
+
+    @staticmethod
+    def _insert_values(user_data: UserCreate) -> dict:
+        """Подготовить значения для INSERT из схемы."""
         user_dict = user_data.model_dump()
         # Конвертируем строку роли в enum
         if "role" in user_dict and isinstance(user_dict["role"], str):
             user_dict["role"] = UserRole(user_dict["role"])
-        user = User(**user_dict)
-        self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
-        return user
+        return user_dict
 
     async def get_by_telegram_id(self, telegram_id: int) -> Optional[User]:
-        """Получить пользователя по Telegram ID."""
-        result = await self.db.execute(
-            select(User).where(User.telegram_id == telegram_id)
+        """
+        Получить пользователя по Telegram ID.
+
+        Сначала читает кеш; найденный в кеше User не привязан к сессии.
+        При промахе конкурентные lookup-и склеиваются user_loader в один
+        запрос. Если у сессии уже открыта транзакция (возможны незакоммиченные
+        записи), читаем в ней же.
+        """
+        key = UserCache.key_by_telegram_id(telegram_id)
+        if not self._can_batch():
+            return await self._get_cached(key, User.telegram_id == telegram_id)
+
+        if self.cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        user = await user_loader.load(telegram_id)
+        if user and self.cache:
+            await self.cache.set(user)
+        return user
+
+    def _can_batch(self) -> bool:
+        """Можно ли читать через общий user_loader (вне сессии self.db)."""
+        return (
+            settings.USER_LOADER_ENABLED
+            and not self.db.in_transaction()
+            and not self.db.sync_session.info.get("use_primary")
         )
-        return result.scalar_one_or_none()
 
     async def get_by_id(self, user_id: int) -> Optional[User]:
-        """Получить пользователя по ID."""
-        result = await self.db.execute(select(User).where(User.id == user_id))
-        return result.scalar_one_or_none()
+        """Получить пользователя по ID (через кеш)."""
+        return await self._get_cached(UserCache.key_by_id(user_id), User.id == user_id)
 
     async def get_by_username(self, username: str) -> Optional[User]:
-        """Получить пользователя по username."""
-        result = await self.db.execute(select(User).where(User.username == username))
+        """Получить пользователя по username (через кеш)."""
+        return await self._get_cached(
+            UserCache.key_by_username(username), User.username == username
+        )
+
+    async def _get_cached(self, key: str, criterion) -> Optional[User]:
+        """Read-through: кеш, затем БД с заполнением кеша."""
+        if self.cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        user = await self._fetch_one(criterion)
+        if user and self.cache:
+            await self.cache.set(user)
+        return user
+
+    async def _fetch_one(self, criterion) -> Optional[User]:
+        """Прочитать пользователя из БД в обход кеша (для путей записи)."""
+        result = await self.db.execute(select(User).where(criterion))
         return result.scalar_one_or_none()
 
+    def _remember(self, user: User) -> None:
+        """
+        Write-through созданного или только что прочитанного из primary пользователя в кеш (после commit).
+
+        Следующий запрос (другая сессия) может читать с реплики, которая
+        еще не получила INSERT: кеш дает read-your-own-write без обращения к БД.
+        """
+        if self.cache:
+            self._after_commit.append(partial(self.cache.set, user))
+
+    def _invalidate(
+        self, user_id: int, telegram_id: int, username: Optional[str]
+    ) -> None:
+        """Сбросить кеш пользователя после commit записи в users."""
+        if self.cache:
+            self._after_commit.append(
+                partial(self.cache.invalidate, user_id, telegram_id, username)
+            )
+
     async def update_user(
         self, user_id: int, user_data: UserUpdate
     ) -> Optional[User]:
-        """Обновить данные пользователя."""
-        user = await self.get_by_id(user_id)
-        if not user:
-            return None
+        """
+        Обновить данные пользователя.
+
+        Один запрос UPDATE ... WHERE id = ... RETURNING вместо
+        SELECT + UPDATE + refresh.
 
+        Returns:
+            Optional[User]: Обновленный пользователь или None если не найден
+        """
         # Обновляем только переданные поля
         update_data = user_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(user, field, value)
+        if not update_data:
+            return await self.get_by_id(user_id)
+
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**update_data)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(stmt)
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
 
-        await self.db.commit()
-        await self.db.refresh(user)
+        self._invalidate(user.id, user.telegram_id, user.username)
+        await self._commit()
         return user
 
+    async def bulk_upsert(
+        self,
+        records: Union[AsyncIterable[BulkRecord], Iterable[BulkRecord]],
+        update_existing: bool = False,
+        batch_size: Optional[int] = None,
+    ) -> UserBulkUpsertResponse:
+        """
+        Массовый импорт пользователей (миграция клиентских баз из других CRM).
+
+        Записи валидируются по мере чтения (источник может быть потоковым),
+        затем пишутся пакетами: asyncpg COPY во временную staging-таблицу
+        и один INSERT ... SELECT ... ON CONFLICT на пакет. Каждый пакет -
+        отдельная транзакция. Если пакет не записался или источник оборвался
+        (BulkLineTooLongError), импорт останавливается и возвращает счетчики
+        уже закоммиченных пакетов и failure.offset - с какой записи повторить.
+
+        Args:
+            records: UserCreate, dict или JSON-строки (sync или async iterable)
+            update_existing: True - обновлять существующих (username, имя, язык),
+                False - пропускать и сообщать как conflict
+            batch_size: Размер пакета (по умолчанию USER_BULK_BATCH_SIZE)
+
+        Returns:
+            UserBulkUpsertResponse: Счетчики, построчные ошибки и rows/second
+        """
+        batch_size = batch_size or settings.USER_BULK_BATCH_SIZE
+        max_errors = settings.USER_BULK_MAX_REPORTED_ERRORS
+        started = time.perf_counter()
+
+        errors: list[UserBulkRowError] = []
+        counters = {"received": 0, "inserted": 0, "updated": 0, "conflicts": 0, "invalid": 0, "batches": 0}
+        # telegram_id -> номер первой строки с ним (дубликаты внутри импорта)
+        seen: dict[int, int] = {}
+        batch: list[tuple[int, UserCreate]] = []
+
+        def report(error: UserBulkRowError) -> None:
+            if len(errors) < max_errors:
+                errors.append(error)
+
+        failure: Optional[UserBulkFailure] = None
+        try:
+            async for record in _aiter_records(records):
+                counters["received"] += 1
+                row = counters["received"]
+
+                try:
+                    if isinstance(record, UserCreate):
+                        user_data = record
+                    elif isinstance(record, (str, bytes)):
+                        user_data = UserCreate.model_validate_json(record)
+                    else:
+                        user_data = UserCreate.model_validate(record)
+                except ValidationError as e:
+                    counters["invalid"] += 1
+                    report(UserBulkRowError(
+                        row=row,
+                        telegram_id=_record_telegram_id(record),
+                        status="invalid",
+                        detail="; ".join(
+                            f"{'.'.join(map(str, err['loc'])) or 'record'}: {err['msg']}"
+                            for err in e.errors(include_url=False)
+                        ),
+                    ))
+                    continue
+
+                first_row = seen.setdefault(user_data.telegram_id, row)
+                if first_row != row:
+                    counters["invalid"] += 1
+                    report(UserBulkRowError(
+                        row=row,
+                        telegram_id=user_data.telegram_id,
+                        status="duplicate",
+                        detail=f"Duplicate telegram_id in import (first seen at row {first_row})",
+                    ))
+                    continue
+
+                batch.append((row, user_data))
+                if len(batch) >= batch_size:
+                    await self._write_bulk_batch(batch, update_existing, counters, report)
+                    batch = []
+
+            if batch:
+                await self._write_bulk_batch(batch, update_existing, counters, report)
+        except Exception as e:
+            # Записи незаписанного пакета уже прочитаны - повторять импорт с первой из них
+            offset = batch[0][0] if batch else counters["received"] + 1
+            if isinstance(e, BulkLineTooLongError):
+                failure = UserBulkFailure(offset=offset, reason="line_too_long", detail=str(e))
+            else:
+                logger.error(f"Bulk upsert stopped at row {offset}: {e}", exc_info=True)
+                failure = UserBulkFailure(offset=offset, reason="batch_failed", detail=str(e))
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Bulk upsert: received={counters['received']} inserted={counters['inserted']} "
+            f"updated={counters['updated']} conflicts={counters['conflicts']} "
+            f"invalid={counters['invalid']} in {elapsed:.2f}s"
+        )
+        return UserBulkUpsertResponse(
+            **counters,
+            elapsed_seconds=round(elapsed, 4),
+            rows_per_second=round(counters["received"] / elapsed, 1) if elapsed else 0.0,
+            errors=errors,
+            errors_truncated=len(errors) < counters["invalid"] + counters["conflicts"],
+            failure=failure,
+        )
+
+    async def _write_bulk_batch(
+        self,
+        batch: list[tuple[int, UserCreate]],
+        update_existing: bool,
+        counters: dict[str, int],
+        report: Callable[[UserBulkRowError], None],
+    ) -> None:
+        """COPY пакета в staging-таблицу и merge в users одной транзакцией."""
+        try:
+            await self.db.execute(_CREATE_STAGING_SQL)
+
+            # COPY идет в транзакции, открытой предыдущим запросом сессии
+            connection = await self.db.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                _STAGING_TABLE,
+                records=[
+                    (
+                        user_data.telegram_id,
+                        user_data.username,
+                        user_data.first_name,
+                        user_data.last_name,
+                        user_data.role,
+                        user_data.language,
+                    )
+                    for _, user_data in batch
+                ],
+                columns=_STAGING_COLUMNS,
+            )
+
+            # Старые ключи кеша (username мог измениться) - только при обновлении
+            stale: list[tuple[int, int, Optional[str]]] = []
+            if update_existing and self.cache:
+                stale = [tuple(r) for r in (await self.db.execute(_STAGING_EXISTING_SQL)).all()]
+
+            merged = (
+                await self.db.execute(_MERGE_UPDATE_SQL if update_existing else _MERGE_SKIP_SQL)
+            ).all()
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        counters["batches"] += 1
+        written = set()
+        updated: list[tuple[int, int, Optional[str]]] = []
+        for user_id, telegram_id, username, inserted in merged:
+            written.add(telegram_id)
+            if inserted:
+                counters["inserted"] += 1
+            else:
+                counters["updated"] += 1
+                updated.append((user_id, telegram_id, username))
+
+        if self.cache and (stale or updated):
+            await self.cache.invalidate_many(stale + updated)
+
+        for row, user_data in batch:
+            if user_data.telegram_id not in written:
+                counters["conflicts"] += 1
+                report(UserBulkRowError(
+                    row=row,
+                    telegram_id=user_data.telegram_id,
+                    status="conflict",
+                    detail=f"User with telegram_id {user_data.telegram_id} already exists",
+                ))
+
     async def get_users_by_role(
-        self, role: str, skip: int = 0, limit: int = 100
-    ) -> List[User]:
-        """Получить список пользователей по роли."""
+        self, role: str, limit: int = 100, cursor: Optional[str] = None
+    ) -> tuple[List[User], Optional[str]]:
+        """
+        Получить страницу активных пользователей с ролью (keyset пагинация).
+
+        Args:
+            role: Роль пользователя
+            limit: Размер страницы
+            cursor: next_cursor предыдущей страницы
+
+        Returns:
+            tuple[List[User], Optional[str]]: (пользователи, next_cursor или None)
+
+        Raises:
+            ValueError: Неизвестная роль или некорректный cursor
+        """
         # Конвертируем строку в enum если нужно
         role_enum = UserRole(role) if isinstance(role, str) else role
-        result = await self.db.execute(
-            select(User)
-            .where(and_(User.role == role_enum, User.is_active == True))
-            .offset(skip)
-            .limit(limit)
+        return await self._get_page(
+            and_(User.role == role_enum, User.is_active == True), limit, cursor
+        )
+
+    async def get_users(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> tuple[List[User], Optional[str]]:
+        """
+        Получить страницу всех пользователей (keyset пагинация).
+
+        Порядок (role, is_active, id) совпадает с индексом ix_users_role_is_active.
+
+        Returns:
+            tuple[List[User], Optional[str]]: (пользователи, next_cursor или None)
+
+        Raises:
+            ValueError: Некорректный cursor
+        """
+        return await self._get_page(None, limit, cursor)
+
+    async def _get_page(
+        self, criterion, limit: int, cursor: Optional[str]
+    ) -> tuple[List[User], Optional[str]]:
+        """
+        Страница пользователей по ключу (role, is_active, id) вместо OFFSET.
+
+        Следующая страница начинается строго после последней строки текущей,
+        поэтому стоимость запроса не зависит от глубины пагинации.
+        """
+        stmt = select(User)
+        if criterion is not None:
+            stmt = stmt.where(criterion)
+        if cursor:
+            stmt = stmt.where(
+                tuple_(User.role, User.is_active, User.id) > decode_user_cursor(cursor)
+            )
+        # +1 строка - признак того, что есть следующая страница
+        stmt = stmt.order_by(User.role, User.is_active, User.id).limit(limit + 1)
+
+        result = await self.db.execute(stmt)
+        users = list(result.scalars().all())
+        if len(users) <= limit:
+            return users, None
+
+        users = users[:limit]
+        return users, encode_user_cursor(users[-1])
+
+    async def stream_users(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        """
+        Потоково прочитать всех пользователей (для экспорта).
+
+        Server-side cursor (session.stream + yield_per): в памяти держится
+        не больше batch_size строк, независимо от размера таблицы.
+
+        Args:
+            batch_size: Сколько строк забирать из курсора за раз
+
+        Yields:
+            User: Пользователи в порядке id
+        """
+        result = await self.db.stream(
+            select(User).order_by(User.id).execution_options(yield_per=batch_size)
         )
-        return list(result.scalars().all())
+        async for user in result.scalars():
+            yield user
 
     async def deactivate_user(self, user_id: int) -> bool:
-        """Деактивировать пользователя (soft delete)."""
-        user = await self.get_by_id(user_id)
-        if not user:
+        """Деактивировать пользователя (soft delete) одним UPDATE ... RETURNING."""
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(is_active=False)
+            .returning(User.id, User.telegram_id, User.username)
+        )
+        row = result.first()
+        if row is None:
             return False
 
-        user.is_active = False
-        await self.db.commit()
+        self._invalidate(*row)
+        await self._commit()
         return True
 
     async def get_or_create_user(
@@ -101,15 +597,43 @@ class UserService:
         """
         Получить существующего пользователя или создать нового.
 
+        Атомарно: INSERT ... ON CONFLICT (telegram_id) DO NOTHING RETURNING.
+        Конкурентные вызовы (два /start одновременно) не приводят к ошибке
+        дубликата. Существующая строка не перезаписывается (без новой версии
+        строки, WAL и блокировки) - если INSERT ничего не вернул, она читается
+        отдельным SELECT из primary (сессия уже закреплена за ним).
+
         Returns:
             tuple[User, bool]: (user, created) где created=True если пользователь создан
         """
-        existing = await self.get_by_telegram_id(telegram_id)
-        if existing:
-            return existing, False
+        if self.cache:
+            cached = await self.cache.get(UserCache.key_by_telegram_id(telegram_id))
+            if cached is not None:
+                return cached, False
 
-        user = await self.create_user(user_data)
-        return user, True
+        values = self._insert_values(user_data)
+        values["telegram_id"] = telegram_id
+        stmt = (
+            pg_insert(User)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=[User.telegram_id])
+            .returning(User)
+        )
+        user = (await self.db.execute(stmt)).scalar_one_or_none()
+        created = user is not None
+        if not created:
+            user = await self._fetch_one(User.telegram_id == telegram_id)
+            if user is None:
+                # Строку удалили между INSERT и SELECT - вставляем заново
+                user = (await self.db.execute(stmt)).scalar_one()
+                created = True
+        # Кеш заполняется и для существующего пользователя: следующий /start - из кеша
+        self._remember(user)
+        await self._commit()
+
+        if created:
+            logger.info(f"Created user {user.id} (telegram_id: {telegram_id})")
+        return user, created
 
     async def delete_user_by_telegram_id(self, telegram_id: int) -> bool:
         """
@@ -130,14 +654,17 @@ class UserService:
         Raises:
             Exception: При ошибке БД (транзакция откатывается)
         """
+        # Путь записи: SELECT пользователя и профиля - из primary, а не с отстающей реплики
+        use_primary(self.db)
         try:
-            # Находим пользователя
-            user = await self.get_by_telegram_id(telegram_id)
+            # Находим пользователя (в обход кеша - нужна актуальная строка)
+            user = await self._fetch_one(User.telegram_id == telegram_id)
             if not user:
                 logger.warning(f"User with telegram_id {telegram_id} not found for deletion")
                 return False
             
             user_id = user.id
+            cached_username = user.username
             username = user.username or f"user_{user_id}"
             
             logger.info(
@@ -193,7 +720,8 @@ class UserService:
             logger.info(f"Deleted User {user_id}")
             
             # Commit всей транзакции
-            await self.db.commit()
+            self._invalidate(user_id, telegram_id, cached_username)
+            await self._commit()
             
             removed_items = "User"
             if photographer:
@@ -209,7 +737,7 @@ class UserService:
             
         except Exception as e:
             # Rollback при любой ошибке
-            await self.db.rollback()
+            await self._rollback()
             logger.error(
                 f"Error deleting user {telegram_id}: {e}",
                 exc_info=True
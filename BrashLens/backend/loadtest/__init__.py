@@ -0,0 +1 @@
+"""Нагрузочное тестирование бота: заглушка Bot API и воспроизведение потока update."""
@@ -0,0 +1,244 @@
+"""
+Локальная заглушка Telegram Bot API для нагрузочных тестов.
+
+Реализует методы, которые использует app/bot: getMe, sendMessage,
+editMessageText, answerCallbackQuery, setWebhook, deleteWebhook,
+getUpdates, setMyCommands. Задержка ответа и доля ответов 429
+(RetryAfter) настраиваются.
+
+Бот направляется на заглушку через TELEGRAM_API_BASE_URL=http://localhost:8081.
+Отдельный запуск:
+    python -m loadtest.fake_bot_api --port 8081 --latency-ms 50 --retry-after-rate 0.01
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Any, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+BOT_ID = 7000000001
+
+
+class FakeBotAPI:
+    """
+    Состояние заглушки: отправленные сообщения, счетчики и ожидающие ответа.
+
+    Каждый вызов sendMessage/editMessageText для чата завершает ожидание
+    wait_reply(chat_id) - так replay измеряет время от отправки update до
+    ответа бота.
+    """
+
+    def __init__(
+        self,
+        username: str = "brashlens_load_bot",
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        retry_after_rate: float = 0.0,
+        retry_after: int = 1,
+    ):
+        """
+        Инициализация FakeBotAPI.
+
+        Args:
+            username: username бота в getMe (содержит "test" - бот считается тестовым)
+            latency_ms: Задержка каждого ответа
+            jitter_ms: Случайная добавка к задержке (0..jitter_ms)
+            retry_after_rate: Доля запросов, получающих 429 Too Many Requests
+            retry_after: Значение retry_after в ответе 429, секунд
+        """
+        self.username = username
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.calls: Counter = Counter()
+        self.retry_after_sent = 0
+        self.last_message: dict[int, dict] = {}
+        self._message_ids = itertools.count(1)
+        self._updates: asyncio.Queue = asyncio.Queue()
+        self._waiters: dict[int, list[asyncio.Future]] = defaultdict(list)
+
+    # --- Ожидание ответа бота (используется replay) ---
+
+    def wait_reply(self, chat_id: int) -> asyncio.Future:
+        """Future, которое завершится следующим sendMessage/editMessageText в чат."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id].append(future)
+        return future
+
+    def _notify(self, chat_id: int, message: dict) -> None:
+        self.last_message[chat_id] = message
+        for future in self._waiters.pop(chat_id, []):
+            if not future.done():
+                future.set_result(message)
+
+    def push_update(self, update: dict) -> None:
+        """Положить update в очередь getUpdates (режим polling)."""
+        self._updates.put_nowait(update)
+
+    # --- Методы Bot API ---
+
+    def _message(self, chat_id: int, text: str, reply_markup: Any = None, message_id: Optional[int] = None) -> dict:
+        message = {
+            "message_id": message_id or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+            "from": {"id": BOT_ID, "is_bot": True, "first_name": "BrashLens", "username": self.username},
+            "text": text,
+        }
+        if reply_markup:
+            message["reply_markup"] = reply_markup
+        return message
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        timeout = float(params.get("timeout") or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self._updates.get(), timeout=min(timeout, 10) or 0.01))
+        except asyncio.TimeoutError:
+            return []
+        while not self._updates.empty():
+            updates.append(self._updates.get_nowait())
+        return updates
+
+    async def call(self, method: str, params: dict) -> Any:
+        """
+        Выполнить метод Bot API.
+
+        Returns:
+            Any: Поле result ответа Telegram
+        """
+        if method == "getMe":
+            return {
+                "id": BOT_ID,
+                "is_bot": True,
+                "first_name": "BrashLens",
+                "username": self.username,
+                "can_join_groups": False,
+                "can_read_all_group_messages": False,
+                "supports_inline_queries": False,
+            }
+        if method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            message = self._message(chat_id, params.get("text", ""), params.get("reply_markup"))
+            self._notify(chat_id, message)
+            return message
+        if method == "editMessageText":
+            chat_id = int(params["chat_id"])
+            message = self._message(
+                chat_id, params.get("text", ""), params.get("reply_markup"), int(params["message_id"])
+            )
+            self._notify(chat_id, message)
+            return message
+        if method == "getUpdates":
+            return await self._get_updates(params)
+        if method in ("answerCallbackQuery", "setWebhook", "deleteWebhook", "setMyCommands"):
+            return True
+        raise KeyError(method)
+
+    def stats(self) -> dict:
+        return {
+            "calls": dict(self.calls),
+            "retry_after_sent": self.retry_after_sent,
+            "pending_updates": self._updates.qsize(),
+        }
+
+
+async def _read_params(request: Request) -> dict:
+    # PTB отправляет параметры формой, сложные значения (reply_markup) - JSON-строкой
+    content_type = request.headers.get("content-type", "")
+    if "application/json" in content_type:
+        params = await request.json()
+    elif content_type:
+        params = dict(await request.form())
+    else:
+        params = dict(request.query_params)
+    for key, value in params.items():
+        if isinstance(value, str) and value[:1] in "{[":
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                pass
+    return params
+
+
+def create_app(fake: FakeBotAPI) -> FastAPI:
+    """FastAPI приложение заглушки поверх состояния fake."""
+    app = FastAPI(title="Fake Telegram Bot API")
+
+    @app.api_route("/bot{token}/{method}", methods=["GET", "POST"])
+    async def bot_method(token: str, method: str, request: Request) -> JSONResponse:
+        params = await _read_params(request)
+        fake.calls[method] += 1
+
+        delay = fake.latency_ms + random.uniform(0, fake.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if method != "getUpdates" and fake.retry_after_rate and random.random() < fake.retry_after_rate:
+            fake.retry_after_sent += 1
+            return JSONResponse(
+                status_code=429,
+                content={
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {fake.retry_after}",
+                    "parameters": {"retry_after": fake.retry_after},
+                },
+            )
+
+        try:
+            result = await fake.call(method, params)
+        except KeyError:
+            return JSONResponse(
+                status_code=404,
+                content={"ok": False, "error_code": 404, "description": f"Not Found: method {method} is not faked"},
+            )
+        return JSONResponse(content={"ok": True, "result": result})
+
+    @app.post("/fake/updates")
+    async def push_update(request: Request) -> dict:
+        fake.push_update(await request.json())
+        return {"ok": True}
+
+    @app.get("/fake/stats")
+    async def stats() -> dict:
+        return fake.stats()
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--username", default="brashlens_load_bot")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--retry-after-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeBotAPI(
+        username=args.username,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        retry_after_rate=args.retry_after_rate,
+        retry_after=args.retry_after,
+    )
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
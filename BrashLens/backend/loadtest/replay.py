@@ -0,0 +1,261 @@
+"""
+Воспроизведение синтетического потока update в webhook бота.
+
+Каждый синтетический пользователь проходит сценарий:
+/start -> выбор роли (если бот предложил) -> /delete_me -> подтверждение удаления.
+Следующий шаг отправляется после ответа бота на предыдущий, общий темп
+отправки ограничен --rate update/с. Ответы бота принимает встроенная
+заглушка Bot API (loadtest.fake_bot_api): задержка handler - время от
+отправки update до sendMessage/editMessageText в этот чат.
+
+Пример (бот внутри API, WEBHOOK_API_ENABLED=True, TELEGRAM_API_BASE_URL=http://localhost:8081):
+    python -m loadtest.replay --webhook-url http://localhost:8000/api/v1/webhook --rate 100 --users 200
+
+Запросы к БД на update считаются по GET /api/v1/health/db/pool (поле queries)
+до и после прогона - если бот работает в процессе API.
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from collections import defaultdict
+from typing import Optional
+
+import httpx
+import uvicorn
+
+from loadtest.fake_bot_api import FakeBotAPI, create_app
+
+
+class Pacer:
+    """Равномерный темп отправки: не больше rate событий в секунду."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = time.monotonic()
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Replay:
+    """Генерация сценариев, отправка update и сбор задержек."""
+
+    def __init__(
+        self,
+        fake: FakeBotAPI,
+        client: httpx.AsyncClient,
+        webhook_url: str,
+        rate: float,
+        reply_timeout: float,
+        user_id_base: int,
+    ):
+        self.fake = fake
+        self.client = client
+        self.webhook_url = webhook_url
+        self.pacer = Pacer(rate)
+        self.reply_timeout = reply_timeout
+        self.user_id_base = user_id_base
+        # update_id уникальны между прогонами: бот отбрасывает повторные update_id
+        self._update_ids = itertools.count(int(time.time() * 1000) % 2**31)
+        self._message_ids = itertools.count(1)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.sent = 0
+        self.timeouts: dict[str, int] = defaultdict(int)
+        self.rejected = 0
+
+    def _user(self, index: int) -> dict:
+        user_id = self.user_id_base + index
+        return {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": f"Load{index}",
+            "username": f"load_user_{index}",
+            "language_code": "ru",
+        }
+
+    def _command(self, user: dict, command: str) -> dict:
+        return {
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user["id"], "type": "private", "first_name": user["first_name"]},
+                "from": user,
+                "text": command,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+            },
+        }
+
+    def _callback(self, user: dict, data: str, message: dict) -> dict:
+        update_id = next(self._update_ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": f"{user['id']}-{update_id}",
+                "from": user,
+                "chat_instance": str(user["id"]),
+                "data": data,
+                "message": message,
+            },
+        }
+
+    async def _step(self, name: str, chat_id: int, update: dict) -> Optional[dict]:
+        """Отправить update и дождаться ответа бота в чат."""
+        reply = self.fake.wait_reply(chat_id)
+        await self.pacer.wait()
+        started = time.monotonic()
+        response = await self.client.post(self.webhook_url, json=update)
+        self.sent += 1
+        if response.status_code != 200:
+            self.rejected += 1
+            reply.cancel()
+            return None
+        try:
+            message = await asyncio.wait_for(reply, timeout=self.reply_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[name] += 1
+            return None
+        self.latencies[name].append(time.monotonic() - started)
+        return message
+
+    @staticmethod
+    def _buttons(message: dict) -> list[str]:
+        keyboard = (message.get("reply_markup") or {}).get("inline_keyboard", [])
+        return [button.get("callback_data", "") for row in keyboard for button in row]
+
+    async def run_user(self, index: int) -> None:
+        user = self._user(index)
+        chat_id = user["id"]
+
+        message = await self._step("start", chat_id, self._command(user, "/start"))
+        if message is None:
+            return
+        roles = [data for data in self._buttons(message) if data.startswith("role_")]
+        if roles:
+            message = await self._step("role", chat_id, self._callback(user, roles[index % len(roles)], message))
+            if message is None:
+                return
+
+        message = await self._step("delete_me", chat_id, self._command(user, "/delete_me"))
+        if message is None or "delete_confirm" not in self._buttons(message):
+            return
+        await self._step("delete_confirm", chat_id, self._callback(user, "delete_confirm", message))
+
+
+async def _db_queries(client: httpx.AsyncClient, stats_url: str) -> Optional[int]:
+    if not stats_url:
+        return None
+    try:
+        response = await client.get(stats_url)
+        return int(response.json()["queries"])
+    except (httpx.HTTPError, ValueError, KeyError):
+        return None
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(percent) - 1]
+
+
+def _report(replay: Replay, fake: FakeBotAPI, elapsed: float, queries: Optional[int]) -> None:
+    print(f"\nSent {replay.sent} updates in {elapsed:.1f}s ({replay.sent / elapsed:.1f} updates/s), "
+          f"rejected by webhook: {replay.rejected}")
+    print(f"{'step':<16}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'timeouts':>10}")
+    all_latencies = []
+    for name in ("start", "role", "delete_me", "delete_confirm"):
+        values = replay.latencies.get(name, [])
+        all_latencies.extend(values)
+        if not values and not replay.timeouts.get(name):
+            continue
+        if values:
+            print(f"{name:<16}{len(values):>8}{_percentile(values, 50) * 1000:>10.1f}"
+                  f"{_percentile(values, 99) * 1000:>10.1f}{max(values) * 1000:>10.1f}{replay.timeouts[name]:>10}")
+        else:
+            print(f"{name:<16}{0:>8}{'-':>10}{'-':>10}{'-':>10}{replay.timeouts[name]:>10}")
+    if all_latencies:
+        print(f"{'all':<16}{len(all_latencies):>8}{_percentile(all_latencies, 50) * 1000:>10.1f}"
+              f"{_percentile(all_latencies, 99) * 1000:>10.1f}{max(all_latencies) * 1000:>10.1f}"
+              f"{sum(replay.timeouts.values()):>10}")
+    if queries is not None and replay.sent:
+        print(f"DB queries per update: {queries / replay.sent:.2f} ({queries} total)")
+    else:
+        print("DB queries per update: n/a (stats endpoint unavailable)")
+    print(f"Fake Bot API: {fake.stats()}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    fake = FakeBotAPI(
+        username=args.bot_username,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        retry_after_rate=args.retry_after_rate,
+        retry_after=args.retry_after,
+    )
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(fake), host=args.fake_host, port=args.fake_port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            await server_task
+            raise RuntimeError("Fake Bot API failed to start")
+        await asyncio.sleep(0.05)
+    print(f"Fake Bot API listening on http://{args.fake_host}:{args.fake_port} "
+          f"(set TELEGRAM_API_BASE_URL for the bot)")
+
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        replay = Replay(fake, client, args.webhook_url, args.rate, args.reply_timeout, args.user_id_base)
+        queries_before = await _db_queries(client, args.stats_url)
+
+        semaphore = asyncio.Semaphore(args.users)
+
+        async def user(index: int) -> None:
+            async with semaphore:
+                await replay.run_user(index)
+
+        started = time.monotonic()
+        await asyncio.gather(*(user(index) for index in range(args.total_users)))
+        elapsed = time.monotonic() - started
+
+        queries_after = await _db_queries(client, args.stats_url)
+        queries = (
+            queries_after - queries_before
+            if queries_before is not None and queries_after is not None
+            else None
+        )
+
+    _report(replay, fake, elapsed, queries)
+    server.should_exit = True
+    await server_task
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay synthetic Telegram updates against the bot webhook")
+    parser.add_argument("--webhook-url", default="http://localhost:8000/api/v1/webhook")
+    parser.add_argument("--stats-url", default="http://localhost:8000/api/v1/health/db/pool",
+                        help="Endpoint с полем queries; пустая строка - не считать запросы к БД")
+    parser.add_argument("--rate", type=float, default=50.0, help="Update в секунду (суммарно)")
+    parser.add_argument("--users", type=int, default=100, help="Одновременно активных пользователей")
+    parser.add_argument("--total-users", type=int, default=500, help="Всего пользователей (сценариев)")
+    parser.add_argument("--user-id-base", type=int, default=900_000_000)
+    parser.add_argument("--reply-timeout", type=float, default=10.0)
+    parser.add_argument("--fake-host", default="127.0.0.1")
+    parser.add_argument("--fake-port", type=int, default=8081)
+    parser.add_argument("--bot-username", default="brashlens_load_bot")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Задержка ответов заглушки Bot API")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="Доля ответов 429 RetryAfter")
+    parser.add_argument("--retry-after", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
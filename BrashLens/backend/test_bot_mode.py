@@ -0,0 +1,47 @@
+"""Тесты определения режима бота по getMe (без обращения к Telegram)."""
+import asyncio
+
+import httpx
+
+from app.core.bot_mode import BotModeDetector
+
+
+def test_failed_refresh_is_not_reissued(monkeypatch, tmp_path):
+    """Пока Telegram недоступен, следующий is_test_bot() не запрашивает getMe повторно."""
+    requests = []
+
+    async def get(self, url, **kwargs):
+        requests.append(url)
+        raise httpx.ConnectError("telegram is unreachable")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", get)
+    detector = BotModeDetector("123:abc", cache_dir=str(tmp_path))
+
+    async def run():
+        assert detector.is_test_bot() is False
+        await detector._refresh_task
+        assert detector.is_test_bot() is False
+        assert detector._refresh_task.done()
+
+        # После паузы getMe повторяется, пауза удваивается
+        detector._retry_at = 0.0
+        detector.is_test_bot()
+        await detector._refresh_task
+
+    asyncio.run(run())
+    assert len(requests) == 2
+    assert detector._retry_delay == BotModeDetector.RETRY_DELAY * 4
+
+
+def test_successful_refresh_resets_backoff(monkeypatch, tmp_path):
+    """Успешный getMe сохраняет режим и сбрасывает паузу повтора."""
+    async def get(self, url, **kwargs):
+        return httpx.Response(200, json={"ok": True, "result": {"username": "brash_test_bot"}})
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", get)
+    detector = BotModeDetector("123:abc", cache_dir=str(tmp_path))
+    detector._retry_delay = BotModeDetector.MAX_RETRY_DELAY
+
+    assert asyncio.run(detector.refresh()) is True
+    assert detector.is_test_bot() is True
+    assert detector._retry_delay == BotModeDetector.RETRY_DELAY
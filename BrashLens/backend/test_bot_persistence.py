@@ -0,0 +1,149 @@
+"""Тесты RedisPersistence: состояние разговора общее для реплик бота (без Redis и Telegram)."""
+import asyncio
+import datetime
+
+from telegram import CallbackQuery, Chat, Message, MessageEntity, Update, User
+from telegram.ext import ApplicationBuilder, CallbackQueryHandler, CommandHandler, ConversationHandler
+
+from app.bot.application import BotApplication
+from app.bot.persistence import ConversationSyncHook, RedisPersistence, check_conversation_internals
+
+BOT = User(123, "bot", True, username="brash_test_bot")
+USER = User(7, "Иван", False)
+CHAT = Chat(7, Chat.PRIVATE)
+CHOOSING_ROLE = 1
+
+
+class FakeRedis:
+    """Хранилище строк и hash в памяти с нужным RedisPersistence подмножеством команд."""
+
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value):
+        self.strings[key] = value
+
+    async def delete(self, key):
+        self.strings.pop(key, None)
+        self.hashes.pop(key, None)
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((getattr(self.redis, name), args))
+        return queue
+
+    async def execute(self):
+        return [await command(*args) for command, args in self.commands]
+
+
+async def start(update, context):
+    return CHOOSING_ROLE
+
+
+async def role_chosen(update, context):
+    context.user_data["role"] = update.callback_query.data
+    return ConversationHandler.END
+
+
+def _replica(redis: FakeRedis) -> BotApplication:
+    """Экземпляр бота с RedisPersistence на общем Redis; из шагов обработки - только синхронизация."""
+    application = (
+        ApplicationBuilder()
+        .token("123:abc")
+        .application_class(BotApplication)
+        .persistence(RedisPersistence(redis=redis, update_interval=3600))
+        .build()
+    )
+    application.update_hooks = [hook for hook in application.update_hooks if isinstance(hook, ConversationSyncHook)]
+    application.bot._bot_user = BOT
+    application.bot._initialized = True
+    application.add_handler(
+        ConversationHandler(
+            entry_points=[CommandHandler("start", start)],
+            states={CHOOSING_ROLE: [CallbackQueryHandler(role_chosen, pattern="^role_")]},
+            fallbacks=[],
+            name="registration",
+            persistent=True,
+        )
+    )
+    return application
+
+
+def _command(update_id: int, text: str) -> Update:
+    entity = MessageEntity(MessageEntity.BOT_COMMAND, 0, len(text))
+    message = Message(update_id, datetime.datetime.now(), CHAT, from_user=USER, text=text, entities=[entity])
+    return Update(update_id, message=message)
+
+
+def _callback(update_id: int, data: str) -> Update:
+    message = Message(update_id, datetime.datetime.now(), CHAT, from_user=BOT, text="Выберите роль")
+    return Update(update_id, callback_query=CallbackQuery(str(update_id), USER, "chat", message=message, data=data))
+
+
+async def _process(application: BotApplication, update: Update) -> None:
+    # Как из webhook: update и вложенные объекты привязаны к боту реплики
+    await application.process_update(Update.de_json(update.to_dict(), application.bot))
+
+
+def test_conversation_internals_available():
+    """Установленная версия PTB совместима с refresh_conversations."""
+    check_conversation_internals()
+
+
+def test_update_conversation_writes_through():
+    """Состояние разговора попадает в Redis сразу, без ожидания update_interval."""
+    redis = FakeRedis()
+
+    async def run():
+        application = _replica(redis)
+        await application.initialize()
+        await application.persistence.update_conversation("registration", (7, 7), CHOOSING_ROLE)
+        return application.persistence._key("conv:registration")
+
+    key = asyncio.run(run())
+    assert redis.hashes[key] == {"[7, 7]": "1"}
+
+
+def test_other_replica_continues_conversation():
+    """/start на одной реплике, выбор роли на другой: вторая видит состояние CHOOSING_ROLE."""
+    redis = FakeRedis()
+
+    async def run():
+        first, second = _replica(redis), _replica(redis)
+        await first.initialize()
+        await second.initialize()
+
+        await _process(first, _command(1, "/start"))
+        await _process(second, _callback(2, "role_client"))
+        await second.persistence.flush()
+        return second
+
+    second = asyncio.run(run())
+    assert second.user_data[USER.id] == {"role": "role_client"}
+    # Разговор завершен на второй реплике - состояние удалено из Redis
+    assert redis.hashes[second.persistence._key("conv:registration")] == {}
@@ -0,0 +1,47 @@
+"""Тесты rate limiter исходящих запросов бота (без обращения к Telegram)."""
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from app.bot.rate_limiter import TelegramRateLimiter
+
+CHAT_ID = 7
+
+
+def test_retry_after_pauses_request_waiting_for_token():
+    """
+    RetryAfter пришел, пока второй запрос ждал токен чата: второй запрос
+    отправляется только после паузы, а не сразу по получении токена.
+    """
+
+    async def run():
+        limiter = TelegramRateLimiter(overall_per_second=30, chat_per_second=10, max_retries=1)
+        sent: dict[str, list[float]] = {"first": [], "second": []}
+        pause_until = []
+
+        async def first():
+            sent["first"].append(time.monotonic())
+            if len(sent["first"]) == 1:
+                # Второй запрос уже стоит в очереди bucket чата
+                await asyncio.sleep(0.02)
+                pause_until.append(time.monotonic() + 1)
+                raise RetryAfter(1)
+            return True
+
+        async def second():
+            sent["second"].append(time.monotonic())
+            return True
+
+        async def request(callback):
+            return await limiter.process_request(callback, (), {}, "sendMessage", {"chat_id": CHAT_ID}, None)
+
+        first_task = asyncio.create_task(request(first))
+        await asyncio.sleep(0)
+        results = await asyncio.gather(first_task, request(second))
+        return results, sent, pause_until[0], limiter.stats()
+
+    results, sent, pause_until, stats = asyncio.run(run())
+    assert results == [True, True]
+    assert sent["second"][0] >= pause_until - 0.01
+    assert stats["retries"] == 1 and stats["sent"] == 2
@@ -0,0 +1,76 @@
+"""Тесты маршрутизации чтений на read-реплики (без подключения к PostgreSQL)."""
+import asyncio
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.core.database as database
+from app.core.config import settings
+from app.core.database import ReplicaRouter, RoutingSession, use_primary
+from app.models.user import User
+
+REPLICA_URLS = ["postgresql://u:p@replica-1/db", "postgresql://u:p@replica-2/db"]
+
+
+def _router_with_lags(monkeypatch, lags: dict[int, float]) -> ReplicaRouter:
+    """ReplicaRouter, у которого отставание реплик подставлено вместо запроса в БД."""
+    router = ReplicaRouter(REPLICA_URLS)
+
+    async def measure(replica):
+        return lags[router.engines.index(replica)]
+
+    monkeypatch.setattr(router, "_measure", measure)
+    return router
+
+
+def test_unchecked_replicas_are_not_used(monkeypatch):
+    """Пока монитор не проверил реплики, чтения идут в primary."""
+    router = _router_with_lags(monkeypatch, {0: 0.0, 1: 0.0})
+    assert router.choose() is None
+
+
+def test_lagging_replica_is_skipped(monkeypatch):
+    """Реплика с отставанием больше DB_REPLICA_MAX_LAG_SECONDS не выбирается."""
+    router = _router_with_lags(monkeypatch, {0: settings.DB_REPLICA_MAX_LAG_SECONDS + 1, 1: 0.0})
+    asyncio.run(router.check())
+
+    chosen = {router.choose() for _ in range(4)}
+    assert chosen == {router.engines[1]}
+
+
+def test_stale_check_falls_back_to_primary(monkeypatch):
+    """Если монитор давно не проверял реплики (остановился), они не используются."""
+    router = _router_with_lags(monkeypatch, {0: 0.0, 1: 0.0})
+    asyncio.run(router.check())
+    assert router.choose() is not None
+
+    stale = settings.DB_REPLICA_CHECK_INTERVAL * (ReplicaRouter.STALE_AFTER_CHECKS + 1)
+    router.checked_at = [checked_at - stale for checked_at in router.checked_at]
+    assert router.choose() is None
+
+
+def test_write_pins_session_to_primary(monkeypatch):
+    """После записи все чтения сессии идут в primary."""
+    router = _router_with_lags(monkeypatch, {0: 0.0, 1: 0.0})
+    asyncio.run(router.check())
+    monkeypatch.setattr(database, "replica_router", router)
+
+    session = RoutingSession()
+    read = select(User).where(User.telegram_id == 1)
+    replica = session.get_bind(clause=read)
+    assert replica in {replica_engine.sync_engine for replica_engine in router.engines}
+    # Реплика закреплена за сессией до первой записи
+    assert session.get_bind(clause=read) is replica
+
+    assert session.get_bind(clause=insert(User).values(telegram_id=1)) is database.engine.sync_engine
+    assert session.get_bind(clause=read) is database.engine.sync_engine
+
+
+def test_use_primary_routes_reads_to_primary(monkeypatch):
+    """use_primary() отправляет в primary и первое чтение сессии (пути записи)."""
+    router = _router_with_lags(monkeypatch, {0: 0.0, 1: 0.0})
+    asyncio.run(router.check())
+    monkeypatch.setattr(database, "replica_router", router)
+
+    session = use_primary(AsyncSession(sync_session_class=RoutingSession))
+    assert session.sync_session.get_bind(clause=select(User)) is database.engine.sync_engine
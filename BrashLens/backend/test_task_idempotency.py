@@ -0,0 +1,183 @@
+"""Тесты идемпотентной постановки и выполнения Celery задач (без Redis и брокера)."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from celery import states
+from celery.exceptions import Ignore
+
+import app.services.task_idempotency as task_idempotency
+from app.core.celery_async import worker_loop
+from app.services.task_idempotency import _claim, idempotency_key, run_once, submit_idempotent
+
+REDIS_KEY = idempotency_key("tasks.test", "client-key")
+
+
+class FakeRedis:
+    """Строки в памяти с нужным task_idempotency подмножеством команд (TTL не учитывается)."""
+
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+        self.fail = False
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if self.fail:
+            raise ConnectionError("redis is down")
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    async def delete(self, key):
+        return int(self.strings.pop(key, None) is not None)
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        if script == task_idempotency._CLAIM_SCRIPT:
+            key, result_key, running_key = keys
+            if result_key in self.strings:
+                return ["done", self.strings[result_key]]
+            if await self.set(running_key, "1", nx=True, ex=args[0]):
+                return ["claimed"]
+            owner = self.strings.get(key)
+            return ["busy", owner] if owner is not None else ["busy"]
+        # _RELEASE_SCRIPT: удалить ключ, только если он указывает на value
+        if self.strings.get(keys[0]) == args[0]:
+            return await self.delete(keys[0])
+        return 0
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+        return queue
+
+    async def execute(self):
+        return [await command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class FakeTask:
+    """Задача Celery: запоминает apply_async и update_state."""
+
+    name = "tasks.test"
+    time_limit = 60
+
+    def __init__(self, task_id: str = "task-1", publish_error: Exception = None):
+        self.request = SimpleNamespace(id=task_id)
+        self.app = SimpleNamespace(conf=SimpleNamespace(task_time_limit=None))
+        self.publish_error = publish_error
+        self.published: list[str] = []
+        self.states: list[str] = []
+
+    def apply_async(self, args, kwargs, task_id, headers, **options):
+        if self.publish_error is not None:
+            raise self.publish_error
+        self.published.append(task_id)
+
+    def update_state(self, state, meta):
+        self.states.append(state)
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    fake = FakeRedis()
+    monkeypatch.setattr(task_idempotency, "get_redis_client", lambda: fake)
+    # Coroutine выполняются в asyncio.run вместо loop процесса worker
+    monkeypatch.setattr(worker_loop, "run", lambda coro, request=None: asyncio.run(coro))
+    return fake
+
+
+def test_duplicate_submit_returns_existing_task(redis):
+    """Повторная постановка с тем же ключом возвращает task_id первой и ничего не публикует."""
+    task = FakeTask()
+    first_id, created = asyncio.run(submit_idempotent(task, "client-key"))
+    second_id, duplicate_created = asyncio.run(submit_idempotent(task, "client-key"))
+
+    assert created and not duplicate_created
+    assert second_id == first_id
+    assert task.published == [first_id]
+
+
+def test_publish_failure_releases_key(redis):
+    """Если брокер недоступен, ключ освобождается и следующая попытка ставит задачу."""
+    with pytest.raises(ConnectionError):
+        asyncio.run(submit_idempotent(FakeTask(publish_error=ConnectionError("broker is down")), "client-key"))
+    assert REDIS_KEY not in redis.strings
+
+    task = FakeTask()
+    task_id, created = asyncio.run(submit_idempotent(task, "client-key"))
+    assert created and task.published == [task_id]
+
+
+def test_claim_paths(redis):
+    """Первый _claim занимает выполнение, второй видит его занятым, после результата - done."""
+    redis.strings[REDIS_KEY] = "task-1"
+
+    assert asyncio.run(_claim(REDIS_KEY, 60)) == ("claimed", None)
+    assert asyncio.run(_claim(REDIS_KEY, 60)) == ("busy", "task-1")
+    # Ключ идемпотентности истек: владелец блокировки неизвестен
+    del redis.strings[REDIS_KEY]
+    assert asyncio.run(_claim(REDIS_KEY, 60)) == ("busy", None)
+
+    redis.strings[f"{REDIS_KEY}:result"] = '{"status": "ok"}'
+    assert asyncio.run(_claim(REDIS_KEY, 60)) == ("done", {"status": "ok"})
+
+
+def test_run_once_stores_result_and_skips_redelivery(redis):
+    """Результат сохраняется; повторная доставка возвращает его без выполнения."""
+    redis.strings[REDIS_KEY] = "task-1"
+    calls = []
+
+    def execute():
+        calls.append(1)
+        return {"status": "ok"}
+
+    assert run_once(FakeTask(), REDIS_KEY, execute) == {"status": "ok"}
+    assert run_once(FakeTask(), REDIS_KEY, execute) == {"status": "ok"}
+    assert len(calls) == 1
+    assert f"{REDIS_KEY}:running" not in redis.strings
+
+
+def test_busy_redelivery_keeps_original_status(redis):
+    """Повторная доставка того же сообщения не перезаписывает статус выполняющегося оригинала."""
+    redis.strings[REDIS_KEY] = "task-1"
+    redis.strings[f"{REDIS_KEY}:running"] = "1"
+    task = FakeTask("task-1")
+
+    with pytest.raises(Ignore):
+        run_once(task, REDIS_KEY, lambda: pytest.fail("must not execute"))
+    assert task.states == []
+
+
+def test_busy_copy_is_marked_ignored(redis):
+    """Копия с другим task_id, пока оригинал выполняется, получает статус IGNORED."""
+    redis.strings[REDIS_KEY] = "task-1"
+    redis.strings[f"{REDIS_KEY}:running"] = "1"
+    task = FakeTask("task-2")
+
+    with pytest.raises(Ignore):
+        run_once(task, REDIS_KEY, lambda: pytest.fail("must not execute"))
+    assert task.states == [states.IGNORED]
+
+
+def test_finish_error_does_not_replace_task_error(redis):
+    """Ошибка Redis при завершении не подменяет исключение задачи."""
+    redis.strings[REDIS_KEY] = "task-1"
+
+    def execute():
+        redis.fail = True
+        raise ValueError("task failed")
+
+    with pytest.raises(ValueError, match="task failed"):
+        run_once(FakeTask(), REDIS_KEY, execute)
@@ -0,0 +1,59 @@
+"""Тесты очереди webhook-обновлений: порядок внутри чата без блокировки других чатов."""
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+from telegram import Chat, Message, Update, User
+
+from app.bot.update_processor import PerChatUpdateProcessor
+from app.bot.update_queue import UpdateQueue
+
+CHAT_A = Chat(1, Chat.PRIVATE)
+CHAT_B = Chat(2, Chat.PRIVATE)
+USER = User(1, "Иван", False)
+
+
+def _message(update_id: int, chat: Chat) -> Update:
+    message = Message(update_id, datetime.datetime.now(), chat, from_user=USER, text=f"update {update_id}")
+    return Update(update_id, message=message)
+
+
+def test_slow_chat_does_not_block_other_chats():
+    """
+    Медленный обработчик чата A и еще несколько update A в очереди:
+    update чата B обрабатывается, пока A ждет, хотя обработчиков всего два.
+    """
+
+    async def run():
+        release_a = asyncio.Event()
+        b_done = asyncio.Event()
+        handled: list[int] = []
+
+        async def process_update(update: Update) -> None:
+            if update.effective_chat.id == CHAT_A.id:
+                await release_a.wait()
+            else:
+                b_done.set()
+            handled.append(update.update_id)
+
+        application = SimpleNamespace(
+            update_processor=PerChatUpdateProcessor(max_concurrent_updates=8),
+            process_update=process_update,
+        )
+        queue = UpdateQueue(maxsize=100, workers=2)
+        queue.start(application)
+        for update_id in range(1, 6):
+            assert await queue.submit(_message(update_id, CHAT_A))
+        assert await queue.submit(_message(6, CHAT_B))
+
+        await asyncio.wait_for(b_done.wait(), timeout=1)
+        stats = queue.stats()
+
+        release_a.set()
+        await queue.stop(drain_timeout=1)
+        return handled, stats
+
+    handled, stats = asyncio.run(run())
+    # Серия чата A занимала один обработчик: остальные update A ждали в очереди чата
+    assert stats["deferred"] == 4
+    assert handled == [6, 1, 2, 3, 4, 5]